@@ -7,25 +7,36 @@ attribute values are intrinsic pixel dimensions — CSS still controls
 display size, but the aspect ratio is locked.
 
 For local images, dimensions are read from the PNG/JPEG headers on
-disk (no PIL dependency). For R2 images (img.zonted.com/...), a HEAD
-request fetches the first chunk and we parse the header bytes.
+disk (no PIL dependency). Every referenced path is resolved and
+de-duplicated up front, then probed once through an mmap so only the
+header pages the parser touches are read; the result fans back out to
+every <img> that references it. For R2 images (img.zonted.com/...), a
+ranged GET fetches the first chunk and we parse the header bytes.
+Remote fetches go through imgfetch.backend(), so ZONTED_FETCH=replay
+runs the whole script offline against recorded fixtures.
 
 Cached results live in scripts/.image-dims-cache.json so re-runs are
 fast and offline-safe.
 
 Usage:
   python3 scripts/add-image-dims.py
+  python3 scripts/add-image-dims.py --bench 200   # time the parsers over the fixtures
 """
 from __future__ import annotations
 
+import argparse
 import json
-import os
+import mmap
 import re
 import struct
 import sys
-import urllib.request
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import imgfetch
+
 ROOT = Path(__file__).resolve().parents[1]
 CACHE = ROOT / "scripts" / ".image-dims-cache.json"
 
@@ -98,7 +109,8 @@ def webp_dims(data: bytes) -> tuple[int, int] | None:
 
 def avif_dims(data: bytes) -> tuple[int, int] | None:
     # ISOBMFF box structure. Look for "ispe" box (Image Spatial Extents).
-    idx = data.find(b"ispe")
+    # Bounded so an mmap'd file without ispe isn't scanned end to end.
+    idx = data.find(b"ispe", 0, 65536)
     if idx == -1 or idx + 20 > len(data):
         return None
     # 8-byte box header (size + type), 4-byte version+flags, 4-byte width, 4-byte height
@@ -124,15 +136,64 @@ def resolve_local(src: str, post_dir: Path) -> Path | None:
     return (post_dir / src).resolve()
 
 
+def probe_local(path: Path) -> tuple[int, int] | None:
+    """Read dimensions through an mmap, faulting in only the header pages."""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return read_dims(mm)
+    except (OSError, ValueError, struct.error):
+        # ValueError: empty file (can't mmap 0 bytes); struct.error: truncated header.
+        return None
+
+
 def fetch_remote(src: str) -> bytes | None:
     """Fetch first 64KB from an http(s) URL. Returns None on error."""
     try:
-        req = urllib.request.Request(src, headers={"Range": "bytes=0-65535", "User-Agent": "zonted-img-dims/1.0"})
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            return resp.read(65536)
-    except Exception as e:
+        resp = imgfetch.backend().fetch(src, headers={"Range": "bytes=0-65535"}, max_bytes=65536)
+    except imgfetch.FetchError as e:
         print(f"  fetch failed: {src[:80]} → {e}", file=sys.stderr)
         return None
+    if resp.status >= 400:
+        print(f"  fetch failed: {src[:80]} → HTTP {resp.status}", file=sys.stderr)
+        return None
+    return resp.body
+
+
+def bench(rounds: int) -> int:
+    """Time read_dims over every recorded fixture body, per detected format.
+
+    Uses the replay fixtures (scripts/fixtures/images/, see imgfetch.py
+    record) so the numbers don't depend on the network.
+    """
+    try:
+        replay = imgfetch.ReplayBackend()
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    bodies = []
+    for url in sorted(replay.index):
+        resp = replay.request(url, headers={"Range": "bytes=0-65535"})
+        if resp.body:
+            bodies.append(resp.body)
+    if not bodies:
+        print(f"No fixtures under {replay.root}; run: python3 scripts/imgfetch.py record", file=sys.stderr)
+        return 1
+
+    timings: dict[str, float] = defaultdict(float)
+    counts: dict[str, int] = defaultdict(int)
+    for data in bodies:
+        fmt = next((fn.__name__[:-5] for fn in (png_dims, jpeg_dims, gif_dims, webp_dims, avif_dims) if fn(data)), "unknown")
+        started = time.perf_counter()
+        for _ in range(rounds):
+            read_dims(data)
+        timings[fmt] += time.perf_counter() - started
+        counts[fmt] += 1
+    for fmt in sorted(timings):
+        per_call = timings[fmt] / (counts[fmt] * rounds) * 1e6
+        print(f"{fmt:8s} {counts[fmt]:4d} images  {per_call:8.1f} µs/parse")
+    total = sum(timings.values())
+    print(f"Total: {len(bodies)} images × {rounds} rounds in {total:.3f}s")
+    return 0
 
 
 def load_cache() -> dict:
@@ -146,6 +207,12 @@ def save_cache(cache: dict) -> None:
 
 
 def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bench", type=int, metavar="ROUNDS", help="Benchmark the header parsers over the replay fixtures")
+    args = parser.parse_args()
+    if args.bench:
+        return bench(args.bench)
+
     cache: dict[str, list[int]] = load_cache()
     cache_hits = 0
     cache_misses = 0
@@ -158,12 +225,46 @@ def main() -> int:
     edited_tags = 0
     skipped_tags = 0
 
+    # Pass 1: collect every unannotated tag and resolve what it points at, so
+    # each distinct file / URL is probed exactly once no matter how many tags
+    # (or posts) reference it.
+    pages: list[tuple[Path, str]] = []
+    local_targets: dict[tuple[Path, str], Path | None] = {}
+    remote_srcs: set[str] = set()
     posts_dir = ROOT / "posts"
     for post_dir in sorted(posts_dir.iterdir()):
         idx = post_dir / "index.html"
         if not idx.is_file():
             continue
         s = idx.read_text()
+        pages.append((idx, s))
+        for m in img_re.finditer(s):
+            src = m.group(3)
+            if src in cache:
+                continue
+            if src.startswith(("http://", "https://", "//")):
+                remote_srcs.add(src)
+            elif (post_dir, src) not in local_targets:
+                p = resolve_local(src, post_dir)
+                local_targets[(post_dir, src)] = p if p and p.is_file() else None
+
+    # Pass 2: probe the de-duplicated set.
+    path_dims: dict[Path, tuple[int, int] | None] = {}
+    for p in set(local_targets.values()):
+        if p is not None:
+            path_dims[p] = probe_local(p)
+
+    def remote_probe(src: str) -> tuple[int, int] | None:
+        data = fetch_remote(src if not src.startswith("//") else "https:" + src)
+        return read_dims(data) if data else None
+
+    remote_order = sorted(remote_srcs)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        remote_dims = dict(zip(remote_order, pool.map(remote_probe, remote_order)))
+
+    # Pass 3: fan the results back out to every referencing tag.
+    for idx, s in pages:
+        post_dir = idx.parent
 
         def patch(m: re.Match) -> str:
             nonlocal cache_hits, cache_misses, edited_tags, skipped_tags
@@ -173,20 +274,11 @@ def main() -> int:
                 w, h = cache[src]
                 cache_hits += 1
             else:
-                if src.startswith(("http://", "https://", "//")):
-                    url = src if not src.startswith("//") else "https:" + src
-                    data = fetch_remote(url)
+                if src in remote_dims:
+                    dims = remote_dims[src]
                 else:
-                    p = resolve_local(src, post_dir)
-                    if not p or not p.exists():
-                        skipped_tags += 1
-                        return m.group(0)
-                    with open(p, "rb") as f:
-                        data = f.read(65536)
-                if not data:
-                    skipped_tags += 1
-                    return m.group(0)
-                dims = read_dims(data)
+                    p = local_targets.get((post_dir, src))
+                    dims = path_dims.get(p) if p is not None else None
                 if not dims:
                     skipped_tags += 1
                     return m.group(0)
@@ -205,6 +297,7 @@ def main() -> int:
     save_cache(cache)
     print(f"Edited {edited_tags} img tags across {edited_files} posts.")
     print(f"Cache hits: {cache_hits}  misses (newly resolved): {cache_misses}")
+    print(f"Probed {len(path_dims)} distinct local files and {len(remote_dims)} remote URLs.")
     print(f"Skipped (unreadable/unknown format): {skipped_tags}")
     return 0
 
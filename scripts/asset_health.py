@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""Check every asset and internal link referenced across zonted.com.
+
+Collects og:image, <img src>, internal hrefs and hub thumbnails from every
+static HTML page, then probes them concurrently: HEAD first, falling back to
+a one-byte range GET when the origin rejects HEAD or omits Content-Length.
+Requests go through imgfetch.backend(), whose connection pool caps
+in-flight requests per host so R2 never sees more than
+imgfetch.PER_HOST_LIMIT at once — and which lets the checker run offline
+against a mirror or recorded fixtures (ZONTED_FETCH).
+
+Each probe is flagged as:
+  missing      404 / 410, or a local file that doesn't exist
+  http-error   any other 4xx
+  stub         remote image smaller than STUB_BYTES (R2 has served 117-byte
+               stubs; small local SVGs and icons are fine)
+  redirect     3xx — works in a browser, but the reference should be updated
+  unreachable  DNS / TLS / timeout / 5xx; never treated as broken (fail-open),
+               so a transient origin hiccup can't change the build
+
+Results are cached in the workspace state directory (CACHE, outside the
+deployed checkout) with a TTL per outcome, so re-runs only re-probe stale entries. build.py imports
+check_urls() from here to drop or replace broken thumbnails automatically.
+
+Usage:
+  python3 scripts/asset_health.py              # probe stale entries, report
+  python3 scripts/asset_health.py --refresh    # ignore TTLs, re-probe all
+  python3 scripts/asset_health.py --offline    # report from cache only
+"""
+from __future__ import annotations
+
+import argparse
+import html
+import json
+import os
+import re
+import sys
+import time
+import urllib.parse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import imgfetch
+from metricslib.runtime import STATE_DIR
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE = STATE_DIR / "zonted-asset-health.json"
+SITE_HOSTS = {"zonted.com", "www.zonted.com"}
+SKIP_DIRS = {".git", ".wrangler", "node_modules", ".claude", "_templates"}
+
+STUB_BYTES = 1024
+MAX_WORKERS = 16
+
+# Seconds before a cached result is re-probed, by outcome. Healthy assets are
+# stable; broken ones get re-checked sooner so a re-upload is noticed quickly,
+# and network failures are retried on the next run.
+TTL_OK = 7 * 86400
+TTL_FLAGGED = 86400
+TTL_UNREACHABLE = 3600
+
+BROKEN_FLAGS = {"missing", "http-error", "stub"}
+
+OG_IMAGE_RE = re.compile(r'<meta\s+property=["\']og:image["\']\s+content=(["\'])(.*?)\1', re.IGNORECASE)
+IMG_SRC_RE = re.compile(r'<img\b[^>]*?\bsrc=(["\'])([^"\']+)\1', re.IGNORECASE)
+HREF_RE = re.compile(r'<a\b[^>]*?\bhref=(["\'])([^"\']+)\1', re.IGNORECASE)
+
+
+# ---------------------------------------------------------------------------
+# Reference collection
+# ---------------------------------------------------------------------------
+
+def page_url(path: Path) -> str:
+    rel = path.relative_to(ROOT).as_posix()
+    if rel.endswith("index.html"):
+        rel = rel[: -len("index.html")]
+    return "/" + rel
+
+
+def normalize(ref: str, page: str) -> str | None:
+    """Absolute URL (remote) or site-root path (local) for a reference, or None to skip."""
+    ref = html.unescape(ref.strip())
+    if not ref or "{{" in ref or ref.startswith(("#", "mailto:", "tel:", "javascript:", "data:")):
+        return None
+    if ref.startswith("//"):
+        ref = "https:" + ref
+    parsed = urllib.parse.urlsplit(ref)
+    if parsed.scheme in ("http", "https"):
+        if parsed.hostname in SITE_HOSTS:
+            return parsed.path or "/"
+        return urllib.parse.urlunsplit((parsed.scheme, parsed.netloc, parsed.path, parsed.query, ""))
+    if parsed.scheme:
+        return None
+    return urllib.parse.urljoin(page, parsed.path) or None
+
+
+def collect_references() -> dict[str, dict]:
+    """Map every referenced URL/path → {"kind": "image"|"link", "pages": [...]}.
+
+    A reference that is used both as an image and as a link is reported as an
+    image, since the stub check only applies to images.
+    """
+    refs: dict[str, dict] = {}
+
+    def add(url: str | None, kind: str, page: str) -> None:
+        if not url:
+            return
+        entry = refs.setdefault(url, {"kind": kind, "pages": []})
+        if kind == "image":
+            entry["kind"] = "image"
+        if page not in entry["pages"]:
+            entry["pages"].append(page)
+
+    for dirpath, dirnames, filenames in os.walk(ROOT):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for fn in sorted(filenames):
+            if not fn.endswith(".html"):
+                continue
+            path = Path(dirpath) / fn
+            page = page_url(path)
+            text = path.read_text(encoding="utf-8", errors="replace")
+            for m in OG_IMAGE_RE.finditer(text):
+                add(normalize(m.group(2), page), "image", page)
+            for m in IMG_SRC_RE.finditer(text):
+                add(normalize(m.group(2), page), "image", page)
+            for m in HREF_RE.finditer(text):
+                url = normalize(m.group(2), page)
+                # External links are out of scope; only internal hrefs are checked.
+                if url and url.startswith("/"):
+                    add(url, "link", page)
+    return refs
+
+
+# ---------------------------------------------------------------------------
+# Probing
+# ---------------------------------------------------------------------------
+
+def local_path(url: str) -> Path | None:
+    """Resolve a site-root path the way Cloudflare Pages serves it."""
+    rel = urllib.parse.unquote(url.split("?", 1)[0]).lstrip("/")
+    base = ROOT / rel
+    for candidate in (base, base / "index.html", base.with_name(base.name + ".html")):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def probe_local(url: str) -> dict:
+    path = local_path(url)
+    if path is None:
+        return {"status": 404, "bytes": None}
+    return {"status": 200, "bytes": path.stat().st_size, "local": True}
+
+
+def probe_remote(url: str) -> dict:
+    fetcher = imgfetch.backend()
+    try:
+        resp = fetcher.request(url, method="HEAD")
+        size = imgfetch.total_bytes(resp)
+        if resp.status in (403, 405, 501) or (resp.status == 200 and size is None):
+            resp = fetcher.request(url, headers={"Range": "bytes=0-0"}, max_bytes=1)
+            size = imgfetch.total_bytes(resp)
+    except imgfetch.FetchError as exc:
+        return {"status": None, "bytes": None, "error": str(exc)[:200]}
+    result: dict = {"status": 200 if resp.status == 206 else resp.status, "bytes": size}
+    location = resp.header("Location")
+    if 300 <= resp.status < 400 and location:
+        result["location"] = urllib.parse.urljoin(url, location)
+    return result
+
+
+def probe(url: str) -> dict:
+    result = probe_local(url) if url.startswith("/") else probe_remote(url)
+    result["checked"] = int(time.time())
+    return result
+
+
+def flags_for(result: dict, kind: str = "image") -> list[str]:
+    status = result.get("status")
+    if status is None or status >= 500:
+        return ["unreachable"]
+    if status in (404, 410):
+        return ["missing"]
+    if status >= 400:
+        return ["http-error"]
+    if 300 <= status < 400:
+        return ["redirect"]
+    size = result.get("bytes")
+    if kind == "image" and not result.get("local") and size is not None and size < STUB_BYTES:
+        return ["stub"]
+    return []
+
+
+def is_broken(result: dict | None, kind: str = "image") -> bool:
+    """True when a cached probe says the asset should not be referenced."""
+    return bool(result) and bool(BROKEN_FLAGS.intersection(flags_for(result, kind)))
+
+
+def _ttl(result: dict) -> int:
+    flags = flags_for(result)
+    if "unreachable" in flags:
+        return TTL_UNREACHABLE
+    return TTL_FLAGGED if flags else TTL_OK
+
+
+def load_cache() -> dict:
+    if CACHE.exists():
+        return json.loads(CACHE.read_text())
+    return {}
+
+
+def save_cache(cache: dict) -> None:
+    CACHE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CACHE.with_name(f"{CACHE.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(cache, indent=2, sort_keys=True))
+    os.replace(tmp, CACHE)
+
+
+def check_urls(urls, *, refresh: bool = False, offline: bool = False) -> dict[str, dict]:
+    """Return {url: probe result} for each URL, probing only stale entries.
+
+    Local site paths (leading "/") are always re-checked on disk since that is
+    free. With offline=True, remote URLs come from the cache only; uncached
+    ones are simply absent from the result.
+    """
+    cache = load_cache()
+    now = time.time()
+    urls = list(dict.fromkeys(u for u in urls if u))
+    results: dict[str, dict] = {}
+    stale: list[str] = []
+    for url in urls:
+        cached = cache.get(url)
+        if url.startswith("/"):
+            results[url] = probe(url)
+        elif cached and not refresh and now - cached.get("checked", 0) < _ttl(cached):
+            results[url] = cached
+        elif offline:
+            if cached:
+                results[url] = cached
+        else:
+            stale.append(url)
+
+    if stale:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            for url, result in zip(stale, pool.map(probe, stale)):
+                results[url] = result
+                cache[url] = result
+        save_cache(cache)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--refresh", action="store_true", help="Ignore cache TTLs and re-probe everything")
+    parser.add_argument("--offline", action="store_true", help="Report from the cache only; no network")
+    parser.add_argument("--strict", action="store_true", help="Exit 1 when anything is missing, erroring or a stub")
+    args = parser.parse_args()
+
+    refs = collect_references()
+    started = time.time()
+    results = check_urls(refs, refresh=args.refresh, offline=args.offline)
+    elapsed = time.time() - started
+
+    flagged: dict[str, list[tuple[str, dict]]] = defaultdict(list)
+    for url, ref in sorted(refs.items()):
+        result = results.get(url)
+        if not result:
+            continue
+        for flag in flags_for(result, ref["kind"]):
+            flagged[flag].append((url, ref))
+
+    for flag in ("missing", "http-error", "stub", "redirect", "unreachable"):
+        rows = flagged.get(flag)
+        if not rows:
+            continue
+        print(f"\n{flag} ({len(rows)})")
+        for url, ref in rows:
+            result = results[url]
+            detail = result.get("location") or result.get("error") or (
+                f"{result['bytes']} bytes" if flag == "stub" else f"HTTP {result.get('status')}"
+            )
+            pages = ", ".join(ref["pages"][:3]) + (" …" if len(ref["pages"]) > 3 else "")
+            print(f"  {url}  [{detail}]  ← {pages}")
+
+    remote = sum(1 for url in refs if not url.startswith("/"))
+    print(f"\nChecked {len(refs)} references ({remote} remote) in {elapsed:.1f}s.")
+    broken = sum(len(flagged.get(flag, [])) for flag in BROKEN_FLAGS)
+    print(f"Broken: {broken}  redirects: {len(flagged.get('redirect', []))}  unreachable: {len(flagged.get('unreachable', []))}")
+    return 1 if args.strict and broken else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Benchmark and dry-run the metrics pipeline offline.
+
+Two modes, both writing into a scratch directory (the site's metrics/ and
+the cron workspace are never touched):
+
+  synthetic (default)  time each stage of the nightly update — recording into
+                       the metrics store, anomaly detection, update_html, and
+                       the bare page render — over a generated portfolio of
+                       --properties GA4 + Search Console properties
+  --replay DIR         run update-metrics-cron.py and update-social-snapshot.py
+                       end to end against a cassette recorded on the Mac with
+                       ZONTED_METRICS_RECORD=DIR (see metricslib/replay.py)
+
+Usage:
+  python3 scripts/bench-metrics.py [--properties 120] [--rounds 5]
+  python3 scripts/bench-metrics.py --replay scripts/fixtures/metrics [--out DIR]
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+PALETTE = ["#2a7a2a", "#336699", "#c13584", "#cc0000", "#6366f1", "#d97706", "#0f766e", "#111111"]
+SOURCE_MEDIA = ["(direct) / (none)", "google / organic", "bing / organic", "duckduckgo / organic",
+                "t.co / referral", "reddit.com / referral", "news.ycombinator.com / referral",
+                "newsletter / email", "chatgpt.com / referral", "instagram.com / referral"]
+
+
+def label(day: date) -> str:
+    return f"{day.strftime('%b')} {day.day}"
+
+
+def daily_series(rng: random.Random, days: int, level: float) -> list[int]:
+    """Weekly seasonality, a gentle trend and noise — enough shape for the detectors and LTTB."""
+    trend = rng.uniform(-0.3, 0.5) / days
+    return [
+        max(int(level * (1 + trend * i) * (0.75 if (i % 7) in (5, 6) else 1.0) * rng.uniform(0.8, 1.2)), 0)
+        for i in range(days)
+    ]
+
+
+def synthetic_portfolio(count: int, run_date: date, seed: int = 7) -> dict:
+    """A metricslib.analytics-shaped payload with `count` GA4 and Search Console properties."""
+    rng = random.Random(seed)
+    ga4_days = [run_date - timedelta(days=89 - i) for i in range(90)]
+    gsc_days = [day - timedelta(days=2) for day in ga4_days]
+    properties, search = [], []
+    for i in range(count):
+        key, color = f"site{i:03d}", PALETTE[i % len(PALETTE)]
+        name, domain = f"Site {i:03d}", f"site{i:03d}.example"
+        level = rng.lognormvariate(4, 1.2)
+        series = daily_series(rng, 90, level)
+        shares = sorted((rng.random() for _ in SOURCE_MEDIA), reverse=True)
+        source_series = {
+            medium: [int(v * share / sum(shares)) for v in series] for medium, share in zip(SOURCE_MEDIA, shares)
+        }
+        sessions = sum(series)
+        properties.append({
+            "key": key, "name": name, "domain": domain, "id": str(500000000 + i), "color": color,
+            "totals": {"sessions": sessions, "users": int(sessions * 0.8), "views": int(sessions * 1.6),
+                       "avgDuration": round(rng.uniform(20, 180), 1), "engagementRate": round(rng.uniform(0.3, 0.8), 3)},
+            "series": series,
+            "sources": [{"sourceMedium": medium, "sessions": sum(values)}
+                        for medium, values in list(source_series.items())[:5]],
+            "sourceSeries": source_series,
+        })
+        impressions = daily_series(rng, 90, level * 20)
+        clicks = [int(v * rng.uniform(0.01, 0.05)) for v in impressions]
+        search.append({
+            "key": key, "name": name, "domain": domain, "siteUrl": f"sc-domain:{domain}", "color": color,
+            "totals": {"clicks": sum(clicks), "impressions": sum(impressions),
+                       "ctr": round(sum(clicks) / max(sum(impressions), 1), 4), "position": round(rng.uniform(3, 40), 1)},
+            "clicks": clicks,
+            "impressions": impressions,
+            "topQueries": [{"query": f"{name.lower()} query {q}", "clicks": 50 - q, "impressions": 900 - q * 90,
+                            "ctr": 0.05, "position": 4.0 + q} for q in range(5)],
+            "topPages": [{"page": f"https://{domain}/page-{q}/", "clicks": 40 - q, "impressions": 700 - q * 70,
+                          "ctr": 0.05, "position": 5.0 + q} for q in range(5)],
+        })
+    return {
+        "updatedIso": f"{run_date.isoformat()}T06:00:00Z",
+        "updatedLabel": f"{run_date.strftime('%b')} {run_date.day}, {run_date.year}",
+        "rangeLabel": f"{label(ga4_days[0])}–{label(ga4_days[-1])}",
+        "labels": [label(day) for day in ga4_days],
+        "gscLabels": [label(day) for day in gsc_days],
+        "properties": properties,
+        "searchConsoleProperties": search,
+    }
+
+
+def report(timings: dict[str, list[float]]) -> None:
+    for stage, values in timings.items():
+        if values:
+            print(f"  {stage:<12} median {statistics.median(values) * 1000:8.1f}ms   min {min(values) * 1000:8.1f}ms")
+
+
+def bench_synthetic(count: int, rounds: int, out: Path) -> int:
+    # Point the page at the scratch directory before metricslib.page is imported.
+    os.environ["ZONTED_METRICS_OUT"] = str(out / "metrics")
+    os.environ["ZONTED_WORKSPACE"] = str(out / "workspace")
+    (out / "metrics").mkdir(parents=True, exist_ok=True)
+    model_src = ROOT / "metrics" / "model.json"
+    if model_src.exists():
+        # Keep the real revenue / social cards so every section renders.
+        shutil.copy2(model_src, out / "metrics" / "model.json")
+
+    from metricslib import anomaly, page, portfolio
+    from metricslib.store import MetricsStore
+
+    run_date = date.today()
+    data = synthetic_portfolio(count, run_date)
+    stripe = {"key": "veracityapi", "name": "VeracityAPI", "domain": "veracityapi.com", "currency": "usd",
+              "grossCents30d": 123400, "netCents30d": 118000, "lifetimeGrossCents": 987600,
+              "successfulPayments30d": 42, "successfulPaymentsLifetime": 311}
+    data["revenueSnapshot"] = portfolio.revenue_cards(stripe)
+    series = count * (1 + len(SOURCE_MEDIA) + 2)
+    print(f"{count} properties, {series} daily series × 90 days, {rounds} rounds")
+
+    timings: dict[str, list[float]] = {"record": [], "detect": [], "update_html": [], "render": []}
+    alerts = 0
+    for i in range(rounds):
+        db = out / f"bench-{i}.sqlite"
+        store = MetricsStore(db)
+        started = time.perf_counter()
+        portfolio.record_metrics(store, run_date.isoformat(), data, stripe)
+        timings["record"].append(time.perf_counter() - started)
+        try:
+            started = time.perf_counter()
+            found, _evaluated = anomaly.detect(store, run_date.isoformat())
+            timings["detect"].append(time.perf_counter() - started)
+            alerts = len(found)
+        except ImportError:
+            pass  # NumPy missing; detection is skipped in production too.
+        started = time.perf_counter()
+        portfolio.update_html(copy.deepcopy(data), store, run_date.isoformat())
+        timings["update_html"].append(time.perf_counter() - started)
+        model = page.load_model()
+        started = time.perf_counter()
+        page.render_page(model)
+        timings["render"].append(time.perf_counter() - started)
+        store.close()
+        db.unlink()
+    report(timings)
+    html = page.METRICS_HTML.read_bytes()
+    data_bytes = sum(path.stat().st_size for path in page.DATA_DIR.glob("*.json"))
+    print(f"  page {len(html) / 1024:.0f}KB, chart data {data_bytes / 1024:.0f}KB, {alerts} anomaly alerts")
+    return 0
+
+
+def replay(cassette: Path, out: Path) -> int:
+    if not (cassette / "index.json").exists():
+        print(f"No cassette at {cassette}; record one with ZONTED_METRICS_RECORD={cassette}.", file=sys.stderr)
+        return 2
+    (out / "metrics").mkdir(parents=True, exist_ok=True)
+    shutil.copy2(ROOT / "metrics" / "model.json", out / "metrics" / "model.json")
+    env = {
+        **os.environ,
+        "ZONTED_METRICS_REPLAY": str(cassette.resolve()),
+        "ZONTED_WORKSPACE": str(out / "workspace"),
+        "ZONTED_METRICS_OUT": str(out / "metrics"),
+    }
+    status = 0
+    for script, args in (("update-metrics-cron.py", ["--no-push", "--no-post", "--jobs", "portfolio", "--force"]), ("update-social-snapshot.py", [])):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, str(SCRIPTS / script), *args], env=env, capture_output=True, text=True)
+        elapsed = time.perf_counter() - started
+        print(f"{script}: exit {proc.returncode} in {elapsed:.2f}s")
+        for line in (proc.stdout + proc.stderr).strip().splitlines()[-12:]:
+            print(f"  {line}")
+        status = status or proc.returncode
+    print(f"Output in {out / 'metrics'}")
+    return status
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--properties", type=int, default=120, help="Synthetic portfolio size")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--replay", type=Path, help="Run both cron scripts against this recorded cassette")
+    parser.add_argument("--out", type=Path, help="Scratch directory (default: a new temp dir)")
+    args = parser.parse_args()
+    out = args.out or Path(tempfile.mkdtemp(prefix="zonted-bench-"))
+    if args.replay:
+        return replay(args.replay, out)
+    return bench_synthetic(args.properties, args.rounds, out)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,8 +11,20 @@ Run from the repo root.
 import os
 import re
 import html
+import hashlib
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import asset_health
+import imgfetch
+
+try:  # Optional: without Pillow, hub rows keep pointing at the full image.
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SITE_URL = "https://zonted.com"
 
@@ -26,9 +38,10 @@ FALLBACK_DATES = {
     "posts/ai-image-generation-comparison": "2026-03-11",
 }
 
-# og:image URLs that 404 on R2. Treat as no-image; the row will skip the
-# thumb column entirely. Move to a working URL or re-upload the asset to
-# img.zonted.com to bring the thumbnail back.
+# Thumbnail URLs known to be broken on R2 (404s, stubs). Committed so every
+# checkout gets them; apply_thumbnail_health() adds whatever the
+# scripts/asset_health.py cache flags on this machine, and replaces a broken
+# thumbnail with a healthy body image where there is one.
 BROKEN_IMAGES = {
     "https://img.zonted.com/og/ai-reels-what-actually-works.jpg",
     "https://img.zonted.com/og/makeugc-review.jpg",
@@ -37,9 +50,15 @@ BROKEN_IMAGES = {
     "https://img.zonted.com/resources/what-is-ai-self-healing/hero-bg.jpg",
 }
 
+# The build only goes to the network with ZONTED_FETCH_ASSETS=1: stale asset
+# health entries are probed and R2 sources of missing thumbnail derivatives
+# downloaded. Without it, both work from what is on disk (the denylist above,
+# the asset_health cache, assets/thumbs/).
+FETCH_ASSETS = bool(os.environ.get('ZONTED_FETCH_ASSETS'))
+
 # Per-slug thumbnail override. Wins over og:image filtering — useful when
-# og:image is the generic owl logo or a broken/stub asset, but the article
-# body has a real hero image we can point at instead.
+# og:image is the generic owl logo, but the article body has a better hero
+# image we can point at instead.
 SLUG_THUMB_OVERRIDES = {
     "posts/stakes-priming": "/posts/stakes-priming/img/tabiji-verdict.png",
     "posts/ai-psychosis": "/posts/ai-psychosis/img/cyberpsychosis.avif",
@@ -74,6 +93,12 @@ def get_category(slug, title):
 # Metadata extraction
 # ---------------------------------------------------------------------------
 
+def is_generic_image(url):
+    """True for site-wide default images that make meaningless thumbnails."""
+    return ('tabiji-owl-logo' in url or 'zonted-og.png' in url
+            or 'bernard-huang-headshot' in url or 'operator-notes' in url)
+
+
 def extract_metadata(filepath, slug):
     with open(filepath, 'r', encoding='utf-8') as f:
         content = f.read()
@@ -109,20 +134,29 @@ def extract_metadata(filepath, slug):
     reading_time = int(rt_match.group(1)) if rt_match else None
 
     # og:image — backreferenced quote (same fix as description). Filter out
-    # the generic tabiji-owl-logo default + URLs we've confirmed 404 so the
-    # row simply omits the thumb column. operator-notes.png is the site-wide
-    # OG fallback for posts without a real hero — also treat as "no image"
-    # so the post index doesn't show 25+ identical thumbnails.
+    # the generic tabiji-owl-logo default so the row simply omits the thumb
+    # column. operator-notes.png is the site-wide OG fallback for posts
+    # without a real hero — also treat as "no image" so the post index
+    # doesn't show 25+ identical thumbnails. Broken URLs are filtered later
+    # by apply_thumbnail_health().
     img_match = re.search(r'<meta\s+property=["\']og:image["\']\s+content=(["\'])(.*?)\1', head, re.IGNORECASE)
     image = img_match.group(2) if img_match else ''
-    if ('tabiji-owl-logo' in image or 'zonted-og.png' in image
-            or 'bernard-huang-headshot' in image or 'operator-notes' in image
-            or image in BROKEN_IMAGES):
+    if is_generic_image(image):
         image = ''
     # Slug override wins (e.g. og:image was the owl, but the body has a hero)
     if slug in SLUG_THUMB_OVERRIDES:
         image = SLUG_THUMB_OVERRIDES[slug]
 
+    # Body images, in document order — fallback thumbnails when the og:image
+    # turns out to be broken.
+    body_start = content.find('<div class="article-body">')
+    body_images = []
+    if body_start != -1:
+        for m in re.finditer(r'<img\b[^>]*?\bsrc=(["\'])([^"\']+)\1', content[body_start:], re.IGNORECASE):
+            src = m.group(2)
+            if src.startswith(('http://', 'https://', '/')) and not is_generic_image(src):
+                body_images.append(src)
+
     category = get_category(slug, title)
 
     return {
@@ -133,6 +167,7 @@ def extract_metadata(filepath, slug):
         'slug': slug,
         'category': category,
         'image': image,
+        'body_images': body_images,
         'filepath': filepath,
     }
 
@@ -158,6 +193,176 @@ def scan_articles():
     return articles
 
 
+def thumb_key(url):
+    """asset_health keys site-local assets by root path, remote ones by URL."""
+    if url.startswith(SITE_URL + '/'):
+        return url[len(SITE_URL):]
+    return url
+
+
+def apply_thumbnail_health(articles):
+    """Drop or replace thumbnails that asset_health reports as broken.
+
+    A broken og:image / override (in BROKEN_IMAGES, or a 404, error or R2
+    stub per asset_health) is replaced by the first healthy image in the
+    article body; if there is none the row omits the thumb column.
+    Unreachable or never-probed URLs are kept, so a build never loses
+    thumbnails it can't verify. Remote results come from the asset_health
+    cache unless FETCH_ASSETS is set.
+
+    Returns the number of thumbnails dropped or replaced.
+    """
+    candidates = [a['image'] for a in articles if a['image'] and a['image'] not in BROKEN_IMAGES]
+    health = asset_health.check_urls([thumb_key(u) for u in candidates], offline=not FETCH_ASSETS)
+
+    def is_broken(src):
+        return src in BROKEN_IMAGES or asset_health.is_broken(health.get(thumb_key(src)))
+
+    broken = [a for a in articles if a['image'] and is_broken(a['image'])]
+    if not broken:
+        return 0
+
+    fallbacks = [src for a in broken for src in a['body_images']
+                 if src != a['image'] and src not in BROKEN_IMAGES]
+    health.update(asset_health.check_urls([thumb_key(u) for u in fallbacks], offline=not FETCH_ASSETS))
+    for article in broken:
+        replacement = ''
+        for src in article['body_images']:
+            result = health.get(thumb_key(src))
+            if src != article['image'] and result and not is_broken(src):
+                replacement = src
+                break
+        print(f"  thumbnail {article['image']} is broken for {article['slug']}"
+              f" → {replacement or 'no thumbnail'}")
+        article['image'] = replacement
+    return len(broken)
+
+
+# ---------------------------------------------------------------------------
+# Thumbnail derivatives
+# ---------------------------------------------------------------------------
+
+THUMB_DIR = os.path.join(ROOT, 'assets', 'thumbs')
+# Desktop display size of .zn-row-thumb in css/zonted.css. Derivatives are
+# cropped to its 10:7 box (object-fit: cover).
+THUMB_SIZE = (150, 105)
+# Derivative widths (w descriptors): 150 for desktop rows at 1x; 320 / 640 /
+# 960 for the mobile layout (full width up to 320px) at 1x-3x, which also
+# covers desktop at 2x-3x.
+THUMB_WIDTHS = (150, 320, 640, 960)
+# Must match the .zn-row-thumb widths in css/zonted.css.
+THUMB_SIZES = '(max-width: 640px) 320px, 150px'
+
+
+def thumb_basename(src):
+    """Stable derivative name for a thumbnail source.
+
+    Local sources fold in a hash of their bytes, so replacing the file
+    regenerates the derivative while a fresh checkout (which doesn't keep
+    mtimes) keeps the same names; remote R2 assets are keyed by URL alone.
+    """
+    key = src.encode('utf-8')
+    local = local_image_path(src)
+    if local:
+        with open(local, 'rb') as f:
+            key += b'|' + hashlib.sha1(f.read()).hexdigest().encode('ascii')
+    return hashlib.sha1(key).hexdigest()[:12]
+
+
+def local_image_path(src):
+    if src.startswith('/') and not src.startswith('//'):
+        path = os.path.join(ROOT, src.lstrip('/'))
+        return path if os.path.isfile(path) else None
+    return None
+
+
+def read_thumb_source(src):
+    local = local_image_path(src)
+    if local:
+        with open(local, 'rb') as f:
+            return f.read()
+    resp = imgfetch.backend().fetch(src)
+    if resp.status != 200:
+        raise imgfetch.FetchError(f'HTTP {resp.status}')
+    return resp.body
+
+
+def thumb_sizes():
+    """(width, height) of every derivative, at THUMB_SIZE's aspect ratio."""
+    w, h = THUMB_SIZE
+    return [(width, round(width * h / w)) for width in THUMB_WIDTHS]
+
+
+def make_thumbnail(src, base):
+    """Write base-{w}x{h}.webp at every THUMB_WIDTHS; True on success."""
+    try:
+        source = Image.open(io.BytesIO(read_thumb_source(src)))
+        source = ImageOps.exif_transpose(source).convert('RGB')
+        for size in thumb_sizes():
+            thumb = ImageOps.fit(source, size, method=Image.LANCZOS)
+            thumb.save(os.path.join(THUMB_DIR, f'{base}-{size[0]}x{size[1]}.webp'),
+                       'WEBP', quality=80, method=6)
+        return True
+    except Exception as e:
+        print(f"  thumbnail failed: {src[:80]} → {e}")
+        return False
+
+
+def generate_thumbnails(articles):
+    """Attach listing-sized derivatives (article['thumb']) for hub rows.
+
+    Derivatives live in assets/thumbs/ and are only generated when missing,
+    so a rebuild reads nothing unless a thumbnail source changed. R2 sources
+    are only downloaded with FETCH_ASSETS; local ones always work.
+    Derivatives no longer referenced by any article are pruned. Returns
+    (ready, generated).
+    """
+    if Image is None:
+        print("  Pillow not installed; hub rows keep full-size thumbnails")
+        return 0, 0
+    os.makedirs(THUMB_DIR, exist_ok=True)
+
+    sizes = thumb_sizes()
+    wanted = {}
+    for a in articles:
+        if a.get('image'):
+            wanted.setdefault(a['image'], thumb_basename(a['image']))
+
+    def names(base):
+        return [f'{base}-{w}x{h}.webp' for w, h in sizes]
+
+    def ready(base):
+        return all(os.path.isfile(os.path.join(THUMB_DIR, n)) for n in names(base))
+
+    missing = [(src, base) for src, base in wanted.items()
+               if not ready(base) and (FETCH_ASSETS or local_image_path(src))]
+    generated = 0
+    if missing:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            generated = sum(pool.map(lambda item: make_thumbnail(*item), missing))
+
+    keep = set()
+    count = 0
+    for a in articles:
+        base = wanted.get(a.get('image'))
+        if not base or not ready(base):
+            continue
+        keep.update(names(base))
+        a['thumb'] = {
+            'src': f'/assets/thumbs/{names(base)[0]}',
+            'srcset': ', '.join(f'/assets/thumbs/{n} {w}w' for n, (w, _h) in zip(names(base), sizes)),
+            'sizes': THUMB_SIZES,
+            'width': THUMB_SIZE[0],
+            'height': THUMB_SIZE[1],
+        }
+        count += 1
+
+    for fn in os.listdir(THUMB_DIR):
+        if fn.endswith('.webp') and fn not in keep:
+            os.remove(os.path.join(THUMB_DIR, fn))
+    return count, generated
+
+
 # ---------------------------------------------------------------------------
 # Date formatting
 # ---------------------------------------------------------------------------
@@ -201,16 +406,36 @@ def is_shipped(article):
     return 0 <= age_days < SHIPPED_FRESH_DAYS
 
 
-def make_entry_row(article, mark_shipped=False):
+# Rows at the top of the homepage / hub whose thumbnails load eagerly. The
+# first of them also gets fetchpriority="high" and a <link rel=preload>.
+ABOVE_FOLD_ROWS = 3
+
+
+def make_entry_row(article, mark_shipped=False, loading='lazy'):
+    """Render one hub row. loading is 'lazy', 'eager' or 'priority'."""
     date_display = format_date_short(article['date']) if article['date'] else ''
     title = html.escape(article['title'])
     dek = html.escape(article.get('description', '') or '')
     image = article.get('image', '')
     thumb = ''
     if image:
+        if loading == 'priority':
+            hints = ' fetchpriority="high"'
+        elif loading == 'eager':
+            hints = ''
+        else:
+            hints = ' loading="lazy" decoding="async"'
+        derivative = article.get('thumb')
+        if derivative:
+            img_attrs = (
+                f'src="{derivative["src"]}" srcset="{derivative["srcset"]}" sizes="{derivative["sizes"]}" '
+                f'width="{derivative["width"]}" height="{derivative["height"]}"'
+            )
+        else:
+            img_attrs = f'src="{html.escape(image)}"'
         thumb = (
             f'                        <a href="/{article["slug"]}/" class="zn-row-thumb" tabindex="-1">'
-            f'<img src="{html.escape(image)}" alt="" loading="lazy"></a>\n'
+            f'<img {img_attrs} alt=""{hints}></a>\n'
         )
     left_html = (
         f'                    <div class="zn-row-left">\n'
@@ -239,6 +464,51 @@ def make_entry_row(article, mark_shipped=False):
     )
 
 
+def render_rows(articles, mark_shipped_first=False):
+    """Render hub rows with above-the-fold loading hints.
+
+    Returns (rows_html, preload) — preload is (url, srcset, sizes) for the thumbnail
+    that got fetchpriority="high", or None if none of the top rows has one.
+    """
+    rows = []
+    preload = None
+    for i, a in enumerate(articles):
+        loading = 'lazy'
+        if i < ABOVE_FOLD_ROWS and a.get('image'):
+            loading = 'eager'
+            if not preload:
+                loading = 'priority'
+                derivative = a.get('thumb')
+                preload = ((derivative['src'], derivative['srcset'], derivative['sizes']) if derivative
+                           else (a['image'], '', ''))
+        rows.append(make_entry_row(
+            a,
+            mark_shipped=(mark_shipped_first and i == 0 and is_shipped(a)),
+            loading=loading,
+        ))
+    return '\n'.join(rows), preload
+
+
+def set_preload(content, url, srcset='', sizes=''):
+    """Add (or refresh / remove) the markered LCP image preload in <head>."""
+    block = ''
+    if url:
+        srcset_attr = f' imagesrcset="{html.escape(srcset)}"' if srcset else ''
+        if srcset and sizes:
+            srcset_attr += f' imagesizes="{html.escape(sizes)}"'
+        block = (
+            '<!-- LCP_PRELOAD -->'
+            f'<link rel="preload" as="image" href="{html.escape(url)}"{srcset_attr} fetchpriority="high">'
+            '<!-- /LCP_PRELOAD -->'
+        )
+    if '<!-- LCP_PRELOAD -->' in content:
+        return re.sub(r'\n?[ \t]*<!-- LCP_PRELOAD -->.*?<!-- /LCP_PRELOAD -->',
+                      lambda m: ('\n    ' + block) if block else '', content, count=1, flags=re.DOTALL)
+    if not block or '</head>' not in content:
+        return content
+    return content.replace('</head>', '    ' + block + '\n</head>', 1)
+
+
 # ---------------------------------------------------------------------------
 # Homepage generation
 # ---------------------------------------------------------------------------
@@ -286,8 +556,7 @@ def generate_homepage(articles):
     # Homepage shows only the 5 most recent posts; "Read all →" link in
     # the section header points to /posts/ for the full hub.
     homepage_articles = articles[:5]
-    rows = [make_entry_row(a) for a in homepage_articles]
-    entry_html = '\n'.join(rows)
+    entry_html, preload = render_rows(homepage_articles)
 
     new_block = (
         f'<!-- ENTRY_LIST_START -->\n'
@@ -305,6 +574,8 @@ def generate_homepage(articles):
         flags=re.DOTALL
     )
 
+    content = set_preload(content, *(preload or ('',)))
+
     # Update article count
     count = len(articles)
     content = re.sub(
@@ -330,11 +601,7 @@ def generate_posts_hub(articles):
 
     # Mark the newest post as "shipped" if it's within the freshness window.
     # Stamps disappear once the post ages past SHIPPED_FRESH_DAYS.
-    rows = [
-        make_entry_row(a, mark_shipped=(i == 0 and is_shipped(a)))
-        for i, a in enumerate(articles)
-    ]
-    entry_html = '\n'.join(rows)
+    entry_html, preload = render_rows(articles, mark_shipped_first=True)
 
     new_block = (
         f'<!-- ENTRY_LIST_START -->\n'
@@ -350,6 +617,7 @@ def generate_posts_hub(articles):
         content,
         flags=re.DOTALL
     )
+    content = set_preload(content, *(preload or ('',)))
 
     with open(filepath, 'w', encoding='utf-8') as f:
         f.write(content)
@@ -966,6 +1234,138 @@ def inject_recommended_reading(articles):
     return count
 
 
+# ---------------------------------------------------------------------------
+# Image loading hints + weight report
+# ---------------------------------------------------------------------------
+
+IMAGE_DIMS_CACHE = os.path.join(ROOT, 'scripts', '.image-dims-cache.json')
+# Build output, not site content: gitignored, so a deploy from a checkout
+# never ships it.
+IMAGE_WEIGHT_REPORT = os.path.join(ROOT, 'scripts', '.image-weight-report.json')
+
+# Intrinsic width at which a body image is treated as the likely LCP element.
+# Anything narrower (icons, avatars, inline badges) renders too small to win.
+LCP_MIN_WIDTH = 640
+
+IMG_TAG_RE = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+IMG_SRC_RE = re.compile(r'\bsrc=(["\'])([^"\']+)\1', re.IGNORECASE)
+
+
+def load_image_dims():
+    if os.path.isfile(IMAGE_DIMS_CACHE):
+        with open(IMAGE_DIMS_CACHE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def img_width(tag, src, dims_cache):
+    """Intrinsic width from the dims cache, falling back to the width= attr."""
+    if src in dims_cache:
+        return dims_cache[src][0]
+    m = re.search(r'\bwidth=["\']?(\d+)', tag)
+    return int(m.group(1)) if m else 0
+
+
+def set_img_hints(tag, lcp):
+    tag = re.sub(r'\s+(?:loading|fetchpriority|decoding)=(["\'])[^"\']*\1', '', tag)
+    hints = ' fetchpriority="high"' if lcp else ' loading="lazy" decoding="async"'
+    return re.sub(r'\s*/?>$', lambda m: hints + m.group(0), tag, count=1)
+
+
+def apply_image_hints(articles):
+    """Mark each post's likely LCP image eager + high priority, lazy-load the rest.
+
+    The LCP candidate is the first image in <div class="article-body"> at
+    least LCP_MIN_WIDTH wide (per scripts/.image-dims-cache.json, or the
+    width= attribute add-image-dims.py wrote). It gets fetchpriority="high"
+    and a markered <link rel=preload> in <head>; every other body image gets
+    loading="lazy" decoding="async". Idempotent — hints are rewritten, not
+    appended. Returns the number of articles with an LCP image.
+    """
+    dims_cache = load_image_dims()
+    count = 0
+    for article in articles:
+        filepath = article['filepath']
+        with open(filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
+        original = content
+
+        start = content.find('<div class="article-body">')
+        close = find_article_body_close(content)
+        if start == -1 or close is None:
+            continue
+        lcp_src = ''
+
+        def patch(m):
+            nonlocal lcp_src
+            tag = m.group(0)
+            src_match = IMG_SRC_RE.search(tag)
+            if not src_match:
+                return tag
+            src = src_match.group(2)
+            is_lcp = not lcp_src and img_width(tag, src, dims_cache) >= LCP_MIN_WIDTH
+            if is_lcp:
+                lcp_src = src
+            return set_img_hints(tag, is_lcp)
+
+        body = IMG_TAG_RE.sub(patch, content[start:close[0]])
+        content = content[:start] + body + content[close[0]:]
+        content = set_preload(content, lcp_src)
+        if lcp_src:
+            count += 1
+        if content != original:
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write(content)
+    return count
+
+
+def page_image_refs(filepath, page_path):
+    """Image URLs / site paths referenced by <img> tags on one page."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        content = f.read()
+    refs = []
+    for tag in IMG_TAG_RE.findall(content):
+        m = IMG_SRC_RE.search(tag)
+        if m:
+            ref = asset_health.normalize(m.group(2), page_path)
+            if ref:
+                refs.append(ref)
+    return refs
+
+
+def write_image_weight_report(articles):
+    """Write per-page image byte totals to IMAGE_WEIGHT_REPORT.
+
+    Local sizes come from disk; remote sizes come from the asset_health cache
+    (no network here — run scripts/asset_health.py to fill it). Images with
+    no known size are counted under "unknown". Returns the report.
+    """
+    pages = [
+        (os.path.join(ROOT, 'index.html'), '/'),
+        (os.path.join(ROOT, 'posts', 'index.html'), '/posts/'),
+    ] + [(a['filepath'], f'/{a["slug"]}/') for a in articles]
+
+    page_refs = {path: page_image_refs(fp, path) for fp, path in pages}
+    sizes = asset_health.check_urls(
+        [ref for refs in page_refs.values() for ref in refs], offline=True)
+
+    report = {}
+    for path, refs in page_refs.items():
+        total = 0
+        unknown = 0
+        for ref in dict.fromkeys(refs):
+            size = (sizes.get(ref) or {}).get('bytes')
+            if size is None:
+                unknown += 1
+            else:
+                total += size
+        report[path] = {'images': len(refs), 'bytes': total, 'unknown': unknown}
+
+    with open(IMAGE_WEIGHT_REPORT, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    return report
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
@@ -974,6 +1374,12 @@ def main():
     articles = scan_articles()
     print(f"Found {len(articles)} articles")
 
+    n = apply_thumbnail_health(articles)
+    print(f"Replaced or dropped {n} broken thumbnails")
+
+    n, generated = generate_thumbnails(articles)
+    print(f"Listing thumbnails ready for {n} articles ({generated} generated)")
+
     n = generate_homepage(articles)
     print(f"Generated index.html ({n} entries)")
 
@@ -1007,6 +1413,14 @@ def main():
     n = inject_recommended_reading(articles)
     print(f"Injected Recommended Reading block into {n} articles")
 
+    n = apply_image_hints(articles)
+    print(f"Marked LCP image with fetchpriority in {n} articles")
+
+    report = write_image_weight_report(articles)
+    heaviest = sorted(report.items(), key=lambda kv: kv[1]['bytes'], reverse=True)[:5]
+    print("Heaviest pages by image bytes: " + ', '.join(
+        f"{path} {row['bytes'] / 1_000_000:.1f}MB" for path, row in heaviest))
+
 
 if __name__ == '__main__':
     main()
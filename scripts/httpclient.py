@@ -0,0 +1,633 @@
+#!/usr/bin/env python3
+"""Shared HTTP client for the site scripts.
+
+update-metrics-cron.py (Stripe), update-social-snapshot.py (Graph API,
+Pinterest, TikTok) and the image tooling (through imgfetch's live backend)
+all talk HTTP through one Client instead of building urllib requests:
+
+  pooling       up to PER_HOST_LIMIT keep-alive connections per host, so a
+                paginated Stripe sync or 90 days of Graph insights reuse one
+                TLS session instead of handshaking per call; an idle
+                connection the server dropped is reopened transparently,
+                but only for idempotent methods
+  retries       429 and 5xx responses and dropped connections are retried up
+                to RETRIES times with full-jitter exponential backoff
+                (Retry-After wins when the server sends one); only idempotent
+                methods retry, except 429, which means "not processed"
+  conditional   request(..., cache=True) keeps the last body per URL in
+                CACHE_DIR with its ETag / Last-Modified and revalidates, so an
+                unchanged resource costs a 304; entries not used for
+                CACHE_MAX_AGE are pruned
+  streaming     stream(url, on_chunk) hands the decoded body over as it
+                arrives and stops reading (and drops the connection) as soon
+                as on_chunk returns True; scrapes that only need a few values
+                near the top of a page skip the rest
+  deadlines     inside a sources.Registry fetch every attempt's timeout and
+                backoff is capped to the fetch's DEADLINE, and requests past
+                it raise DeadlineExceeded
+  redirects     followed up to MAX_REDIRECTS; Authorization and Cookie are
+                dropped when a redirect leaves the original host
+  timings       every logical request (all attempts) is recorded, tagged with
+                the SOURCE it was made for; summary() gives per-host counts,
+                p50 / max latency, retries and cache hits for the cron logs,
+                summary_by_source() the same per (source, host)
+
+Anything that looks like a credential in a query string is redacted from
+errors, timings and the cache metadata.
+
+Usage:
+  python3 scripts/httpclient.py URL [--cache]   # fetch once, print status and timing
+"""
+from __future__ import annotations
+
+import argparse
+import contextvars
+import gzip
+import hashlib
+import http.client
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.parse
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+# Outside the checkout, which is deployed as-is: metricslib.runtime.STATE_DIR
+# (not imported here — runtime depends on this module through replay).
+CACHE_DIR = Path(os.environ.get("ZONTED_WORKSPACE", "/Users/psy/.openclaw/workspace")) / "state" / "http-cache"
+CACHE_MAX_AGE = 30 * 86400
+PER_HOST_LIMIT = 4
+TIMEOUT = 30
+RETRIES = 3
+BACKOFF = 0.5
+MAX_BACKOFF = 20.0
+MAX_REDIRECTS = 5
+STREAM_CHUNK = 16 * 1024
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# How a stale keep-alive connection fails before any response byte arrives
+# (http.client.RemoteDisconnected is a ConnectionResetError).
+STALE_ERRORS = (ConnectionResetError, ConnectionAbortedError, BrokenPipeError)
+# Not forwarded when a redirect leaves the original host.
+CREDENTIAL_HEADERS = frozenset({"authorization", "cookie"})
+USER_AGENT = "zonted-scripts/1.0"
+SECRET_PARAMS = re.compile(r"((?:access_|refresh_)?token|key|secret|password)=[^&\s\"']+", re.I)
+# What a request is made for (sources.Registry sets "<group>/<source>"), so
+# the same host's traffic can be split between the jobs that caused it.
+SOURCE: contextvars.ContextVar[str] = contextvars.ContextVar("httpclient_source", default="")
+# time.monotonic() by which the current fetch must be done (sources.Registry
+# sets it from the source's timeout); None means no deadline. Requests are cut
+# off at it, so an abandoned fetch can't keep working past its slot.
+DEADLINE: contextvars.ContextVar[float | None] = contextvars.ContextVar("httpclient_deadline", default=None)
+
+
+def carry(fn):
+    """`fn` running in the caller's context, so worker threads keep its SOURCE tag."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+class RequestError(OSError):
+    """The request never produced a response (DNS, TLS, timeout, reset…)."""
+
+
+class DeadlineExceeded(RequestError):
+    """The DEADLINE of the fetch this request belongs to has passed."""
+
+
+def remaining(timeout: float | None = None) -> float | None:
+    """`timeout` capped to what is left before DEADLINE; raises DeadlineExceeded once it has passed."""
+    deadline = DEADLINE.get()
+    if deadline is None:
+        return timeout
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded("source deadline passed")
+    return left if timeout is None else min(timeout, left)
+
+
+class HTTPError(RuntimeError):
+    """Raised by Response.raise_for_status() for 4xx / 5xx responses."""
+
+    def __init__(self, status: int, url: str, body: bytes):
+        self.status = status
+        self.url = url
+        self.body = body
+        snippet = redact(body[:600].decode("utf-8", "replace"))
+        super().__init__(f"HTTP {status} from {redact(url)}: {snippet}")
+
+
+def redact(text: str) -> str:
+    return SECRET_PARAMS.sub(lambda m: f"{m.group(1)}=<redacted>", text)
+
+
+@dataclass
+class Response:
+    url: str
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+    elapsed: float = 0.0
+    attempts: int = 1
+    cached: bool = False
+
+    def header(self, name: str, default: str = "") -> str:
+        name = name.lower()
+        for key, value in self.headers.items():
+            if key.lower() == name:
+                return value
+        return default
+
+    def text(self, errors: str = "replace") -> str:
+        return self.body.decode("utf-8", errors)
+
+    def json(self):
+        return json.loads(self.body.decode("utf-8"))
+
+    def raise_for_status(self) -> "Response":
+        if self.status >= 400:
+            raise HTTPError(self.status, self.url, self.body)
+        return self
+
+
+@dataclass
+class Timing:
+    method: str
+    host: str
+    path: str
+    status: int  # 0 when no response arrived
+    elapsed: float
+    attempts: int
+    cached: bool
+    size: int
+    source: str = ""
+
+
+# ---------------------------------------------------------------------------
+# Connection pool
+# ---------------------------------------------------------------------------
+
+class Pool:
+    """Keep-alive connections, at most `per_host` in flight per (scheme, host)."""
+
+    def __init__(self, per_host: int = PER_HOST_LIMIT):
+        self._idle: dict[tuple[str, str], list[http.client.HTTPConnection]] = defaultdict(list)
+        self._slots = defaultdict(lambda: threading.BoundedSemaphore(per_host))
+        self._lock = threading.Lock()
+
+    def _checkout(self, scheme: str, netloc: str, timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle[(scheme, netloc)]
+            conn = idle.pop() if idle else None
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        return self._connect(scheme, netloc, timeout), False
+
+    @staticmethod
+    def _connect(scheme: str, netloc: str, timeout: float) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(netloc, timeout=timeout)
+
+    def _checkin(self, scheme: str, netloc: str, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            self._idle[(scheme, netloc)].append(conn)
+
+    def send(self, method: str, url: str, headers: dict[str, str], body: bytes | None,
+             timeout: float, max_bytes: int | None = None, on_chunk=None) -> tuple[int, dict[str, str], bytes]:
+        """One round trip, no retries or redirects. Raises RequestError.
+
+        With on_chunk, the body is read STREAM_CHUNK at a time and each raw
+        chunk passed to on_chunk(status, headers, chunk); reading stops when
+        it returns True, and the body returned is what was read.
+        """
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise RequestError(f"unsupported URL: {redact(url)}")
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        with self._lock:
+            slot = self._slots[(parts.scheme, parts.netloc)]
+        with slot:
+            conn, reused = self._checkout(parts.scheme, parts.netloc, timeout)
+            while True:
+                try:
+                    conn.request(method, path, body=body, headers=headers)
+                    resp = conn.getresponse()
+                    break
+                except (OSError, http.client.HTTPException) as exc:
+                    conn.close()
+                    if reused and method in IDEMPOTENT and isinstance(exc, STALE_ERRORS):
+                        # The server dropped an idle keep-alive connection
+                        # before answering; that's not a failed attempt, just
+                        # open a fresh one. Anything else (a read timeout, or
+                        # a POST the server may have acted on) is not resent.
+                        conn, reused = self._connect(parts.scheme, parts.netloc, timeout), False
+                        continue
+                    raise RequestError(f"{type(exc).__name__}: {exc}") from exc
+                except BaseException:
+                    conn.close()
+                    raise
+            # Past the headers the connection was live; a failure mid-body
+            # mustn't resend and re-deliver chunks.
+            try:
+                if method == "HEAD":
+                    data = b""
+                elif on_chunk:
+                    data = _read_stream(resp, on_chunk)
+                else:
+                    data = resp.read(max_bytes) if max_bytes else resp.read()
+            except (OSError, http.client.HTTPException) as exc:
+                conn.close()
+                raise RequestError(f"{type(exc).__name__}: {exc}") from exc
+            except BaseException:
+                conn.close()  # on_chunk gave up mid-body
+                raise
+            if not resp.isclosed():
+                # Body not fully drained (max_bytes or on_chunk cut it short) — the
+                # connection can't be reused.
+                resp.close()
+                conn.close()
+            elif resp.will_close:
+                conn.close()
+            else:
+                self._checkin(parts.scheme, parts.netloc, conn)
+            return resp.status, dict(resp.getheaders()), data
+
+
+def _read_stream(resp: http.client.HTTPResponse, on_chunk) -> bytes:
+    headers = dict(resp.getheaders())
+    parts = []
+    while True:
+        chunk = resp.read1(STREAM_CHUNK)
+        if not chunk:
+            break
+        parts.append(chunk)
+        if on_chunk(resp.status, headers, chunk):
+            break
+    return b"".join(parts)
+
+
+class _Decoder:
+    """Adapts a body-level on_chunk(bytes) to the transport's raw chunks.
+
+    Only 2xx bodies are delivered, gunzipped incrementally; `delivered`
+    tells the retry loop that the caller has seen data, so the request must
+    not be silently repeated.
+    """
+
+    def __init__(self, on_chunk):
+        self.on_chunk = on_chunk
+        self.delivered = False
+        self.parts: list[bytes] = []
+        self._gunzip = None
+
+    def __call__(self, status: int, headers: dict[str, str], chunk: bytes) -> bool:
+        if not 200 <= status < 300:
+            return False
+        if self._gunzip is None:
+            gzipped = any(k.lower() == "content-encoding" and v.lower() == "gzip" for k, v in headers.items())
+            self._gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else False
+        data = self._gunzip.decompress(chunk) if self._gunzip else chunk
+        if not data:
+            return False
+        self.parts.append(data)
+        self.delivered = True
+        return bool(self.on_chunk(data))
+
+
+# ---------------------------------------------------------------------------
+# Conditional-request cache
+# ---------------------------------------------------------------------------
+
+class ValidatorCache:
+    """Last body per (URL, credentials) with its ETag / Last-Modified validators."""
+
+    def __init__(self, root: Path = CACHE_DIR, max_age: float = CACHE_MAX_AGE):
+        self.root = Path(root)
+        self.max_age = max_age
+        self._pruned = False
+
+    def _key(self, url: str, headers: dict[str, str]) -> str:
+        # Credentials are part of the key (a different token may see different
+        # data) but only ever stored hashed.
+        auth = next((v for k, v in headers.items() if k.lower() == "authorization"), "")
+        return hashlib.sha256(f"{url}\n{auth}".encode("utf-8")).hexdigest()[:32]
+
+    def lookup(self, url: str, headers: dict[str, str]) -> tuple[dict, bytes] | None:
+        key = self._key(url, headers)
+        try:
+            meta = json.loads((self.root / f"{key}.json").read_text())
+            return meta, (self.root / f"{key}.body").read_bytes()
+        except (OSError, ValueError):
+            return None
+
+    def touch(self, url: str, headers: dict[str, str]) -> None:
+        """Mark an entry used (a 304 revalidated it), so prune() keeps it."""
+        try:
+            os.utime(self.root / f"{self._key(url, headers)}.json")
+        except OSError:
+            pass
+
+    def prune(self) -> int:
+        """Drop entries unused for max_age (dated query URLs leave new ones daily)."""
+        cutoff = time.time() - self.max_age
+        removed = 0
+        try:
+            metas = list(self.root.glob("*.json"))
+        except OSError:
+            return 0
+        for meta in metas:
+            try:
+                if meta.stat().st_mtime >= cutoff:
+                    continue
+                meta.unlink()
+                meta.with_suffix(".body").unlink(missing_ok=True)
+                removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def store(self, url: str, headers: dict[str, str], resp_headers: dict[str, str], body: bytes) -> None:
+        lowered = {k.lower(): v for k, v in resp_headers.items()}
+        if "no-store" in lowered.get("cache-control", ""):
+            return
+        if not (lowered.get("etag") or lowered.get("last-modified")):
+            return
+        key = self._key(url, headers)
+        self.root.mkdir(parents=True, exist_ok=True)
+        if not self._pruned:
+            self._pruned = True  # once per process is plenty
+            self.prune()
+        meta = {"url": redact(url), "etag": lowered.get("etag", ""),
+                "lastModified": lowered.get("last-modified", ""), "headers": resp_headers,
+                "stored": int(time.time())}
+        # Body first, then metadata: a reader never sees validators for a
+        # body that isn't there yet.
+        for suffix, data in ((".body", body), (".json", json.dumps(meta).encode("utf-8"))):
+            tmp = self.root / f"{key}{suffix}.{os.getpid()}.{threading.get_ident()}.tmp"
+            tmp.write_bytes(data)
+            os.replace(tmp, self.root / f"{key}{suffix}")
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class Client:
+    def __init__(self, *, per_host: int = PER_HOST_LIMIT, timeout: float = TIMEOUT, retries: int = RETRIES,
+                 backoff: float = BACKOFF, cache_dir: Path = CACHE_DIR, user_agent: str = USER_AGENT,
+                 transport=None):
+        # Anything with Pool.send's signature; metricslib.replay swaps in
+        # recording / replaying transports.
+        self.transport = transport or Pool(per_host)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = ValidatorCache(cache_dir)
+        self.user_agent = user_agent
+        self.timings: list[Timing] = []
+        self._lock = threading.Lock()
+
+    def request(self, method: str, url: str, *, params: dict[str, object] | None = None,
+                headers: dict[str, str] | None = None, data: bytes | None = None, timeout: float | None = None,
+                max_bytes: int | None = None, cache: bool = False, retries: int | None = None,
+                follow_redirects: bool = True, compress: bool = True, on_chunk=None) -> Response:
+        """Send a request and return the final Response, whatever its status.
+
+        Raises RequestError only when no response arrived after all retries.
+        on_chunk is as for stream().
+        """
+        method = method.upper()
+        if urllib.parse.urlsplit(url).scheme not in ("http", "https"):
+            raise RequestError(f"unsupported URL: {redact(url)}")
+        if params:
+            query = urllib.parse.urlencode(params, doseq=True)
+            url += ("&" if urllib.parse.urlsplit(url).query else "?") + query
+        send_headers = {"User-Agent": self.user_agent, **(headers or {})}
+        # Ranged or truncated reads need the raw bytes.
+        if compress and max_bytes is None and method != "HEAD":
+            send_headers.setdefault("Accept-Encoding", "gzip")
+        stream = _Decoder(on_chunk) if on_chunk else None
+        cached = self.cache.lookup(url, send_headers) if cache and method == "GET" and not stream else None
+        if cached:
+            meta, _body = cached
+            if meta.get("etag"):
+                send_headers["If-None-Match"] = meta["etag"]
+            if meta.get("lastModified"):
+                send_headers["If-Modified-Since"] = meta["lastModified"]
+
+        started = time.perf_counter()
+        attempts = 0
+        status = 0
+        resp: Response | None = None
+        try:
+            resp, attempts = self._send(method, url, send_headers, data, timeout or self.timeout, max_bytes,
+                                        self.retries if retries is None else retries, follow_redirects, stream)
+            status = resp.status
+            if resp.status == 304 and cached:
+                meta, body = cached
+                self.cache.touch(url, send_headers)
+                resp = Response(resp.url, 200, dict(meta.get("headers") or {}), body, cached=True)
+            elif stream and stream.delivered:
+                resp.body = b"".join(stream.parts)
+                resp.headers = {k: v for k, v in resp.headers.items()
+                                if k.lower() not in ("content-encoding", "content-length")}
+            elif cache and method == "GET" and resp.status == 200:
+                self.cache.store(url, send_headers, resp.headers, resp.body)
+        finally:
+            elapsed = time.perf_counter() - started
+            parts = urllib.parse.urlsplit(url)
+            self._record(Timing(method, parts.netloc, redact(parts.path or "/"), status, elapsed,
+                                attempts, bool(resp and resp.cached), len(resp.body) if resp else 0,
+                                SOURCE.get()))
+        resp.elapsed, resp.attempts = elapsed, attempts
+        return resp
+
+    def _send(self, method, url, headers, data, timeout, max_bytes, retries, follow_redirects, stream=None):
+        attempts = 0
+        redirects = 0
+        while True:
+            attempts += 1
+            attempt_timeout = remaining(timeout)
+            try:
+                if stream:
+                    status, resp_headers, body = self.transport.send(method, url, headers, data, attempt_timeout,
+                                                                     max_bytes, on_chunk=stream)
+                else:
+                    status, resp_headers, body = self.transport.send(method, url, headers, data, attempt_timeout,
+                                                                     max_bytes)
+            except RequestError:
+                if method not in IDEMPOTENT or attempts > retries or (stream and stream.delivered):
+                    raise
+                self._wait(self._delay(attempts, None))
+                continue
+            resp = Response(url, status, resp_headers, body)
+            if stream and stream.delivered:
+                return resp, attempts  # already decoded (and maybe cut short) by the stream
+            if resp.header("Content-Encoding").lower() == "gzip" and body:
+                resp.body = gzip.decompress(body)
+                resp.headers = {k: v for k, v in resp_headers.items()
+                                if k.lower() not in ("content-encoding", "content-length")}
+            if status in RETRY_STATUSES and attempts <= retries and (method in IDEMPOTENT or status == 429):
+                self._wait(self._delay(attempts, resp.header("Retry-After")))
+                continue
+            location = resp.header("Location")
+            if follow_redirects and 300 <= status < 400 and status != 304 and location and redirects < MAX_REDIRECTS:
+                redirects += 1
+                target = urllib.parse.urljoin(url, location)
+                if urllib.parse.urlsplit(target).hostname != urllib.parse.urlsplit(url).hostname:
+                    # As urllib and requests do: credentials stay with their host.
+                    headers = {k: v for k, v in headers.items() if k.lower() not in CREDENTIAL_HEADERS}
+                url = target
+                if status == 303 or (status in (301, 302) and method == "POST"):
+                    method, data = "GET", None
+                continue
+            return resp, attempts
+
+    def _delay(self, attempt: int, retry_after: str | None) -> float:
+        if retry_after:
+            try:
+                seconds = float(retry_after)
+            except ValueError:
+                try:
+                    seconds = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    seconds = -1
+            if seconds >= 0:
+                return min(seconds, MAX_BACKOFF)
+        # Full jitter: concurrent callers backing off from the same 429 spread out.
+        return random.uniform(0, min(MAX_BACKOFF, self.backoff * 2 ** (attempt - 1)))
+
+    @staticmethod
+    def _wait(delay: float) -> None:
+        # Never back off past DEADLINE; the next attempt then fails at once.
+        time.sleep(remaining(delay))
+
+    def _record(self, timing: Timing) -> None:
+        with self._lock:
+            self.timings.append(timing)
+
+    def get(self, url: str, **kwargs) -> Response:
+        return self.request("GET", url, **kwargs)
+
+    def get_json(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs).raise_for_status().json()
+
+    def stream(self, url: str, on_chunk, **kwargs) -> Response:
+        """GET `url`, passing the decoded body to on_chunk(bytes) as it arrives.
+
+        Reading stops once on_chunk returns True; the Response body is what
+        was read up to then. Error statuses aren't streamed (check
+        raise_for_status()). An exception raised by on_chunk aborts the
+        request and propagates; it must not be an OSError.
+        """
+        return self.request("GET", url, on_chunk=on_chunk, **kwargs)
+
+    def post(self, url: str, data: bytes, **kwargs) -> Response:
+        return self.request("POST", url, data=data, **kwargs)
+
+    def summary(self) -> dict[str, dict]:
+        """Per host: requests, errors, retries, cache hits, p50 / max seconds, bytes."""
+        return self._summarize(lambda t: t.host)
+
+    def summary_by_source(self) -> dict[tuple[str, str], dict]:
+        """summary(), keyed by (SOURCE tag, host); "" is untagged traffic."""
+        return self._summarize(lambda t: (t.source, t.host))
+
+    def _summarize(self, key) -> dict:
+        with self._lock:
+            timings = list(self.timings)
+        groups: dict[object, list[Timing]] = defaultdict(list)
+        for timing in timings:
+            groups[key(timing)].append(timing)
+        out = {}
+        for group, rows in sorted(groups.items()):
+            elapsed = sorted(t.elapsed for t in rows)
+            out[group] = {
+                "requests": len(rows),
+                "errors": sum(1 for t in rows if t.status == 0 or t.status >= 400),
+                "retries": sum(max(t.attempts - 1, 0) for t in rows),
+                "cacheHits": sum(1 for t in rows if t.cached),
+                "p50": elapsed[len(elapsed) // 2],
+                "max": elapsed[-1],
+                "bytes": sum(t.size for t in rows),
+            }
+        return out
+
+    def summary_lines(self) -> list[str]:
+        return [
+            f"{host}: {s['requests']} req, p50 {s['p50'] * 1000:.0f}ms, max {s['max'] * 1000:.0f}ms, "
+            f"{s['retries']} retries, {s['cacheHits']} cached, {s['errors']} errors"
+            for host, s in self.summary().items()
+        ]
+
+
+# ---------------------------------------------------------------------------
+# Process-wide client
+# ---------------------------------------------------------------------------
+
+_client: Client | None = None
+_client_lock = threading.Lock()
+
+
+def client() -> Client:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = Client()
+        return _client
+
+
+def set_client(selected: Client) -> None:
+    global _client
+    with _client_lock:
+        _client = selected
+
+
+def request(method: str, url: str, **kwargs) -> Response:
+    return client().request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> Response:
+    return client().get(url, **kwargs)
+
+
+def get_json(url: str, **kwargs):
+    return client().get_json(url, **kwargs)
+
+
+def stream(url: str, on_chunk, **kwargs) -> Response:
+    return client().stream(url, on_chunk, **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("--cache", action="store_true", help="Use the conditional-request cache")
+    args = parser.parse_args()
+    try:
+        resp = get(args.url, cache=args.cache)
+    except RequestError as exc:
+        print(f"{redact(args.url)} → {exc}", file=sys.stderr)
+        return 1
+    print(f"HTTP {resp.status}, {len(resp.body)} bytes, {resp.elapsed * 1000:.0f}ms, "
+          f"{resp.attempts} attempt(s){', from cache' if resp.cached else ''}")
+    return 0 if resp.status < 400 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
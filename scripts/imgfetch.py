@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Pluggable fetch backends for the image tooling.
+
+add-image-dims.py, asset_health.py and build.py all fetch remote images
+(mostly from img.zonted.com) through backend() instead of calling urllib
+directly, so the whole pipeline can run against something other than the
+live network:
+
+  live              HTTP(S) via httpclient (keep-alive pool per host, retries)
+  mirror:<dir>      a local directory laid out as <dir>/<host>/<path>
+  replay[:<dir>]    fixtures recorded by `imgfetch.py record`
+                    (default dir: scripts/fixtures/images/, which ships a
+                    few sample images; `record` adds the site's own)
+
+Pick one with ZONTED_FETCH (default: live). Setting ZONTED_FETCH_RECORD=<dir>
+additionally records every response the active backend returns.
+
+Fixtures hold the status, headers and the first HEADER_BYTES of each
+response — enough for dimension parsing and health checks, so CI can run
+add-image-dims.py and asset_health.py offline and benchmark the parsers
+deterministically. A request that needs more of a body than was recorded
+raises FetchError rather than returning a truncated image.
+
+The supported offline mode for a full build.py run (thumbnail derivatives
+need whole images) is a mirror: copy the R2 bucket to <dir>/img.zonted.com/
+and set ZONTED_FETCH=mirror:<dir>.
+
+Usage:
+  python3 scripts/imgfetch.py record [--dir DIR]   # fixtures for every remote image on the site
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpclient
+
+ROOT = Path(__file__).resolve().parents[1]
+FIXTURES = ROOT / "scripts" / "fixtures" / "images"
+HEADER_BYTES = 65536
+PER_HOST_LIMIT = 4
+TIMEOUT = 10
+MAX_REDIRECTS = 3
+USER_AGENT = "zonted-img-tools/1.0"
+
+
+class FetchError(OSError):
+    """Network failure, or a URL the offline backend has no record of."""
+
+
+@dataclass
+class Response:
+    url: str
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+    def header(self, name: str, default: str = "") -> str:
+        name = name.lower()
+        for key, value in self.headers.items():
+            if key.lower() == name:
+                return value
+        return default
+
+
+class Backend:
+    name = "base"
+
+    def request(self, url: str, *, method: str = "GET", headers: dict[str, str] | None = None,
+                max_bytes: int | None = None) -> Response:
+        """One request/response, no redirect following. Raises FetchError."""
+        raise NotImplementedError
+
+    def fetch(self, url: str, *, method: str = "GET", headers: dict[str, str] | None = None,
+              max_bytes: int | None = None) -> Response:
+        """request(), following up to MAX_REDIRECTS redirects."""
+        for _ in range(MAX_REDIRECTS + 1):
+            resp = self.request(url, method=method, headers=headers, max_bytes=max_bytes)
+            location = resp.header("Location")
+            if not (300 <= resp.status < 400 and location):
+                return resp
+            url = urllib.parse.urljoin(url, location)
+        return resp
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+class HttpBackend(Backend):
+    """Live HTTP(S) through httpclient: PER_HOST_LIMIT pooled keep-alive
+    connections per host, one jittered retry on 429/5xx."""
+
+    name = "live"
+
+    def __init__(self, per_host: int = PER_HOST_LIMIT, timeout: float = TIMEOUT):
+        self.client = httpclient.Client(per_host=per_host, timeout=timeout, retries=1, user_agent=USER_AGENT)
+
+    def request(self, url, *, method="GET", headers=None, max_bytes=None):
+        try:
+            resp = self.client.request(method, url, headers=headers, max_bytes=max_bytes,
+                                       follow_redirects=False, compress=False)
+        except httpclient.RequestError as exc:
+            raise FetchError(str(exc)) from exc
+        return Response(url, resp.status, resp.headers, resp.body)
+
+
+class MirrorBackend(Backend):
+    """Serve https://<host>/<path> from <root>/<host>/<path>."""
+
+    name = "mirror"
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def request(self, url, *, method="GET", headers=None, max_bytes=None):
+        parts = urllib.parse.urlsplit(url)
+        path = self.root / (parts.hostname or "") / urllib.parse.unquote(parts.path).lstrip("/")
+        if not path.is_file():
+            return Response(url, 404, {"Content-Length": "0"})
+        size = path.stat().st_size
+        start, end = _parse_range((headers or {}).get("Range", ""), size)
+        if method == "HEAD":
+            return Response(url, 200, {"Content-Length": str(size)})
+        with open(path, "rb") as f:
+            f.seek(start)
+            body = f.read(end - start + 1)
+        if max_bytes:
+            body = body[:max_bytes]
+        if (start, end) == (0, size - 1):
+            return Response(url, 200, {"Content-Length": str(size)}, body)
+        return Response(url, 206, {"Content-Range": f"bytes {start}-{end}/{size}",
+                                   "Content-Length": str(len(body))}, body)
+
+
+class ReplayBackend(Backend):
+    """Serve responses recorded by RecordingBackend; unknown URLs raise."""
+
+    name = "replay"
+
+    def __init__(self, root: Path = FIXTURES):
+        self.root = Path(root)
+        index = self.root / "index.json"
+        if not index.exists():
+            raise ValueError(f"no fixtures at {self.root}; record them with `imgfetch.py record --dir {self.root}`,"
+                             " or use ZONTED_FETCH=mirror:<dir> for full offline runs")
+        self.index: dict[str, dict] = json.loads(index.read_text())
+
+    def request(self, url, *, method="GET", headers=None, max_bytes=None):
+        entry = self.index.get(url)
+        if entry is None:
+            raise FetchError(f"no fixture recorded for {url}")
+        status = entry["status"]
+        total = entry.get("total")
+        resp_headers = dict(entry.get("headers") or {})
+        if method == "HEAD" or not entry.get("file"):
+            if status == 206:
+                status = 200
+            if total is not None:
+                resp_headers["Content-Length"] = str(total)
+            return Response(url, status, resp_headers)
+        body = (self.root / entry["file"]).read_bytes()
+        start, end = _parse_range((headers or {}).get("Range", ""), total or len(body))
+        if max_bytes:
+            end = min(end, start + max_bytes - 1)
+        if end >= len(body) and total is not None and total > len(body):
+            raise FetchError(f"fixture for {url} holds only the first {len(body)} of {total} bytes;"
+                             " use ZONTED_FETCH=mirror:<dir> for full bodies")
+        body = body[start:end + 1]
+        return Response(url, status, resp_headers, body)
+
+
+class RecordingBackend(Backend):
+    """Wrap a backend and write every response it returns as a fixture."""
+
+    def __init__(self, inner: Backend, root: Path = FIXTURES):
+        self.inner = inner
+        self.name = f"{inner.name}+record"
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        index = self.root / "index.json"
+        self.index: dict[str, dict] = json.loads(index.read_text()) if index.exists() else {}
+        self._lock = threading.Lock()
+
+    def request(self, url, *, method="GET", headers=None, max_bytes=None):
+        resp = self.inner.request(url, method=method, headers=headers, max_bytes=max_bytes)
+        entry = {"status": resp.status, "headers": resp.headers, "total": total_bytes(resp),
+                 "recorded": int(time.time())}
+        with self._lock:
+            previous = self.index.get(url, {})
+            if method == "HEAD":
+                # Keep a previously recorded body; HEAD only refreshes metadata.
+                entry["file"] = previous.get("file")
+            else:
+                name = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + ".bin"
+                (self.root / name).write_bytes(resp.body[:HEADER_BYTES])
+                entry["file"] = name
+            self.index[url] = entry
+        return resp
+
+    def save(self) -> None:
+        with self._lock:
+            (self.root / "index.json").write_text(json.dumps(self.index, indent=2, sort_keys=True))
+
+
+def _parse_range(value: str, size: int) -> tuple[int, int]:
+    """(start, end) inclusive for a "bytes=a-b" header; the whole body otherwise."""
+    if value.startswith("bytes="):
+        first, _, last = value[6:].partition("-")
+        if first.isdigit():
+            start = int(first)
+            end = int(last) if last.isdigit() else size - 1
+            return start, min(end, size - 1)
+    return 0, size - 1
+
+
+def total_bytes(resp: Response) -> int | None:
+    content_range = resp.header("Content-Range")
+    if resp.status == 206 and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = resp.header("Content-Length")
+    return int(length) if length.isdigit() else None
+
+
+# ---------------------------------------------------------------------------
+# Selection
+# ---------------------------------------------------------------------------
+
+_backend: Backend | None = None
+_backend_lock = threading.Lock()
+
+
+def from_spec(spec: str) -> Backend:
+    kind, _, arg = spec.partition(":")
+    if kind in ("", "live"):
+        return HttpBackend()
+    if kind == "mirror":
+        if not arg:
+            raise ValueError("mirror backend needs a directory: mirror:<dir>")
+        return MirrorBackend(Path(arg))
+    if kind == "replay":
+        return ReplayBackend(Path(arg) if arg else FIXTURES)
+    raise ValueError(f"unknown fetch backend {spec!r} (live, mirror:<dir>, replay[:<dir>])")
+
+
+def backend() -> Backend:
+    """The process-wide backend selected by ZONTED_FETCH / ZONTED_FETCH_RECORD."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            selected = from_spec(os.environ.get("ZONTED_FETCH", "live"))
+            record_dir = os.environ.get("ZONTED_FETCH_RECORD")
+            if record_dir:
+                selected = RecordingBackend(selected, Path(record_dir))
+                atexit.register(selected.save)
+            _backend = selected
+        return _backend
+
+
+def set_backend(selected: Backend) -> None:
+    global _backend
+    with _backend_lock:
+        _backend = selected
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def record(root: Path) -> int:
+    import asset_health
+
+    refs = asset_health.collect_references()
+    urls = sorted(url for url, ref in refs.items() if ref["kind"] == "image" and not url.startswith("/"))
+    recorder = RecordingBackend(HttpBackend(), root)
+
+    def capture(url: str) -> str | None:
+        try:
+            recorder.fetch(url, headers={"Range": f"bytes=0-{HEADER_BYTES - 1}"}, max_bytes=HEADER_BYTES)
+            return None
+        except FetchError as exc:
+            return f"{url} → {exc}"
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        failures = [msg for msg in pool.map(capture, urls) if msg]
+    recorder.save()
+    for msg in failures:
+        print(f"  record failed: {msg}", file=sys.stderr)
+    print(f"Recorded {len(urls) - len(failures)}/{len(urls)} remote images into {root} in {time.time() - started:.1f}s.")
+    return 1 if failures else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="Record header bytes for every remote image referenced on the site")
+    rec.add_argument("--dir", type=Path, default=FIXTURES)
+    args = parser.parse_args()
+    if args.command == "record":
+        return record(args.dir)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Summarize the metrics crons' run telemetry (metricslib/telemetry.py).
+
+Reads the JSONL history and prints, per script / stage / name (and, for
+http rows, the source that made the requests): runs, runs that weren't ok
+(errors, stale or missing sources), p50 / p95 / max seconds and mean bytes. Slow platforms and regressions show up as a p95 creeping
+away from its p50.
+
+Usage:
+  python3 scripts/metrics-telemetry.py [--days 28] [--stage fetch] [--json]
+  python3 scripts/metrics-telemetry.py --file path/to/telemetry.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from metricslib import telemetry
+
+
+def label(row: dict) -> str:
+    text = row["stage"] if row["name"] == row["stage"] else f"{row['stage']} {row['name']}"
+    return f"{text} ({row['source']})" if row.get("source") else text
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=28, help="History window (default 28 days)")
+    parser.add_argument("--stage", help="Only this stage (run, fetch, render, commit-push, deploy-wait, http, …)")
+    parser.add_argument("--file", type=Path, default=telemetry.JSONL_PATH, help="Telemetry JSONL")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    records = telemetry.load(args.file, datetime.now() - timedelta(days=args.days))
+    if args.stage:
+        records = [entry for entry in records if entry["stage"] == args.stage]
+    rows = telemetry.summarize(records)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    if not rows:
+        print(f"No telemetry in {args.file} for the last {args.days} days.")
+        return 0
+    width = max(len(label(row)) for row in rows)
+    script = None
+    for row in rows:
+        if row["script"] != script:
+            script = row["script"]
+            print(f"\n{script}")
+            print(f"  {'stage':<{width}}  {'runs':>5} {'!ok':>4} {'p50':>8} {'p95':>8} {'max':>8} {'bytes':>10}")
+        print(f"  {label(row):<{width}}  {row['count']:>5} {row['notOk']:>4} {row['p50']:>7.2f}s {row['p95']:>7.2f}s "
+              f"{row['max']:>7.2f}s {row['bytes'] or '':>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
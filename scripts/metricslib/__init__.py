@@ -0,0 +1,44 @@
+"""Shared library code for the zonted.com metrics cron scripts.
+
+The scripts in scripts/ put this directory on sys.path (it's the script's
+own directory), so `from metricslib import store` works from any of them.
+
+Submodules load on first use (`import metricslib; metricslib.social`), so a
+script only pays for what it touches — NumPy, for one, is only imported
+inside anomaly / store functions that need it.
+
+  runtime     cron environment, command runner, workspace paths
+  keychain    macOS keychain reads / writes
+  secrets     memoized secret lookup (env, file, keychain)
+  scrape      streaming, early-exit scrapes of profile pages
+  replay      record / replay of HTTP and commands
+  analytics   GA4 and Search Console portfolio fetcher
+  portfolio   portfolio payload → metrics store and page model
+  revenue     incremental Stripe sync and VeracityAPI revenue totals
+  sources     concurrent sources with last-good fallback
+  scheduler   refresh jobs with cadences, one render and push per cycle
+  telemetry   per-stage run records (JSONL, Prometheus textfile)
+  store       SQLite history of every nightly number
+  anomaly     robust anomaly detection over the store
+  publishlog  indexed, append-aware reader for the Tabiji publish log
+  youtube     public Shorts metrics via yt-dlp
+  social      the social snapshot platforms
+  page        page model and renderer (formatting, sparkline, downsample)
+"""
+from __future__ import annotations
+
+import importlib
+
+__all__ = [
+    "analytics", "anomaly", "downsample", "formatting", "keychain", "page", "portfolio",
+    "publishlog", "replay", "revenue", "runtime", "scheduler", "scrape", "secrets", "social",
+    "sources", "sparkline", "store", "telemetry", "youtube",
+]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        module = importlib.import_module(f"{__name__}.{name}")
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,390 @@
+"""GA4 and Search Console numbers for the portfolio section, fetched in-process.
+
+fetch() returns the payload metricslib.portfolio records and renders:
+per-property GA4 totals, daily sessions, top sources and per-source daily
+series, and per-site Search Console clicks / impressions, totals and top
+queries / pages. Each GA4 property is one batchRunReports call (daily
+sessions, window totals, sessions by date × source / medium); each Search
+Console site is three searchAnalytics queries. Properties run concurrently.
+
+Closed days never change, so their daily rows are kept in CACHE_PATH and
+only the open tail of the window is requested again: a GA4 day is closed
+GA4_CLOSED_AFTER days after it ends, a Search Console day GSC_CLOSED_AFTER.
+Window totals and top queries / pages aren't additive across days and are
+always fetched whole.
+
+Auth is a service-account JWT exchanged at TOKEN_URL, signed with the
+`cryptography` package when installed and `openssl` otherwise. The client
+email comes from GA4_CLIENT_EMAIL (or the OpenClaw GA4 skill's .env), the
+key from ~/.secrets/ga4-private-key.pem or the "ga4-private-key" secret.
+
+The endpoints can be pointed at a local stand-in server:
+
+  ZONTED_GA4_API             GA4 Data API base (default the v1beta API)
+  ZONTED_GSC_API             Search Console API base (default webmasters/v3)
+  ZONTED_GOOGLE_TOKEN_URL    OAuth token endpoint
+  ZONTED_GOOGLE_ACCESS_TOKEN a bearer token to use instead of the JWT exchange
+"""
+from __future__ import annotations
+
+import base64
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import httpclient
+from metricslib import replay, runtime, secrets
+
+PROPERTIES = (
+    {"key": "tabiji", "name": "Tabiji", "domain": "tabiji.ai", "id": "524076952", "color": "#2a7a2a"},
+    {"key": "veracityapi", "name": "VeracityAPI", "domain": "veracityapi.com", "id": "537020430", "color": "#336699"},
+    {"key": "palmaura", "name": "Palmaura", "domain": "palmaura.app", "id": "538073800", "color": "#8a5a20"},
+    {"key": "zonted", "name": "Zonted", "domain": "zonted.com", "id": "532496138", "color": "#6f4aa8"},
+    {"key": "agenttune", "name": "AgentTune", "domain": "agent-tune.com", "id": "538913680", "color": "#6366f1"},
+)
+GA4_API = os.environ.get("ZONTED_GA4_API", "https://analyticsdata.googleapis.com/v1beta").rstrip("/")
+GSC_API = os.environ.get("ZONTED_GSC_API", "https://searchconsole.googleapis.com/webmasters/v3").rstrip("/")
+TOKEN_URL = os.environ.get("ZONTED_GOOGLE_TOKEN_URL", "https://oauth2.googleapis.com/token")
+SCOPES = "https://www.googleapis.com/auth/analytics.readonly https://www.googleapis.com/auth/webmasters.readonly"
+GA4_ENV_FILE = runtime.WORKSPACE / "skills" / "ga4-analytics" / ".env"
+KEY_PATH = Path(runtime.ENV["HOME"]) / ".secrets" / "ga4-private-key.pem"
+PRIVATE_KEY_SERVICE = "ga4-private-key"
+CACHE_PATH = runtime.STATE_DIR / "zonted-analytics-days.json"
+CACHE_VERSION = 1
+WINDOW_DAYS = 90
+# Search Console lags ~48h; ending the window two days back avoids a cliff to zero.
+GSC_LAG = timedelta(days=2)
+GA4_CLOSED_AFTER = timedelta(days=3)
+GSC_CLOSED_AFTER = timedelta(days=4)
+# Daily series are emitted for this many of each property's top source/mediums
+# so the metrics cron can run anomaly detection per channel.
+SOURCE_SERIES_LIMIT = 10
+TOP_SOURCES = 5
+TOP_ROWS = 5
+SOURCE_ROW_LIMIT = 100000
+REQUEST_TIMEOUT = 60
+WORKERS = 8
+
+
+# ---------------------------------------------------------------------------
+# Auth
+# ---------------------------------------------------------------------------
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _dotenv(path: Path) -> dict[str, str]:
+    values = {}
+    try:
+        lines = path.read_text().splitlines()
+    except OSError:
+        return values
+    for line in lines:
+        name, sep, value = line.strip().partition("=")
+        if sep and not name.startswith("#"):
+            values[name.removeprefix("export ").strip()] = value.strip().strip("'\"")
+    return values
+
+
+def credentials() -> tuple[str, str]:
+    """(client email, PEM private key) of the GA4 service account."""
+    email = os.environ.get("GA4_CLIENT_EMAIL") or _dotenv(GA4_ENV_FILE).get("GA4_CLIENT_EMAIL", "")
+    if KEY_PATH.exists():
+        key = KEY_PATH.read_text().strip()
+    else:
+        key = secrets.get(PRIVATE_KEY_SERVICE, env="GA4_PRIVATE_KEY").replace("\\n", "\n")
+    if not email or not key:
+        raise RuntimeError("Missing GA4_CLIENT_EMAIL or private key")
+    return email, key
+
+
+def _sign(message: bytes, key_pem: str) -> bytes:
+    """RS256 signature of `message`."""
+    try:
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import padding
+    except ImportError:
+        pass
+    else:
+        key = serialization.load_pem_private_key(key_pem.encode(), password=None)
+        return key.sign(message, padding.PKCS1v15(), hashes.SHA256())
+    openssl = runtime.which("openssl")
+    if not openssl:
+        raise RuntimeError("Signing the GA4 service-account JWT needs the cryptography package or openssl")
+    # Straight to subprocess, not runtime.run: key material stays out of cassettes.
+    with tempfile.NamedTemporaryFile("w", suffix=".pem") as handle:
+        handle.write(key_pem)
+        handle.flush()
+        proc = subprocess.run([openssl, "dgst", "-sha256", "-sign", handle.name], input=message,
+                              capture_output=True, env=runtime.ENV, timeout=30)
+    if proc.returncode:
+        raise RuntimeError(f"openssl could not sign the GA4 JWT: {proc.stderr.decode(errors='replace').strip()}")
+    return proc.stdout
+
+
+_token: tuple[str, float] | None = None
+_token_lock = threading.Lock()
+
+
+def access_token() -> str:
+    """A bearer token for both APIs, exchanged once per process (and again near expiry)."""
+    global _token
+    if os.environ.get("ZONTED_GOOGLE_ACCESS_TOKEN"):
+        return os.environ["ZONTED_GOOGLE_ACCESS_TOKEN"]
+    if replay.mode() == "replay":
+        # Requests are matched without their Authorization header.
+        return replay.REDACTED
+    with _token_lock:
+        if _token and _token[1] > time.time() + 60:
+            return _token[0]
+        email, key = credentials()
+        now = int(time.time())
+        header = _b64(json.dumps({"alg": "RS256", "typ": "JWT"}).encode())
+        claims = _b64(json.dumps({"iss": email, "scope": SCOPES, "aud": TOKEN_URL, "iat": now, "exp": now + 3600}).encode())
+        signing_input = f"{header}.{claims}".encode()
+        assertion = f"{header}.{claims}.{_b64(_sign(signing_input, key))}"
+        body = urllib.parse.urlencode({"grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer",
+                                       "assertion": assertion}).encode()
+        payload = _post_json(TOKEN_URL, body, {"Content-Type": "application/x-www-form-urlencoded"})
+        _token = (payload["access_token"], now + float(payload.get("expires_in") or 3600))
+        return _token[0]
+
+
+def _post_json(url: str, data: bytes, headers: dict[str, str]) -> dict:
+    resp = httpclient.request("POST", url, headers=headers, data=data, timeout=REQUEST_TIMEOUT)
+    if resp.status >= 400:
+        raise RuntimeError(f"HTTP {resp.status} from {httpclient.redact(url)}: {httpclient.redact(resp.text()[:600])}")
+    return resp.json()
+
+
+def _api(url: str, body: dict) -> dict:
+    return _post_json(url, json.dumps(body).encode(), {
+        "Authorization": f"Bearer {access_token()}",
+        "Content-Type": "application/json",
+    })
+
+
+# ---------------------------------------------------------------------------
+# Closed-day cache
+# ---------------------------------------------------------------------------
+
+def load_cache(path: Path = CACHE_PATH) -> dict:
+    try:
+        cache = json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError):
+        cache = {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        cache = {"version": CACHE_VERSION}
+    cache.setdefault("ga4", {})
+    cache.setdefault("gsc", {})
+    return cache
+
+
+def save_cache(cache: dict, path: Path = CACHE_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(cache, separators=(",", ":"), sort_keys=True))
+    os.replace(tmp, path)
+
+
+def open_from(days: list[str], cached: dict, closed_until: str) -> str | None:
+    """First day of `days` that has to be fetched: uncached, or not closed yet.
+
+    Everything from there to the window's end is requested (one range per
+    report), so a cold cache fetches the whole window.
+    """
+    for day in days:
+        if day > closed_until or day not in cached:
+            return day
+    return None
+
+
+def settle(days: list[str], fetched: dict[str, object], closed_until: str, empty) -> dict[str, object]:
+    """The closed days of a fetched range, ready for the cache (a day without rows is empty())."""
+    return {day: fetched.get(day, empty()) for day in days if day <= closed_until}
+
+
+# ---------------------------------------------------------------------------
+# GA4
+# ---------------------------------------------------------------------------
+
+def _number(value) -> int | float:
+    number = float(value or 0)
+    return int(number) if number.is_integer() else number
+
+
+def _iso(ymd: str) -> str:
+    return f"{ymd[:4]}-{ymd[4:6]}-{ymd[6:8]}"
+
+
+def _rows(report: dict) -> list[tuple[list[str], list[int | float]]]:
+    return [([d.get("value", "") for d in row.get("dimensionValues", [])],
+             [_number(m.get("value")) for m in row.get("metricValues", [])])
+            for row in report.get("rows") or []]
+
+
+def ga4_property(prop: dict, days: list[str], cached: dict, closed_until: str) -> tuple[dict, dict]:
+    """One property's output entry and the closed days to cache, from one batchRunReports call."""
+    window = {"startDate": days[0], "endDate": days[-1]}
+    first = open_from(days, cached, closed_until)
+    requests = [{
+        "dateRanges": [window],
+        "metrics": [{"name": name} for name in
+                    ("sessions", "activeUsers", "screenPageViews", "averageSessionDuration", "engagementRate")],
+    }]
+    if first:
+        span = {"startDate": first, "endDate": days[-1]}
+        requests += [
+            {"dateRanges": [span], "dimensions": [{"name": "date"}], "metrics": [{"name": "sessions"}]},
+            {"dateRanges": [span], "dimensions": [{"name": "date"}, {"name": "sessionSourceMedium"}],
+             "metrics": [{"name": "sessions"}], "limit": SOURCE_ROW_LIMIT},
+        ]
+    reports = _api(f"{GA4_API}/properties/{prop['id']}:batchRunReports", {"requests": requests}).get("reports") or []
+    totals = _rows(reports[0]) if reports else []
+    aggregate = totals[0][1] if totals else [0, 0, 0, 0, 0]
+
+    fetched: dict[str, dict] = {}
+    if first:
+        for (ymd,), (sessions,) in _rows(reports[1]):
+            fetched.setdefault(_iso(ymd), {"sessions": 0, "sources": {}})["sessions"] = sessions
+        for (ymd, source_medium), (sessions,) in _rows(reports[2]):
+            sources = fetched.setdefault(_iso(ymd), {"sessions": 0, "sources": {}})["sources"]
+            source_medium = source_medium or "(not set)"
+            sources[source_medium] = sources.get(source_medium, 0) + sessions
+        fetched_days = days[days.index(first):]
+        closed = settle(fetched_days, fetched, closed_until, lambda: {"sessions": 0, "sources": {}})
+    else:
+        closed = {}
+    by_day = {**cached, **fetched}
+
+    source_totals: dict[str, int | float] = {}
+    for day in days:
+        for source_medium, sessions in (by_day.get(day) or {}).get("sources", {}).items():
+            source_totals[source_medium] = source_totals.get(source_medium, 0) + sessions
+    ranked = sorted(source_totals.items(), key=lambda item: -item[1])
+    entry = {
+        **prop,
+        "totals": dict(zip(("sessions", "users", "views", "avgDuration", "engagementRate"), aggregate)),
+        "series": [(by_day.get(day) or {}).get("sessions", 0) for day in days],
+        "sources": [{"sourceMedium": source_medium, "sessions": sessions}
+                    for source_medium, sessions in ranked[:TOP_SOURCES]],
+        "sourceSeries": {
+            source_medium: [(by_day.get(day) or {}).get("sources", {}).get(source_medium, 0) for day in days]
+            for source_medium, _sessions in ranked[:SOURCE_SERIES_LIMIT]
+        },
+    }
+    return entry, closed
+
+
+# ---------------------------------------------------------------------------
+# Search Console
+# ---------------------------------------------------------------------------
+
+def _gsc_row(row: dict) -> dict:
+    return {name: _number(row.get(name)) for name in ("clicks", "impressions", "ctr", "position")}
+
+
+def weighted_position(rows: list[dict]) -> int | float:
+    impressions = sum(row["impressions"] for row in rows)
+    if not impressions:
+        return 0
+    return _number(sum(row["position"] * row["impressions"] for row in rows) / impressions)
+
+
+def gsc_site(prop: dict, days: list[str], cached: dict, closed_until: str) -> tuple[dict, dict]:
+    """One site's output entry and the closed days to cache."""
+    site_url = f"sc-domain:{prop['domain']}"
+    url = f"{GSC_API}/sites/{urllib.parse.quote(site_url, safe='')}/searchAnalytics/query"
+    window = {"startDate": days[0], "endDate": days[-1]}
+    # Sequential on purpose: the three share a URL, and replay serves a
+    # repeated request's recordings in the order they were made.
+    first = open_from(days, cached, closed_until)
+    fetched: dict[str, dict] = {}
+    closed: dict[str, dict] = {}
+    if first:
+        rows = _api(url, {"startDate": first, "endDate": days[-1], "dimensions": ["date"], "rowLimit": 250}).get("rows")
+        for row in rows or []:
+            if row.get("keys"):
+                fetched[row["keys"][0]] = _gsc_row(row)
+        closed = settle(days[days.index(first):], fetched, closed_until,
+                        lambda: {"clicks": 0, "impressions": 0, "ctr": 0, "position": 0})
+    top_queries = _api(url, {**window, "dimensions": ["query"], "rowLimit": TOP_ROWS}).get("rows") or []
+    top_pages = _api(url, {**window, "dimensions": ["page"], "rowLimit": TOP_ROWS}).get("rows") or []
+
+    by_day = {**cached, **fetched}
+    daily = [by_day.get(day) or {"clicks": 0, "impressions": 0, "ctr": 0, "position": 0} for day in days]
+    clicks = sum(row["clicks"] for row in daily)
+    impressions = sum(row["impressions"] for row in daily)
+    entry = {
+        "key": prop["key"],
+        "name": prop["name"],
+        "domain": prop["domain"],
+        "siteUrl": site_url,
+        "color": prop["color"],
+        "totals": {"clicks": clicks, "impressions": impressions,
+                   "ctr": _number(clicks / impressions) if impressions else 0,
+                   "position": weighted_position(daily)},
+        "clicks": [row["clicks"] for row in daily],
+        "impressions": [row["impressions"] for row in daily],
+        "topQueries": [{"query": (row.get("keys") or ["(not set)"])[0], **_gsc_row(row)} for row in top_queries],
+        "topPages": [{"page": (row.get("keys") or [""])[0], **_gsc_row(row)} for row in top_pages],
+    }
+    return entry, closed
+
+
+# ---------------------------------------------------------------------------
+# Portfolio
+# ---------------------------------------------------------------------------
+
+def _days(end: date) -> list[str]:
+    return [(end - timedelta(days=WINDOW_DAYS - 1 - i)).isoformat() for i in range(WINDOW_DAYS)]
+
+
+def _label(day: str) -> str:
+    parsed = date.fromisoformat(day)
+    return f"{parsed.strftime('%b')} {parsed.day}"
+
+
+def fetch(today: date | None = None, properties: tuple[dict, ...] = PROPERTIES, cache_path: Path = CACHE_PATH) -> dict:
+    """The GA4 / Search Console payload for metricslib.portfolio, for the 90 days ending `today`."""
+    today = today or date.today()
+    ga4_days = _days(today)
+    gsc_days = _days(today - GSC_LAG)
+    ga4_closed = (today - GA4_CLOSED_AFTER).isoformat()
+    gsc_closed = (today - GSC_CLOSED_AFTER).isoformat()
+    cache = load_cache(cache_path)
+
+    access_token()  # once, before the workers need it
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        ga4_jobs = [pool.submit(httpclient.carry(ga4_property), prop, ga4_days, cache["ga4"].get(prop["id"], {}), ga4_closed)
+                    for prop in properties]
+        gsc_jobs = [pool.submit(httpclient.carry(gsc_site), prop, gsc_days, cache["gsc"].get(prop["domain"], {}), gsc_closed)
+                    for prop in properties]
+        ga4 = [job.result() for job in ga4_jobs]
+        gsc = [job.result() for job in gsc_jobs]
+
+    for section, keyed, days, results in (("ga4", "id", ga4_days, ga4), ("gsc", "domain", gsc_days, gsc)):
+        for prop, (_entry, closed) in zip(properties, results):
+            kept = {day: value for day, value in cache[section].get(prop[keyed], {}).items() if day >= days[0]}
+            cache[section][prop[keyed]] = {**kept, **closed}
+    save_cache(cache, cache_path)
+
+    now = datetime.now(timezone.utc)
+    return {
+        "updatedIso": now.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+        "updatedLabel": f"{today.strftime('%B')} {today.day}, {today.year}",
+        "rangeLabel": "Last 90 days",
+        "labels": [_label(day) for day in ga4_days],
+        "gscLabels": [_label(day) for day in gsc_days],
+        "properties": sorted((entry for entry, _closed in ga4), key=lambda p: -p["totals"]["sessions"]),
+        "searchConsoleProperties": sorted((entry for entry, _closed in gsc),
+                                          key=lambda p: (-p["totals"]["clicks"], -p["totals"]["impressions"])),
+    }
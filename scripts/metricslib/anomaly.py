@@ -0,0 +1,164 @@
+"""Anomaly detection over the metrics store's daily series.
+
+Every daily series for a (source, metric) — one per property, and one per
+property × source/medium for GA4 — is loaded as a single matrix and scored
+in one vectorized pass with three robust detectors:
+
+  level     the day vs the median / MAD of the previous WINDOW days
+  weekday   the day vs the same weekday over the previous WEEKS weeks,
+            so weekend dips and Monday peaks aren't flagged
+  trend     the trailing 7-day sum vs the previous WEEKS weekly sums,
+            which catches slow declines no single day would trip
+
+Scores are modified z-scores ((x - median) / (1.4826 · MAD)); medians and
+MADs ignore missing days, and the MAD is floored so tiny, mostly-zero series
+don't turn every visit into an alert. The strongest signal per series above
+THRESHOLD becomes an Alert, ranked by |score|.
+"""
+from __future__ import annotations
+
+import warnings
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+WINDOW = 28
+WEEKS = 8
+THRESHOLD = 3.5
+MIN_HISTORY = 14
+# Baselines below this (per day, or per week for trend) are too small to alert on.
+MIN_LEVEL = 5.0
+MAD_SCALE = 1.4826
+
+# (source, metric, lag): which series to scan and how many days behind the run
+# date the last complete day is. GA4 "today" is partial; Search Console lags ~48h.
+DEFAULT_CHECKS = (
+    ("ga4", "sessions", 1),
+    ("gsc", "clicks", 2),
+    ("gsc", "impressions", 2),
+)
+
+
+@dataclass
+class Alert:
+    source: str
+    property: str
+    dimension: str
+    metric: str
+    day: str
+    kind: str  # "level" | "weekday" | "trend"
+    value: float
+    expected: float
+    score: float
+
+    @property
+    def direction(self) -> str:
+        return "up" if self.score > 0 else "down"
+
+
+def robust_z(current, baseline, floor):
+    """Modified z-score of `current` (n,) against `baseline` (n, k), NaN-aware.
+
+    Returns (z, median); z is NaN where the baseline has fewer than
+    MIN_HISTORY // 2 observations.
+    """
+    import numpy as np
+
+    median = np.nanmedian(baseline, axis=1)
+    mad = np.nanmedian(np.abs(baseline - median[:, None]), axis=1)
+    z = (current - median) / np.maximum(MAD_SCALE * mad, floor)
+    enough = np.sum(~np.isnan(baseline), axis=1) >= max(MIN_HISTORY // 2, 2)
+    z[~enough | np.isnan(current)] = np.nan
+    return z, median
+
+
+def score(values, *, window: int = WINDOW, weeks: int = WEEKS) -> dict:
+    """Score the last column of a (series × days) matrix with every detector.
+
+    `values` must have at least span(window, weeks) columns; the caller pads
+    with NaN where history is missing. Returns {kind: (z, expected, observed)}.
+    """
+    import numpy as np
+
+    with warnings.catch_warnings(), np.errstate(all="ignore"):
+        # All-NaN rows (series with no history yet) are expected; they score NaN.
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return _score(np.asarray(values, dtype=float), window, weeks)
+
+
+def span(window: int = WINDOW, weeks: int = WEEKS) -> int:
+    """Days of history score() needs, including the scored day."""
+    return max(window, 7 * weeks + 7) + 1
+
+
+def _score(values, window: int, weeks: int) -> dict:
+    import numpy as np
+
+    current = values[:, -1]
+
+    level_base = values[:, -1 - window:-1]
+    # MAD floor: 10% of the typical level, at least one unit.
+    floor = np.maximum(0.1 * np.abs(np.nan_to_num(np.nanmedian(level_base, axis=1))), 1.0)
+    level_z, level_expected = robust_z(current, level_base, floor)
+
+    weekday_base = values[:, [-1 - 7 * k for k in range(1, weeks + 1)]]
+    weekday_z, weekday_expected = robust_z(current, weekday_base, floor)
+
+    # Trailing 7-day sums via one cumulative sum; NaN days count as missing,
+    # and a week with any missing day is excluded from the baseline.
+    filled = np.nan_to_num(values, nan=0.0)
+    cumulative = np.concatenate([np.zeros((len(values), 1)), np.cumsum(filled, axis=1)], axis=1)
+    missing = np.concatenate([np.zeros((len(values), 1)), np.cumsum(np.isnan(values), axis=1)], axis=1)
+    end = values.shape[1]
+    ends = [end - 7 * k for k in range(0, weeks + 1)]
+    sums = np.stack([cumulative[:, e] - cumulative[:, e - 7] for e in ends], axis=1)
+    gaps = np.stack([missing[:, e] - missing[:, e - 7] for e in ends], axis=1)
+    sums[gaps > 0] = np.nan
+    week_now, week_base = sums[:, 0], sums[:, 1:]
+    week_floor = np.maximum(0.1 * np.abs(np.nan_to_num(np.nanmedian(week_base, axis=1))), 7.0)
+    trend_z, trend_expected = robust_z(week_now, week_base, week_floor)
+
+    return {
+        "level": (level_z, level_expected, current),
+        "weekday": (weekday_z, weekday_expected, current),
+        "trend": (trend_z, trend_expected, week_now),
+    }
+
+
+def detect(store, run_date: str, checks=DEFAULT_CHECKS, *, threshold: float = THRESHOLD,
+           window: int = WINDOW, weeks: int = WEEKS) -> tuple[list[Alert], int]:
+    """Scan every stored daily series; return (alerts ranked by |score|, series scored).
+
+    A series scored count of 0 means there is not yet enough history to judge.
+    """
+    import numpy as np
+
+    days_needed = span(window, weeks)
+    alerts: list[Alert] = []
+    evaluated = 0
+    for source, metric, lag in checks:
+        day = date.fromisoformat(run_date) - timedelta(days=lag)
+        start = day - timedelta(days=days_needed - 1)
+        keys, _days, values = store.matrix(source, metric, start.isoformat(), day.isoformat(), dimension=None)
+        if not keys:
+            continue
+        scores = score(values, window=window, weeks=weeks)
+        best_kind = np.full(len(keys), "", dtype=object)
+        best = np.zeros(len(keys))
+        for kind, (z, expected, observed) in scores.items():
+            # A level alert is redundant when the weekday view explains the day.
+            if kind == "level":
+                weekday_z = scores["weekday"][0]
+                z = np.where(np.isnan(weekday_z) | (np.abs(weekday_z) >= threshold), z, np.nan)
+            floor = MIN_LEVEL * (7 if kind == "trend" else 1)
+            strong = (np.abs(np.nan_to_num(z)) > np.abs(best)) & (np.maximum(expected, observed) >= floor)
+            best = np.where(strong, np.nan_to_num(z), best)
+            best_kind = np.where(strong, kind, best_kind)
+        evaluated += int(np.sum(~np.isnan(scores["weekday"][0]) | ~np.isnan(scores["level"][0])))
+        for i in np.flatnonzero(np.abs(best) >= threshold):
+            kind = best_kind[i]
+            _z, expected, observed = scores[kind]
+            prop, dim = keys[i]
+            alerts.append(Alert(source, prop, dim, metric, day.isoformat(), kind,
+                                float(observed[i]), float(expected[i]), float(best[i])))
+    alerts.sort(key=lambda alert: -abs(alert.score))
+    return alerts, evaluated
@@ -0,0 +1,51 @@
+"""Shape-preserving decimation for chart series.
+
+Largest-Triangle-Three-Buckets (Steinarsson, 2013): keep the first and last
+points, split the rest into equal buckets, and from each bucket keep the
+point forming the largest triangle with the previously kept point and the
+next bucket's average. Peaks and dips survive, which plain striding loses —
+a one-day traffic spike is exactly what the metrics cards need to show.
+"""
+from __future__ import annotations
+
+
+def lttb(values: list[float], threshold: int) -> list[int]:
+    """Indices of the points to keep so len(result) <= threshold."""
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    keep = [0]
+    bucket = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket) + 1
+        end = int((i + 1) * bucket) + 1
+        next_start, next_end = end, min(int((i + 2) * bucket) + 1, n)
+        next_x = (next_start + next_end - 1) / 2
+        next_y = sum(values[next_start:next_end]) / max(next_end - next_start, 1)
+        ax, ay = a, values[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - next_x) * (values[j] - ay) - (ax - j) * (next_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        keep.append(best)
+        a = best
+    keep.append(n - 1)
+    return keep
+
+
+def decimate(labels: list, series: dict[str, list[float]], threshold: int) -> tuple[list, dict[str, list[float]]]:
+    """Downsample aligned series that share one x axis.
+
+    Points are chosen by LTTB over the sum of the series, each scaled to its
+    own peak, so a spike in a small series (clicks) survives next to a large
+    one (impressions).
+    """
+    n = len(labels)
+    if n <= threshold or any(len(values) != n for values in series.values()):
+        return labels, series
+    peaks = [max(map(abs, values), default=0) or 1 for values in series.values()]
+    combined = [sum(values[i] / peak for values, peak in zip(series.values(), peaks)) for i in range(n)]
+    keep = lttb(combined, threshold)
+    return [labels[i] for i in keep], {name: [values[i] for i in keep] for name, values in series.items()}
@@ -0,0 +1,33 @@
+"""Number and HTML formatting shared by the metrics page renderer and cron messages."""
+from __future__ import annotations
+
+import html
+
+
+def fmt(n: float | int) -> str:
+    return f"{int(round(float(n or 0))):,}"
+
+
+def compact(n: float | int) -> str:
+    n = float(n or 0)
+    if n >= 1_000_000:
+        return f"{n / 1_000_000:.2f}M"
+    if n >= 1_000:
+        return f"{n / 1_000:.1f}K"
+    return fmt(n)
+
+
+def money(cents: float, currency: str = "usd") -> str:
+    amount = float(cents or 0) / 100
+    symbol = "$" if (currency or "usd").lower() == "usd" else f"{currency.upper()} "
+    if abs(amount) >= 1_000_000:
+        return f"{symbol}{amount / 1_000_000:.2f}M"
+    if abs(amount) >= 1_000:
+        return f"{symbol}{amount:,.0f}"
+    if amount.is_integer():
+        return f"{symbol}{amount:,.0f}"
+    return f"{symbol}{amount:,.2f}"
+
+
+def esc(value: object) -> str:
+    return html.escape(str(value), quote=True)
@@ -0,0 +1,28 @@
+"""macOS keychain (generic passwords) for the metrics cron scripts."""
+from __future__ import annotations
+
+import sys
+
+from metricslib import runtime
+
+DEFAULT_ACCOUNT = "tabijiai"
+
+
+def secret(service: str) -> str:
+    """The password stored under `service`, or "" (with a warning) when it can't be read."""
+    proc = runtime.run(["security", "find-generic-password", "-s", service, "-w"], check=False, capture=True)
+    if proc.returncode == 0 and proc.stdout.strip():
+        return proc.stdout.strip()
+    if proc.stderr.strip():
+        print(f"⚠️ Keychain lookup failed for {service}: {proc.stderr.strip()}", file=sys.stderr)
+    elif proc.returncode:
+        print(f"⚠️ Keychain lookup failed for {service}: security exited {proc.returncode}", file=sys.stderr)
+    return ""
+
+
+def store(service: str, value: str, account: str = DEFAULT_ACCOUNT) -> None:
+    """Create or update (-U) the password for `service`."""
+    proc = runtime.run(["security", "add-generic-password", "-U", "-s", service, "-a", account, "-w", value], check=False)
+    if proc.returncode:
+        # Not runtime.run's check=True: its error would echo the command, value included.
+        raise RuntimeError(f"Keychain update failed for {service}: security exited {proc.returncode}")
@@ -0,0 +1,363 @@
+"""Render zonted.com/metrics/ from a template and one structured model.
+
+The page is _templates/metrics-template.html with three placeholders:
+
+  {{UPDATED_LABEL}}   the "Updated …" badge and chart-data comment
+  {{SECTIONS}}        every section below, rendered in SECTIONS order
+  {{CHART_SOURCES}}   URLs of the per-section chart data files
+
+Cards show static SVG sparklines (metricslib.sparkline), so the page needs
+no JavaScript to show trends. Chart series are not inlined: write_page()
+writes one file per chart section to metrics/data/<section>.json, and only
+when a reader expands a card does the page load Chart.js and that section's
+file to draw the interactive chart. URLs carry a content hash, so the files
+can be cached for a year.
+
+The model lives in metrics/model.json:
+
+  {
+    "updatedIso": "...", "updatedLabel": "May 31, 2026",
+    "chartData": {
+      "revenueSnapshot": {...}, "portfolioGa4": {...},
+      "portfolioGsc": {...},    "socialSnapshot": {...}
+    }
+  }
+
+Each cron script loads the model, replaces the keys it owns, and calls
+write_page(), which re-renders the whole page in one pass. VOLATILE_KEYS
+are stamps that change on every refresh; semantic() drops them, so callers
+can tell a real change from a timestamp-only one. Sections are
+named components — reorder SECTIONS to reorder the page. A renderer that
+returns "" (no data yet) drops its section.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+
+from metricslib import sparkline
+from metricslib.formatting import compact, esc, fmt, money
+
+ROOT = Path(__file__).resolve().parents[2]
+# ZONTED_METRICS_OUT redirects the generated files (replays, benchmarks).
+OUT_DIR = Path(os.environ.get("ZONTED_METRICS_OUT") or ROOT / "metrics")
+METRICS_HTML = OUT_DIR / "index.html"
+MODEL_PATH = OUT_DIR / "model.json"
+TEMPLATE = ROOT / "_templates" / "metrics-template.html"
+DATA_DIR = OUT_DIR / "data"
+DATA_URL = "/metrics/data/"
+
+PLACEHOLDER_RE = re.compile(r"\{\{([A-Z_]+)\}\}")
+# Refresh stamps, at any depth of the model (the page's and revenueSnapshot's).
+VOLATILE_KEYS = frozenset({"updatedIso", "updatedLabel"})
+
+
+# ---------------------------------------------------------------------------
+# Model
+# ---------------------------------------------------------------------------
+
+def load_model() -> dict:
+    """metrics/model.json, or a model recovered from the current page on first run."""
+    if MODEL_PATH.exists():
+        return json.loads(MODEL_PATH.read_text())
+    return model_from_page(METRICS_HTML.read_text()) if METRICS_HTML.exists() else {"chartData": {}}
+
+
+def model_from_page(text: str) -> dict:
+    """Recover the model from a page rendered before model.json existed."""
+    chart_match = re.search(r"const chartData = (.*?);\n", text, re.S)
+    badge = re.search(r'<div class="updated-badge">Updated ([^<]+)</div>', text)
+    return {
+        "updatedLabel": badge.group(1) if badge else "",
+        "chartData": json.loads(chart_match.group(1)) if chart_match else {},
+    }
+
+
+def semantic(value):
+    """The model (or any part of it) without VOLATILE_KEYS."""
+    if isinstance(value, dict):
+        return {k: semantic(v) for k, v in value.items() if k not in VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [semantic(v) for v in value]
+    return value
+
+
+def updated_at(model: dict) -> datetime | None:
+    """When the model was last stamped (naive UTC), from its updatedIso."""
+    try:
+        stamp = datetime.fromisoformat(str(model.get("updatedIso") or "").replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return stamp.replace(tzinfo=None) - stamp.utcoffset() if stamp.utcoffset() else stamp.replace(tzinfo=None)
+
+
+def save_model(model: dict) -> None:
+    MODEL_PATH.write_text(json.dumps(model, indent=1, ensure_ascii=False) + "\n")
+
+
+# ---------------------------------------------------------------------------
+# Sections
+# ---------------------------------------------------------------------------
+
+def section(marker: str, attrs: str, heading_id: str, icon: str, title: str, desc: str, grid_class: str, cards: str) -> str:
+    return f'''        <!-- {marker} -->
+        <section class="{attrs}" aria-labelledby="{heading_id}">
+            <h2 id="{heading_id}"><span class="icon">{icon}</span> {title}</h2>
+            <p class="section-desc">{desc}</p>
+            <div class="{grid_class}">
+{cards}
+            </div>
+        </section>
+'''
+
+
+def card_header(title: str, subtitle: str, total: str, label: str) -> str:
+    return f'''                    <div class="property-card-header">
+                        <div>
+                            <h3>{esc(title)}</h3>
+                            <span class="property-domain">{esc(subtitle)}</span>
+                        </div>
+                        <div class="property-total">
+                            <strong>{total}</strong>
+                            <span>{label}</span>
+                        </div>
+                    </div>'''
+
+
+def mini_chart(section: str, key: str, svg: str, title: str) -> str:
+    """Sparkline container; the expand button swaps in an interactive chart."""
+    return (f'                    <div class="property-mini-chart" data-chart="{section}" data-key="{esc(key)}">{svg}'
+            f'<button type="button" class="chart-expand" aria-expanded="false" aria-label="Explore {esc(title)} chart">⤢</button></div>')
+
+
+def bar_rows(rows: list[dict], value_key: str, label_key: str, stat, color: str, *, title: bool = False) -> str:
+    """<li> rows with a proportional bar, scaled to the largest value_key."""
+    top = max((row[value_key] for row in rows), default=0)
+    return "\n".join(
+        f'''                            <li class="channel-item">
+                                <span{f' title="{esc(row[label_key])}"' if title else ""}>{esc(row[label_key])}</span>
+                                <strong>{stat(row)}</strong>
+                                <span class="channel-track"><span class="channel-fill" style="width:{(row[value_key] / top * 100 if top else 0):.1f}%;background:{esc(color)}"></span></span>
+                            </li>'''
+        for row in rows
+    )
+
+
+def revenue_section(chart: dict) -> str:
+    cards: list[str] = []
+    for card in (chart.get("revenueSnapshot") or {}).get("cards", []):
+        rows = "\n".join(
+            f'''                        <li class="channel-item"><span>{esc(row.get('label') or '')}</span><strong>{esc(row.get('value') or '')}</strong></li>'''
+            for row in card.get("rows", [])
+        )
+        if card.get("topPrices"):
+            rows += "\n" + "\n".join(
+                f'''                        <li class="channel-item"><span>{esc(row.get('name') or 'Recurring price')}</span><strong>{money(row.get('mrrCents') or 0, row.get('currency') or 'usd')} MRR · {fmt(row.get('subscriptions') or 0)} subs</strong></li>'''
+                for row in card.get("topPrices", [])
+            )
+        if not rows:
+            rows = '                        <li class="empty-channels">No revenue data yet.</li>'
+        header = card_header(card.get("name") or "", f"{card.get('source') or ''} · {card.get('domain') or ''}",
+                             esc(card.get("total") or "$0"), esc(card.get("label") or "revenue"))
+        cards.append(f'''                <article class="property-card revenue-card" style="--card-accent:{esc(card.get('color') or '#1a1a1a')}">
+{header}
+                    <ol class="channel-list revenue-list">
+{rows}
+                    </ol>
+                </article>''')
+    if not cards:
+        return ""
+    return section(
+        "Revenue Snapshot", "portfolio-section revenue-section", "revenue-heading", "💸", "Revenue Snapshot",
+        "Revenue snapshot for active projects. VeracityAPI usage revenue is pulled from Stripe read-only successful charges for the last 30 days.",
+        "property-grid revenue-grid", "\n".join(cards),
+    )
+
+
+def ga4_section(chart: dict) -> str:
+    cards: list[str] = []
+    for prop in (chart.get("portfolioGa4") or {}).get("properties", []):
+        sources = prop.get("sources", [])
+        if sources:
+            rows = bar_rows(sources, "sessions", "sourceMedium", lambda row: fmt(row["sessions"]), prop["color"])
+        else:
+            rows = '                            <li class="empty-channels">No source / medium data yet.</li>'
+        header = card_header(prop["name"], prop["domain"], fmt(prop["totals"]["sessions"]), "sessions")
+        labels = (chart.get("portfolioGa4") or {}).get("labels", [])
+        svg = sparkline.line(labels, [{"values": prop.get("series", []), "color": prop["color"], "fill": True}],
+                             sparkline.describe(f"{prop['name']} sessions", labels, prop.get("series", [])))
+        chart_html = mini_chart("ga4", prop["key"], svg, f"{prop['name']} sessions")
+        cards.append(f'''                <article class="property-card">
+{header}
+{chart_html}
+                    <div class="subsection-label">Top source / medium</div>
+                    <ol class="channel-list">
+{rows}
+                    </ol>
+                </article>''')
+    return section(
+        "Portfolio GA4 Snapshot", "portfolio-section", "portfolio-ga4-heading", "📊", "GA4 Portfolio Snapshot",
+        "Sessions over the last 90 days plus top source / medium rows for active properties. Ordered by total sessions.",
+        "property-grid", "\n".join(cards),
+    )
+
+
+def gsc_section(chart: dict) -> str:
+    cards: list[str] = []
+    for prop in (chart.get("portfolioGsc") or {}).get("properties", []):
+        pages = prop.get("topPages", [])
+        if pages:
+            rows = bar_rows(pages, "impressions", "page", lambda row: f"{fmt(row['clicks'])} / {compact(row['impressions'])}",
+                            prop["color"], title=True)
+        else:
+            rows = '                            <li class="empty-channels">No page data yet.</li>'
+        header = card_header(prop["name"], prop["domain"], fmt(prop["totals"]["clicks"]),
+                             f"clicks · {compact(prop['totals']['impressions'])} impr.")
+        labels = (chart.get("portfolioGsc") or {}).get("labels", [])
+        svg = sparkline.line(
+            labels,
+            [{"values": prop.get("impressions", []), "color": prop["color"], "fill": True},
+             {"values": prop.get("clicks", []), "color": "#1a1a1a"}],
+            sparkline.describe(f"{prop['name']} search clicks", labels, prop.get("clicks", [])),
+        )
+        chart_html = mini_chart("gsc", prop["key"], svg, f"{prop['name']} Search Console")
+        cards.append(f'''                <article class="property-card search-console-card">
+{header}
+{chart_html}
+                    <div class="subsection-label">Top pages <span class="muted-inline">clicks / impressions</span></div>
+                    <ol class="channel-list">
+{rows}
+                    </ol>
+                </article>''')
+    return section(
+        "Portfolio Search Console Snapshot", "portfolio-section search-console-section", "portfolio-gsc-heading", "🔎",
+        "Search Console Snapshot",
+        "Google Search Console clicks and impressions over the last 90 days for active properties. Ordered by total clicks.",
+        "property-grid", "\n".join(cards),
+    )
+
+
+def social_section(chart: dict) -> str:
+    cards: list[str] = []
+    for card in (chart.get("socialSnapshot") or {}).get("cards", []):
+        rows = "\n".join(
+            f'                        <li class="channel-item"><span>{esc(row.get("label", ""))}</span><strong>{esc(row.get("value", ""))}</strong></li>'
+            for row in card.get("rows", [])
+        )
+        kicker = ""
+        if card.get("key") == "youtube" and card.get("chartRange"):
+            kicker = f'                    <div class="chart-kicker">Views by publish date · {esc(card["chartRange"])}</div>\n'
+        header = card_header(card["name"], card["handle"], esc(card["total"]), esc(card["label"]))
+        labels, series = card.get("labels", []), card.get("series", [])
+        if card.get("chartType") == "bar":
+            summary = ", ".join(f"{label} {fmt(value)}" for label, value in zip(labels, series))
+            svg = sparkline.bars(labels, series, card["color"], f"{card['name']}: {summary}")
+        else:
+            svg = sparkline.line(labels, [{"values": series, "color": card["color"], "fill": True}],
+                                 sparkline.describe(f"{card['name']} {(card.get('chartLabel') or '').lower()}".strip(), labels, series))
+        chart_html = mini_chart("social", card["key"], svg, f"{card['name']} {card.get('chartLabel') or ''}".strip())
+        cards.append(f'''                <article class="property-card social-card">
+{header}
+{kicker}{chart_html}
+                    <div class="subsection-label">Signals</div>
+                    <ol class="channel-list">
+{rows}
+                    </ol>
+                </article>''')
+    if not cards:
+        return ""
+    return section(
+        "Tabiji Social Snapshot", "portfolio-section social-snapshot-section", "social-snapshot-heading", "🌐",
+        "Tabiji Social Snapshot",
+        "Four-platform snapshot for Tabiji’s social engine: Instagram, YouTube Shorts, Pinterest, and TikTok.",
+        "property-grid social-grid", "\n".join(cards),
+    )
+
+
+# Page order. Each renderer takes the model's chartData.
+SECTIONS = (
+    ("revenue", revenue_section),
+    ("ga4", ga4_section),
+    ("gsc", gsc_section),
+    ("social", social_section),
+)
+
+
+# ---------------------------------------------------------------------------
+# Chart data files
+# ---------------------------------------------------------------------------
+
+SOCIAL_CHART_FIELDS = ("name", "color", "chartType", "chartLabel", "tension", "pointRadius")
+
+
+def chart_entries(chart: dict) -> dict[str, dict[str, dict]]:
+    """{section: {key: entry}} with each entry holding only what its chart draws."""
+    ga4 = chart.get("portfolioGa4") or {}
+    gsc = chart.get("portfolioGsc") or {}
+    return {
+        "ga4": {
+            prop["key"]: {"name": prop["name"], "color": prop["color"], "labels": ga4.get("labels", []),
+                          "series": prop.get("series", [])}
+            for prop in ga4.get("properties", [])
+        },
+        "gsc": {
+            prop["key"]: {"name": prop["name"], "color": prop["color"], "labels": gsc.get("labels", []),
+                          "impressions": prop.get("impressions", []), "clicks": prop.get("clicks", [])}
+            for prop in gsc.get("properties", [])
+        },
+        "social": {
+            card["key"]: {**{field: card[field] for field in SOCIAL_CHART_FIELDS if field in card},
+                          "labels": card.get("labels", []), "series": card.get("series", [])}
+            for card in (chart.get("socialSnapshot") or {}).get("cards", [])
+        },
+    }
+
+
+def chart_files(chart: dict) -> dict[str, str]:
+    """{filename: JSON text} with every chart section's series at full resolution."""
+    return {f"{section}.json": json.dumps(entries, separators=(",", ":"))
+            for section, entries in chart_entries(chart).items()}
+
+
+def chart_sources(files: dict[str, str]) -> dict[str, str]:
+    """{section: content-hashed URL} for the page's chartSources."""
+    return {
+        name.partition(".")[0]: f"{DATA_URL}{name}?v={hashlib.sha1(text.encode('utf-8')).hexdigest()[:10]}"
+        for name, text in files.items()
+    }
+
+
+# ---------------------------------------------------------------------------
+# Page
+# ---------------------------------------------------------------------------
+
+def render_page(model: dict, files: dict[str, str] | None = None) -> str:
+    chart = model.get("chartData") or {}
+    if files is None:
+        files = chart_files(chart)
+    sections = [rendered for _name, render in SECTIONS if (rendered := render(chart))]
+    values = {
+        "UPDATED_LABEL": esc(model.get("updatedLabel") or ""),
+        "SECTIONS": "\n".join(sections),
+        "CHART_SOURCES": json.dumps(chart_sources(files), separators=(",", ":")),
+    }
+    return PLACEHOLDER_RE.sub(lambda m: values[m.group(1)], TEMPLATE.read_text())
+
+
+def write_page(model: dict) -> None:
+    """Persist the model, write the chart data files, and re-render metrics/index.html."""
+    save_model(model)
+    files = chart_files(model.get("chartData") or {})
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    for name, text in files.items():
+        path = DATA_DIR / name
+        if not path.exists() or path.read_text() != text:
+            path.write_text(text)
+    for stale in DATA_DIR.glob("*.json"):
+        if stale.name not in files:
+            stale.unlink()
+    METRICS_HTML.write_text(render_page(model, files))
@@ -0,0 +1,152 @@
+"""The portfolio section of the metrics page: GA4, Search Console and revenue.
+
+metricslib.analytics fetches the GA4 / Search Console payload and
+update-metrics-cron.py adds the Stripe revenue cards (revenue_cards). From
+there record_metrics() appends the night's numbers to the metrics store and
+merge_portfolio() folds the payload into the page model, with chart series
+read back from the store. bench-metrics.py times both over a synthetic
+portfolio.
+"""
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+
+from metricslib import page
+from metricslib.formatting import fmt, money
+from metricslib.store import MetricsStore, iso_days
+
+MANUAL_REVENUE_CARDS = [
+    {
+        "key": "tabiji",
+        "name": "Tabiji",
+        "domain": "tabiji.ai",
+        "color": "#2a7a2a",
+        "total": "$112.57",
+        "label": "estimated royalties",
+        "source": "KDP dashboard",
+        "rows": [
+            {"label": "Orders", "value": "40"},
+            {"label": "KENP read", "value": "2,902"},
+        ],
+    },
+    {
+        "key": "agenttune",
+        "name": "AgentTune",
+        "domain": "agent-tune.com",
+        "color": "#6366f1",
+        "total": "$0",
+        "label": "current revenue",
+        "source": "Open library",
+        "rows": [
+            {"label": "Status", "value": "Live"},
+            {"label": "Model", "value": "Custom tunings"},
+        ],
+    },
+]
+
+
+def revenue_cards(stripe_revenue: dict) -> dict:
+    veracity = {
+        "key": stripe_revenue["key"],
+        "name": stripe_revenue["name"],
+        "domain": stripe_revenue["domain"],
+        "color": stripe_revenue.get("color", "#336699"),
+        "total": money(stripe_revenue.get("grossCents30d") or 0, stripe_revenue.get("currency") or "usd"),
+        "label": "gross collected (30d)",
+        "source": "Stripe",
+        "rows": [
+            {"label": "Successful payments", "value": fmt(stripe_revenue.get("successfulPayments30d") or 0)},
+            {"label": "Net after fees", "value": money(stripe_revenue.get("netCents30d") or 0, stripe_revenue.get("currency") or "usd")},
+            {"label": "Lifetime gross", "value": money(stripe_revenue.get("lifetimeGrossCents") or 0, stripe_revenue.get("currency") or "usd")},
+        ],
+    }
+    return {
+        "updatedIso": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "cards": [MANUAL_REVENUE_CARDS[0], veracity, MANUAL_REVENUE_CARDS[1]],
+    }
+
+
+def load_existing_revenue_snapshot() -> dict | None:
+    try:
+        snapshot = page.load_model().get("chartData", {}).get("revenueSnapshot")
+    except (OSError, json.JSONDecodeError):
+        return None
+    if isinstance(snapshot, dict) and snapshot.get("cards"):
+        return snapshot
+    return None
+
+
+def ga4_days(run_date: str) -> list[str]:
+    """The 90 days metricslib.analytics reports GA4 series for (ending today)."""
+    end = datetime.strptime(run_date, "%Y-%m-%d").date()
+    return iso_days(end - timedelta(days=89), end)
+
+
+def gsc_days(run_date: str) -> list[str]:
+    """The 90 Search Console days (ending two days ago, to skip the reporting lag)."""
+    end = datetime.strptime(run_date, "%Y-%m-%d").date() - timedelta(days=2)
+    return iso_days(end - timedelta(days=89), end)
+
+
+def record_metrics(store: MetricsStore, run_date: str, data: dict | None, stripe_revenue: dict | None) -> int:
+    """Append tonight's GA4 / GSC / revenue numbers to the metrics store."""
+    rows = 0
+    if stripe_revenue:
+        rows += store.record_totals(run_date, "revenue", stripe_revenue["key"], stripe_revenue)
+    if data is None:
+        return rows
+    days = ga4_days(run_date)
+    for prop in data["properties"]:
+        rows += store.record_series(run_date, "ga4", prop["key"], "sessions", days, prop.get("series") or [])
+        rows += store.record_totals(run_date, "ga4", prop["key"], prop["totals"])
+        for source in prop.get("sources", []):
+            rows += store.record_totals(run_date, "ga4", prop["key"], {"sessions": source["sessions"]}, dimension=source["sourceMedium"])
+        for source_medium, series in (prop.get("sourceSeries") or {}).items():
+            rows += store.record_series(run_date, "ga4", prop["key"], "sessions", days, series, dimension=source_medium)
+    days = gsc_days(run_date)
+    for prop in data.get("searchConsoleProperties", []):
+        rows += store.record_series(run_date, "gsc", prop["key"], "clicks", days, prop.get("clicks") or [])
+        rows += store.record_series(run_date, "gsc", prop["key"], "impressions", days, prop.get("impressions") or [])
+        rows += store.record_totals(run_date, "gsc", prop["key"], prop["totals"])
+    return rows
+
+
+def series_from_store(store: MetricsStore, source: str, key: str, metric: str, days: list[str], fallback: list) -> list:
+    stored = store.series(source, key, metric, days[0], days[-1])
+    if not stored:
+        return fallback
+    return [int(stored.get(day, 0)) for day in days]
+
+
+def update_html(data: dict, store: MetricsStore | None = None, run_date: str | None = None, model: dict | None = None) -> None:
+    """merge_portfolio() into `model` (default: the one on disk) and re-render the page."""
+    if model is None:
+        model = page.load_model()
+    merge_portfolio(model, data, store, run_date)
+    page.write_page(model)
+
+
+def merge_portfolio(model: dict, data: dict, store: MetricsStore | None = None, run_date: str | None = None) -> None:
+    """Merge tonight's GA4 / GSC / revenue data into the page model."""
+    # Chart series come from the metrics store when available, so the page
+    # shows the full 90-day window even if a fetcher only reported recent days.
+    if store is not None and run_date:
+        days = ga4_days(run_date)
+        for prop in data["properties"]:
+            prop["series"] = series_from_store(store, "ga4", prop["key"], "sessions", days, prop.get("series") or [])
+        days = gsc_days(run_date)
+        for prop in data.get("searchConsoleProperties", []):
+            prop["clicks"] = series_from_store(store, "gsc", prop["key"], "clicks", days, prop.get("clicks") or [])
+            prop["impressions"] = series_from_store(store, "gsc", prop["key"], "impressions", days, prop.get("impressions") or [])
+
+    model["updatedIso"] = data["updatedIso"]
+    model["updatedLabel"] = data["updatedLabel"]
+    chart = model.setdefault("chartData", {})
+    # sourceSeries only feeds the metrics store; keep it out of the page.
+    chart["portfolioGa4"] = {"labels": data["labels"], "properties": [
+        {k: v for k, v in prop.items() if k != "sourceSeries"} for prop in data["properties"]
+    ]}
+    chart["portfolioGsc"] = {"labels": data.get("gscLabels", data["labels"]), "properties": data.get("searchConsoleProperties", [])}
+    if data.get("revenueSnapshot"):
+        chart["revenueSnapshot"] = data["revenueSnapshot"]
@@ -0,0 +1,155 @@
+"""Indexed reader for the Tabiji publish log.
+
+publish-log.json is a JSON array with one row per published video,
+{"ts": <epoch>, "platforms": {"yt": <url>, ...}}, and it only ever grows at
+the end. Parsing all of it every night is wasted work. This module keeps an
+index at INDEX_PATH instead: {platform: {video id: publish day}}, together
+with the byte offset just past the last parsed row and the sha256 of the
+log up to that offset.
+
+On each read:
+
+  same size and same prefix hash   nothing new; answer from the index
+  grown and same prefix hash       raw_decode only the rows after the offset
+  anything else (rewritten, edited, shrunk, index missing)   rebuild
+
+A row the publisher is still writing (a truncated tail) ends the parse: the
+offset stays just past the last complete row and the rest is read next time.
+
+Hashing the prefix is a streamed read with no JSON parse, so a night with
+nothing new costs one pass over the bytes.
+"""
+from __future__ import annotations
+
+import codecs
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+
+from metricslib import runtime
+
+LOG_PATH = runtime.WORKSPACE / "tabiji" / "functions" / "publish-log.json"
+INDEX_PATH = runtime.STATE_DIR / "tabiji-publish-log-index.json"
+INDEX_VERSION = 1
+CHUNK = 1 << 20
+YOUTUBE_ID_RE = re.compile(r"(?:shorts/|watch\?v=|youtu\.be/)([A-Za-z0-9_-]{6,})")
+_DECODER = json.JSONDecoder()
+
+
+def video_id(platform: str, url: str) -> str:
+    """The id a platform's URL names; the URL itself where there's no known pattern."""
+    if platform == "yt":
+        match = YOUTUBE_ID_RE.search(url or "")
+        return match.group(1) if match else ""
+    return url or ""
+
+
+def _rows(text: str, pos: int):
+    """Yield (row, end) for each array element from `pos` (just after "[" or a row) on."""
+    while True:
+        while pos < len(text) and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(text) or text[pos] == "]":
+            return
+        row, pos = _DECODER.raw_decode(text, pos)
+        yield row, pos
+
+
+def _parse(text: str, pos: int, platforms: dict[str, dict[str, str]]) -> int:
+    """Index every complete row from `pos` on; return the end of the last one."""
+    end = pos
+    try:
+        for row, end in _rows(text, pos):
+            _add(platforms, row)
+    except json.JSONDecodeError:
+        pass  # truncated tail; picked up once the write completes
+    return end
+
+
+def _decode(data: bytes) -> str:
+    # Incremental, so a multi-byte character cut off at the end is held back
+    # instead of failing the whole read.
+    return codecs.getincrementaldecoder("utf-8")().decode(data)
+
+
+def _add(index: dict[str, dict[str, str]], row: dict) -> None:
+    day = datetime.fromtimestamp(int(row.get("ts") or 0)).strftime("%Y-%m-%d")
+    for platform, url in (row.get("platforms") or {}).items():
+        key = video_id(platform, url) if isinstance(url, str) else ""
+        if key:
+            index.setdefault(platform, {})[key] = day
+
+
+def _load_index(path: Path) -> dict:
+    try:
+        index = json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return index if index.get("version") == INDEX_VERSION else {}
+
+
+def _save_index(path: Path, index: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(index, separators=(",", ":")))
+    os.replace(tmp, path)
+
+
+def read(log_path: Path = LOG_PATH, index_path: Path = INDEX_PATH) -> dict[str, dict[str, str]]:
+    """{platform: {video id: publish day}} for every row in the log, parsing only what's new."""
+    if not log_path.exists():
+        return {}
+    index = _load_index(index_path)
+    offset = int(index.get("offset") or 0)
+    size = log_path.stat().st_size
+    digest = hashlib.sha256()
+    with log_path.open("rb") as handle:
+        if index and 0 < offset <= size:
+            remaining = offset
+            while remaining:
+                chunk = handle.read(min(CHUNK, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                remaining -= len(chunk)
+            if not remaining and digest.hexdigest() == index.get("sha256"):
+                if size == index.get("size"):
+                    return index["platforms"]
+                tail = handle.read()
+                try:
+                    return _extend(index, digest, tail, size, index_path)
+                except (ValueError, UnicodeDecodeError):
+                    pass  # the tail isn't a clean continuation; rebuild
+        handle.seek(0)
+        data = handle.read()
+    return _rebuild(data, size, index_path)
+
+
+def _extend(index: dict, digest, tail: bytes, size: int, index_path: Path) -> dict[str, dict[str, str]]:
+    text = _decode(tail)
+    platforms = index["platforms"]
+    consumed = text[:_parse(text, 0, platforms)].encode("utf-8")
+    digest.update(consumed)
+    index.update(offset=index["offset"] + len(consumed), size=size, sha256=digest.hexdigest())
+    _save_index(index_path, index)
+    return platforms
+
+
+def _rebuild(data: bytes, size: int, index_path: Path) -> dict[str, dict[str, str]]:
+    text = _decode(data)
+    platforms: dict[str, dict[str, str]] = {}
+    start = text.find("[")
+    # The rows end at the last complete row; appends land after it.
+    prefix = text[:_parse(text, start + 1, platforms)].encode("utf-8") if start >= 0 else b""
+    index = {
+        "version": INDEX_VERSION,
+        "offset": len(prefix),
+        "size": size,
+        "sha256": hashlib.sha256(prefix).hexdigest(),
+        "platforms": platforms,
+    }
+    _save_index(index_path, index)
+    return platforms
@@ -0,0 +1,287 @@
+"""Record / replay for the metrics cron scripts.
+
+update-metrics-cron.py and update-social-snapshot.py reach the outside
+world two ways: HTTP through httpclient, and subprocesses (yt-dlp, git,
+gh, openclaw, macOS `security`) through run_command(). Both go
+through this module, so a whole nightly run can be captured once on the Mac
+and replayed anywhere:
+
+  ZONTED_METRICS_RECORD=<dir>   run live and write every HTTP exchange and
+                                command result to the cassette in <dir>,
+                                plus a snapshot of the workspace state files
+                                the run starts from
+  ZONTED_METRICS_REPLAY=<dir>   answer HTTP and commands from the cassette;
+                                nothing touches the network or runs a binary
+
+A cassette holds one day's run: <dir>/index.json lists exchanges in the
+order they happened (a repeated request replays its recordings in turn),
+response bodies live in <dir>/http/, and <dir>/workspace/ mirrors the state
+files. On replay, ISO dates in request URLs are shifted by the days elapsed
+since recording, so "the last 90 days" still finds its fixture.
+
+Secrets are never written: credential query parameters and token fields in
+response bodies are redacted, keychain reads record "<redacted>", and the
+value passed to `security add-generic-password -w` is blanked. Requests are
+matched on their redacted form, so replay works with the placeholder tokens.
+
+Replays run with a scratch workspace and output directory; see
+bench-metrics.py --replay.
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import urllib.parse
+import zlib
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpclient
+
+ROOT = Path(__file__).resolve().parents[2]
+RECORD_ENV = "ZONTED_METRICS_RECORD"
+REPLAY_ENV = "ZONTED_METRICS_REPLAY"
+ISO_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+SECRET_FIELDS_RE = re.compile(rb'"(access_token|refresh_token|client_secret)"\s*:\s*"[^"]*"')
+# Graph API paging links carry the token in their query string.
+SECRET_PARAMS_RE = re.compile(httpclient.SECRET_PARAMS.pattern.encode(), re.I)
+# Bodies are stored decompressed and may be redacted, so encodings and lengths go too.
+DROP_HEADERS = {"set-cookie", "authorization", "content-length", "content-encoding"}
+REDACTED = "<redacted>"
+
+
+class ReplayMiss(RuntimeError):
+    """The cassette has no recording for a request or command made during replay."""
+
+
+class Cassette:
+    def __init__(self, root: Path, mode: str):
+        self.root = Path(root)
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._used: set[tuple[str, int]] = set()
+        index = self.root / "index.json"
+        data = json.loads(index.read_text()) if index.exists() else {}
+        today = date.today().isoformat()
+        if mode == "record" and data.get("recordedOn") != today:
+            data = {}  # one day per cassette; an older recording is replaced
+        self.recorded_on = data.get("recordedOn") or today
+        self.http: list[dict] = data.get("http", [])
+        self.commands: list[dict] = data.get("commands", [])
+
+    def save(self) -> None:
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            index = {"recordedOn": self.recorded_on, "http": self.http, "commands": self.commands}
+            (self.root / "index.json").write_text(json.dumps(index, indent=1))
+
+    # -- HTTP ---------------------------------------------------------------
+
+    def record_http(self, method: str, url: str, status: int, headers: dict[str, str], body: bytes) -> None:
+        if any(k.lower() == "content-encoding" and v.lower() == "gzip" for k, v in headers.items()) and body:
+            # A streamed body may have been cut short, so not gzip.decompress.
+            body = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(body)
+        body = SECRET_FIELDS_RE.sub(lambda m: b'"' + m.group(1) + b'": "' + REDACTED.encode() + b'"', body)
+        body = SECRET_PARAMS_RE.sub(lambda m: m.group(1) + b"=" + REDACTED.encode(), body)
+        name = hashlib.sha1(body).hexdigest()[:16] + ".bin"
+        folder = self.root / "http"
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / name).write_bytes(body)
+        entry = {"method": method, "url": httpclient.redact(url), "status": status,
+                 "headers": {k: v for k, v in headers.items() if k.lower() not in DROP_HEADERS}, "file": name}
+        with self._lock:
+            self.http.append(entry)
+
+    def match_http(self, method: str, url: str) -> dict:
+        url = self._unshift(httpclient.redact(url))
+        with self._lock:
+            exact = [i for i, e in enumerate(self.http) if e["method"] == method and e["url"] == url]
+            # Fall back to the same endpoint with the same parameter names
+            # (cursors, timestamps and other values may differ).
+            loose = [i for i, e in enumerate(self.http) if e["method"] == method and _shape(e["url"]) == _shape(url)]
+            for candidates in (exact, loose):
+                fresh = [i for i in candidates if ("http", i) not in self._used]
+                if fresh:
+                    self._used.add(("http", fresh[0]))
+                    return self.http[fresh[0]]
+            if exact:
+                return self.http[exact[-1]]
+        raise ReplayMiss(f"no recording for {method} {url}")
+
+    def body(self, entry: dict) -> bytes:
+        return (self.root / "http" / entry["file"]).read_bytes()
+
+    def _unshift(self, url: str) -> str:
+        offset = (date.today() - date.fromisoformat(self.recorded_on)).days
+        if not offset:
+            return url
+
+        def back(match: re.Match) -> str:
+            try:
+                return (date.fromisoformat(match.group(0)) - timedelta(days=offset)).isoformat()
+            except ValueError:
+                return match.group(0)
+
+        return ISO_DATE_RE.sub(back, url)
+
+    # -- Commands -----------------------------------------------------------
+
+    def record_command(self, argv: list[str], returncode: int, stdout: str, stderr: str) -> None:
+        if argv[:2] == ["security", "find-generic-password"] and returncode == 0:
+            stdout = REDACTED + "\n"
+        with self._lock:
+            self.commands.append({"argv": argv, "returncode": returncode, "stdout": stdout, "stderr": stderr})
+
+    def match_command(self, argv: list[str]) -> dict:
+        with self._lock:
+            matches = [i for i, e in enumerate(self.commands) if e["argv"] == argv]
+            fresh = [i for i in matches if ("cmd", i) not in self._used]
+            if fresh:
+                self._used.add(("cmd", fresh[0]))
+                return self.commands[fresh[0]]
+            if matches:
+                return self.commands[matches[-1]]
+        raise ReplayMiss(f"no recording for command {' '.join(argv)}")
+
+
+def _shape(url: str) -> tuple:
+    parts = urllib.parse.urlsplit(url)
+    names = sorted({name for name, _value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)})
+    return parts.scheme, parts.netloc, parts.path, tuple(names)
+
+
+def _argv_key(cmd) -> list[str]:
+    argv = [str(arg) for arg in cmd]
+    argv[0] = Path(argv[0]).name
+    key = []
+    for i, arg in enumerate(argv):
+        if argv[0] == "security" and i and argv[i - 1] == "-w":
+            arg = REDACTED
+        key.append(arg.replace(str(ROOT), "<root>"))
+    return key
+
+
+# ---------------------------------------------------------------------------
+# Transports
+# ---------------------------------------------------------------------------
+
+class RecordingTransport:
+    def __init__(self, inner, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    def send(self, method, url, headers, body, timeout, max_bytes=None, on_chunk=None):
+        extra = {"on_chunk": on_chunk} if on_chunk else {}
+        status, resp_headers, data = self.inner.send(method, url, headers, body, timeout, max_bytes, **extra)
+        self.cassette.record_http(method, url, status, resp_headers, data)
+        return status, resp_headers, data
+
+
+class ReplayTransport:
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+
+    def send(self, method, url, headers, body, timeout, max_bytes=None, on_chunk=None):
+        entry = self.cassette.match_http(method, url)
+        data = b"" if method == "HEAD" else self.cassette.body(entry)
+        if on_chunk:
+            # Streamed bodies were recorded as far as the live run read them.
+            for start in range(0, len(data), httpclient.STREAM_CHUNK):
+                if on_chunk(entry["status"], entry["headers"], data[start:start + httpclient.STREAM_CHUNK]):
+                    data = data[:start + httpclient.STREAM_CHUNK]
+                    break
+        return entry["status"], dict(entry["headers"]), data[:max_bytes] if max_bytes else data
+
+
+# ---------------------------------------------------------------------------
+# Activation
+# ---------------------------------------------------------------------------
+
+_cassette: Cassette | None = None
+_installed = False
+_lock = threading.Lock()
+
+
+def cassette() -> Cassette | None:
+    """The cassette selected by ZONTED_METRICS_RECORD / _REPLAY, or None when live."""
+    global _cassette
+    with _lock:
+        if _cassette is None:
+            if os.environ.get(REPLAY_ENV):
+                _cassette = Cassette(Path(os.environ[REPLAY_ENV]), "replay")
+            elif os.environ.get(RECORD_ENV):
+                _cassette = Cassette(Path(os.environ[RECORD_ENV]), "record")
+                atexit.register(_cassette.save)
+        return _cassette
+
+
+def mode() -> str:
+    active = cassette()
+    return active.mode if active else "live"
+
+
+def install(workspace: Path | None = None, snapshot: tuple[str, ...] = ()) -> str:
+    """Point httpclient at the cassette and sync workspace state files; returns the mode.
+
+    `snapshot` lists workspace-relative files the run reads (state, logs). On
+    record they're copied into the cassette before the run changes them; on
+    replay they seed `workspace` where it doesn't have them yet.
+    """
+    global _installed
+    active = cassette()
+    if active is None:
+        return "live"
+    with _lock:
+        if not _installed:
+            # A scratch validator cache: recorded requests are never conditional.
+            cache_dir = Path(tempfile.mkdtemp(prefix="zonted-replay-cache-"))
+            inner = httpclient.Pool() if active.mode == "record" else None
+            transport = RecordingTransport(inner, active) if inner else ReplayTransport(active)
+            httpclient.set_client(httpclient.Client(cache_dir=cache_dir, transport=transport))
+            _installed = True
+    if workspace is not None:
+        for rel in snapshot:
+            kept = active.root / "workspace" / rel
+            live = Path(workspace) / rel
+            src, dest = (live, kept) if active.mode == "record" else (kept, live)
+            if src.exists() and not dest.exists():
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(src, dest)
+    return active.mode
+
+
+def which(name: str, path: str | None = None) -> str | None:
+    """shutil.which, except that every binary "exists" during replay."""
+    if mode() == "replay":
+        return name
+    return shutil.which(name, path=path)
+
+
+def run_command(cmd, *, check: bool = False, text: bool = False, **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run, recorded or replayed according to the active cassette."""
+    active = cassette()
+    if active is None:
+        return subprocess.run(cmd, check=check, text=text, **kwargs)
+    argv = _argv_key(cmd)
+    if active.mode == "record":
+        proc = subprocess.run(cmd, check=False, text=text, **kwargs)
+        out, err = proc.stdout, proc.stderr
+        active.record_command(argv, proc.returncode,
+                              out.decode("utf-8", "replace") if isinstance(out, bytes) else out or "",
+                              err.decode("utf-8", "replace") if isinstance(err, bytes) else err or "")
+    else:
+        entry = active.match_command(argv)
+        out, err = entry["stdout"], entry["stderr"]
+        if not text:
+            out, err = out.encode("utf-8"), err.encode("utf-8")
+        proc = subprocess.CompletedProcess(list(cmd), entry["returncode"], out, err)
+    if check and proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, proc.stdout, proc.stderr)
+    return proc
@@ -0,0 +1,159 @@
+"""VeracityAPI revenue from Stripe, synced incrementally into a local store.
+
+Charges and balance transactions are kept in STRIPE_SYNC_PATH keyed by id,
+with a `created` watermark per list. A sync pages only objects created since
+watermark - STRIPE_SYNC_OVERLAP, so a nightly run costs a page or two;
+refunds and late captures inside the overlap replace their stored copy.
+fetch_stripe_usage_revenue() computes the 30-day and lifetime totals from
+the store.
+"""
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import httpclient
+from metricslib import secrets
+from metricslib.runtime import STATE_DIR
+
+STRIPE_SYNC_PATH = STATE_DIR / "zonted-stripe-sync.json"
+# Re-fetch this far behind the watermark so refunds / captures that land
+# after the nightly sync still update the stored object.
+STRIPE_SYNC_OVERLAP = timedelta(days=7)
+# Only the fields fetch_stripe_usage_revenue reads are kept in the local store.
+STRIPE_SYNC_FIELDS = {
+    "charges": ("id", "created", "status", "paid", "refunded", "currency", "amount", "amount_captured", "amount_refunded"),
+    "balance_transactions": ("id", "created", "reporting_category", "currency", "net", "fee"),
+}
+STRIPE_KEYCHAIN_SERVICE = "veracityapi-stripe-readonly-key"
+STRIPE_KEY_ENV = "STRIPE_VERACITYAPI_READONLY_KEY"
+STRIPE_API_VERSION = "2025-10-29.clover"
+
+
+def stripe_get(path: str, params: dict[str, object] | None = None) -> dict:
+    # Resolved once per run (secrets memoizes), not once per stripe_list page.
+    key = secrets.get(STRIPE_KEYCHAIN_SERVICE, env=STRIPE_KEY_ENV)
+    if not key:
+        raise RuntimeError(f"Missing Stripe key: set {STRIPE_KEY_ENV} or secret {STRIPE_KEYCHAIN_SERVICE}")
+    return httpclient.get_json(
+        f"https://api.stripe.com/v1/{path.lstrip('/')}",
+        params=params,
+        headers={
+            "Authorization": f"Bearer {key}",
+            "Stripe-Version": STRIPE_API_VERSION,
+        },
+        timeout=30,
+    )
+
+
+def stripe_list(path: str, params: dict[str, object] | None = None) -> list[dict]:
+    rows: list[dict] = []
+    cursor: str | None = None
+    while True:
+        request_params = {**(params or {}), "limit": 100}
+        if cursor:
+            request_params["starting_after"] = cursor
+        payload = stripe_get(path, request_params)
+        batch = payload.get("data") or []
+        rows.extend(batch)
+        if not payload.get("has_more") or not batch:
+            return rows
+        cursor = batch[-1].get("id")
+
+
+def load_stripe_store() -> dict:
+    if STRIPE_SYNC_PATH.exists():
+        return json.loads(STRIPE_SYNC_PATH.read_text())
+    return {"watermarks": {}, **{name: {} for name in STRIPE_SYNC_FIELDS}}
+
+
+def save_stripe_store(store: dict) -> None:
+    STRIPE_SYNC_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STRIPE_SYNC_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(store, separators=(",", ":")))
+    tmp.replace(STRIPE_SYNC_PATH)
+
+
+def sync_stripe(full: bool = False) -> dict:
+    """Bring the local charge / balance-transaction store up to date.
+
+    Objects are keyed by id, so re-fetched rows (from the overlap window)
+    simply replace their stored copy. Each list is fetched with
+    created[gte] = watermark - STRIPE_SYNC_OVERLAP; full=True ignores the
+    watermarks and re-pages the whole history. The store is only written
+    after every list synced, so a failed run never advances a watermark.
+    """
+    store = load_stripe_store()
+    for name, fields in STRIPE_SYNC_FIELDS.items():
+        watermark = store["watermarks"].get(name)
+        params: dict[str, object] = {}
+        if watermark and not full:
+            params["created[gte]"] = int(watermark - STRIPE_SYNC_OVERLAP.total_seconds())
+        rows = store.setdefault(name, {})
+        for obj in stripe_list(name, params):
+            rows[obj["id"]] = {key: obj.get(key) for key in fields}
+        if rows:
+            store["watermarks"][name] = max(int(row.get("created") or 0) for row in rows.values())
+    save_stripe_store(store)
+    return store
+
+
+def fetch_stripe_usage_revenue(full_sync: bool = False) -> dict:
+    """Fetch one-time / usage payments for VeracityAPI.
+
+    VeracityAPI currently charges metered request top-ups rather than Stripe
+    subscriptions, so revenue comes from successful charges/payment intents.
+    Only objects newer than the local store's watermark are fetched; totals
+    (including lifetime) are computed from the store.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=29)
+    cutoff_ts = int(cutoff.timestamp())
+    store = sync_stripe(full=full_sync)
+    charges = list(store["charges"].values())
+    balance_transactions = list(store["balance_transactions"].values())
+
+    successful = [
+        charge
+        for charge in charges
+        if charge.get("status") == "succeeded" and charge.get("paid") and not charge.get("refunded")
+    ]
+    recent = [charge for charge in successful if int(charge.get("created") or 0) >= cutoff_ts]
+    currency_totals: dict[str, float] = defaultdict(float)
+    lifetime_currency_totals: dict[str, float] = defaultdict(float)
+    for charge in successful:
+        currency = (charge.get("currency") or "usd").lower()
+        amount = float((charge.get("amount_captured") or charge.get("amount") or 0) - (charge.get("amount_refunded") or 0))
+        lifetime_currency_totals[currency] += amount
+        if int(charge.get("created") or 0) >= cutoff_ts:
+            currency_totals[currency] += amount
+
+    primary_currency = max(lifetime_currency_totals or {"usd": 0}, key=(lifetime_currency_totals or {"usd": 0}).get)
+    recent_gross = currency_totals.get(primary_currency, 0)
+    lifetime_gross = lifetime_currency_totals.get(primary_currency, 0)
+
+    recent_balance = [
+        txn
+        for txn in balance_transactions
+        if txn.get("reporting_category") == "charge"
+        and (txn.get("currency") or "usd").lower() == primary_currency
+        and int(txn.get("created") or 0) >= cutoff_ts
+    ]
+    recent_net = sum(float(txn.get("net") or 0) for txn in recent_balance)
+    recent_fees = sum(float(txn.get("fee") or 0) for txn in recent_balance)
+
+    return {
+        "key": "veracityapi",
+        "name": "VeracityAPI",
+        "domain": "veracityapi.com",
+        "color": "#336699",
+        "source": "Stripe",
+        "currency": primary_currency,
+        "grossCents30d": round(recent_gross, 2),
+        "netCents30d": round(recent_net, 2),
+        "feesCents30d": round(recent_fees, 2),
+        "lifetimeGrossCents": round(lifetime_gross, 2),
+        "successfulPayments30d": len(recent),
+        "successfulPaymentsLifetime": len(successful),
+        "updatedIso": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+    }
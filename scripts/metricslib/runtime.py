@@ -0,0 +1,72 @@
+"""Process environment and command runner shared by the metrics cron scripts.
+
+Both crons run from the macOS crontab, outside a login shell. ENV pins PATH
+(Homebrew first), HOME and a non-interactive git so yt-dlp, gh, git, openssl
+and `security` behave as they do in a terminal. Commands go through
+metricslib.replay, so a run can be recorded and replayed.
+"""
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import time
+from pathlib import Path
+
+import httpclient
+from metricslib import replay
+
+ROOT = Path(__file__).resolve().parents[2]
+# ZONTED_WORKSPACE relocates state and logs (replays, benchmarks).
+WORKSPACE = Path(os.environ.get("ZONTED_WORKSPACE", "/Users/psy/.openclaw/workspace"))
+STATE_DIR = WORKSPACE / "state"
+METRICS_DB = STATE_DIR / "zonted-metrics.sqlite"
+PATH = "/opt/homebrew/bin:/usr/local/bin:/usr/bin:/bin:/usr/sbin:/sbin"
+USER_HOME = "/Users/psy"
+ENV = {
+    **os.environ,
+    "HOME": os.environ.get("HOME") or USER_HOME,
+    "USER": os.environ.get("USER") or "psy",
+    "LOGNAME": os.environ.get("LOGNAME") or "psy",
+    "PATH": PATH,
+    "GIT_TERMINAL_PROMPT": "0",
+}
+MAX_ERROR_OUTPUT = 4000
+
+
+def redact(text: str) -> str:
+    text = re.sub(r"gh[opsu]_[A-Za-z0-9_]+", "gh*_REDACTED", text or "")
+    text = re.sub(r"(https://)([^/@\s:]+):([^/@\s]+)@", r"\1\2:REDACTED@", text)
+    return text
+
+
+def which(name: str) -> str | None:
+    return replay.which(name, path=PATH)
+
+
+def run(cmd: list[str], *, cwd: Path = ROOT, check: bool = True, capture: bool = True, timeout: float | None = None) -> subprocess.CompletedProcess:
+    # Inside a sources.Registry fetch, a command can't outlive the fetch's deadline.
+    proc = replay.run_command(cmd, cwd=str(cwd), env=ENV, text=True, capture_output=capture, check=False,
+                              timeout=httpclient.remaining(timeout))
+    if check and proc.returncode:
+        parts = [f"Command {cmd!r} returned non-zero exit status {proc.returncode}."]
+        if proc.stdout:
+            parts.append("stdout:\n" + redact(proc.stdout[-MAX_ERROR_OUTPUT:].strip()))
+        if proc.stderr:
+            parts.append("stderr:\n" + redact(proc.stderr[-MAX_ERROR_OUTPUT:].strip()))
+        raise RuntimeError("\n".join(parts))
+    return proc
+
+
+def run_with_retry(cmd: list[str], *, attempts: int = 2, delay: int = 10, **kwargs) -> subprocess.CompletedProcess:
+    last_error: Exception | None = None
+    for attempt in range(1, attempts + 1):
+        try:
+            return run(cmd, **kwargs)
+        except Exception as exc:
+            last_error = exc
+            if attempt == attempts:
+                break
+            time.sleep(delay)
+    assert last_error is not None
+    raise last_error
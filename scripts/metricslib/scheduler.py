@@ -0,0 +1,201 @@
+"""Refresh jobs with cadences, folded into one render per cycle.
+
+update-metrics-cron.py is the only scheduled entry point. It registers each
+section of the metrics page as a Job (the GA4 / Search Console / revenue
+portfolio, the social snapshot) with the cadence it should refresh at, and
+every invocation is one cycle:
+
+  1. pick the jobs that are due (last success older than their cadence)
+  2. run `git pull`, then every due job's fetch concurrently — after the
+     pull, so a fetch that reads the page model or checkout sees the pulled
+     files, not ones the rebase is rewriting
+  3. load the page model once, let each finished job apply its result,
+     render once
+  4. commit and push at most once (the caller does that)
+
+so a cycle that refreshes three sections still costs one Cloudflare Pages
+deploy. A cycle whose model differs from the one on disk — the published
+one, after the pull — only in refresh stamps (page.semantic) doesn't write
+the page at all, so nothing is committed or deployed; the stamps are
+brought forward once they are STAMP_MAX_AGE old. A job that fails keeps its section as it was and stays due, so the
+next cycle retries it. Job success times live in STATE_PATH.
+
+Deploy verification doesn't hold the cycle: start_deploy_check() spawns a
+detached `update-metrics-cron.py --check-deploy <sha>` that polls GitHub
+Actions and records the outcome in DEPLOY_PATH, where the next cycle's
+report picks it up.
+"""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+
+from metricslib import page, replay, runtime, sources, telemetry
+
+STATE_PATH = runtime.STATE_DIR / "zonted-metrics-schedule.json"
+DEPLOY_PATH = runtime.STATE_DIR / "zonted-metrics-deploy.json"
+# Cron fires on the hour; a job that ran a few minutes late last time is still due.
+GRACE = timedelta(minutes=15)
+# Timestamp-only changes are held back until the published "Updated" badge is this old.
+STAMP_MAX_AGE = timedelta(days=7)
+DEPLOY_WAIT = 300
+DEPLOY_POLL = 10
+
+
+@dataclass
+class Job:
+    name: str
+    cadence: timedelta
+    fetch: Callable[[], object]  # runs after the pull, concurrently with the other jobs
+    apply: Callable[[dict, object], None]  # merges the fetch result into the page model
+    timeout: float = sources.DEFAULT_TIMEOUT
+
+
+@dataclass
+class Cycle:
+    ran: list[str]  # jobs applied to the model
+    failed: dict[str, BaseException]
+    results: dict[str, object]
+    written: bool = False  # False also when only refresh stamps changed
+
+
+def load_state() -> dict[str, dict]:
+    try:
+        state = json.loads(STATE_PATH.read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def save_state(state: dict[str, dict]) -> None:
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_PATH.with_name(f"{STATE_PATH.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(state, indent=1, sort_keys=True))
+    os.replace(tmp, STATE_PATH)
+
+
+def due(jobs: list[Job], now: datetime, state: dict[str, dict]) -> list[Job]:
+    selected = []
+    for job in jobs:
+        last = (state.get(job.name) or {}).get("lastSuccess")
+        if not last or now - datetime.fromisoformat(last) >= job.cadence - GRACE:
+            selected.append(job)
+    return selected
+
+
+def run_cycle(selected: list[Job], *, pull: Callable[[], object] | None = None, pull_timeout: float = 120,
+              now: datetime | None = None) -> Cycle:
+    """Pull, run `selected` (usually due(...)) concurrently and render the page once.
+
+    Raises when the pull fails: nothing is fetched or rendered over a stale
+    checkout.
+    """
+    now = now or datetime.now()
+    if pull is not None:
+        pulled = sources.Registry(group="cycle")
+        pulled.register("git-pull", pull, timeout=pull_timeout, cache=False)
+        result = pulled.run()["git-pull"]
+        if not result.ok:
+            raise result.error
+    registry = sources.Registry(group="cycle")
+    for job in selected:
+        registry.register(job.name, job.fetch, timeout=job.timeout, cache=False)
+    results = registry.run()
+
+    cycle = Cycle([], {}, {})
+    model = page.load_model()
+    published = page.semantic(model)
+    published_at = page.updated_at(model)
+    for job in selected:
+        result = results[job.name]
+        if result.ok:
+            try:
+                job.apply(model, result.value)
+            except Exception as exc:
+                cycle.failed[job.name] = exc
+                continue
+            cycle.ran.append(job.name)
+            cycle.results[job.name] = result.value
+        else:
+            cycle.failed[job.name] = result.error
+    for name, exc in cycle.failed.items():
+        print(f"warning: {name} job failed, section unchanged: {type(exc).__name__}: {exc}", file=sys.stderr)
+    if not cycle.ran:
+        return cycle
+    stamp_due = published_at is None or datetime.utcnow() - published_at >= STAMP_MAX_AGE
+    if page.semantic(model) != published or stamp_due:
+        with telemetry.stage("render", jobs=",".join(cycle.ran)):
+            page.write_page(model)
+        cycle.written = True
+    else:
+        print("No data changes since the published page (refresh stamps only); not re-rendering", file=sys.stderr)
+    state = load_state()
+    for name in cycle.ran:
+        state[name] = {"lastSuccess": now.isoformat(timespec="seconds")}
+    save_state(state)
+    return cycle
+
+
+# ---------------------------------------------------------------------------
+# Deploy verification
+# ---------------------------------------------------------------------------
+
+def deploy_status(head: str, wait: float = DEPLOY_WAIT) -> str:
+    """Poll GitHub Actions for the run building `head`; a one-line status."""
+    gh = runtime.which("gh")
+    if not gh:
+        return "deploy status unknown: gh not found"
+    deadline = time.time() + wait
+    last = "deploy status unknown"
+    while time.time() < deadline:
+        proc = runtime.run(
+            [gh, "run", "list", "--limit", "5", "--json", "headSha,status,conclusion,workflowName,url"],
+            check=False,
+        )
+        if proc.returncode == 0:
+            try:
+                runs = json.loads(proc.stdout)
+                match = next((r for r in runs if r.get("headSha", "").startswith(head)), None)
+                if match:
+                    status = match.get("status")
+                    conclusion = match.get("conclusion")
+                    if status == "completed":
+                        return f"deploy {conclusion or 'completed'}"
+                    last = f"deploy {status}"
+            except Exception as exc:
+                last = f"deploy status parse failed: {exc}"
+        time.sleep(DEPLOY_POLL)
+    return last
+
+
+def record_deploy(head: str, status: str) -> None:
+    DEPLOY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    DEPLOY_PATH.write_text(json.dumps({"commit": head, "status": status, "checkedAt": int(time.time())}, indent=2))
+
+
+def last_deploy() -> dict | None:
+    try:
+        return json.loads(DEPLOY_PATH.read_text())
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def start_deploy_check(script: str, head: str, log_path, extra_args: tuple[str, ...] = ()) -> str:
+    """Spawn `script --check-deploy head` detached; returns the status line for the report."""
+    if replay.mode() != "live":
+        # The checker would run outside the cassette.
+        return "deploy check skipped (replay)"
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "a") as log:
+        subprocess.Popen(
+            [sys.executable, script, "--check-deploy", head, *extra_args],
+            cwd=str(runtime.ROOT), env=runtime.ENV, stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+            start_new_session=True,
+        )
+    return "deploy check running in background"
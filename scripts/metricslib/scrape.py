@@ -0,0 +1,80 @@
+"""Streaming scrapes of public profile pages.
+
+Profile pages (TikTok today) embed their counters as `"followerCount":123`
+in a rehydration blob near the top of several hundred KB of HTML. counts()
+streams the page through httpclient.stream(), runs one combined pattern over
+each chunk and stops reading as soon as every wanted field has turned up, so
+the rest of the page is never downloaded or decoded.
+
+A fetch that runs past its budget raises ScanTimeout; callers registered
+with metricslib.sources then fall back to their last good value.
+"""
+from __future__ import annotations
+
+import re
+import time
+
+import httpclient
+
+# Kept between chunks so a match split across a boundary is still seen.
+OVERLAP = 256
+
+
+class ScanTimeout(RuntimeError):
+    """The page didn't yield every field within the scan budget."""
+
+
+class Scanner:
+    """Feed chunks; collects the first value of each wanted `"field":<value>`."""
+
+    def __init__(self, fields, value: bytes = rb"\d+", deadline: float | None = None):
+        self.fields = tuple(fields)
+        names = b"|".join(re.escape(name.encode()) for name in self.fields)
+        self.pattern = re.compile(rb'"(' + names + rb')":(' + value + rb")")
+        self.deadline = deadline
+        self.found: dict[str, str] = {}
+        self._tail = b""
+
+    @property
+    def done(self) -> bool:
+        return len(self.found) == len(self.fields)
+
+    def feed(self, chunk: bytes) -> bool:
+        """Scan one chunk; True once every field is found (stop reading)."""
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise ScanTimeout(f"scan budget exhausted with {', '.join(self.missing()) or 'nothing'} still missing")
+        buf = self._tail + chunk
+        # A match running to the end of the buffer may continue in the next
+        # chunk ("…":12 | 345); leave it for then.
+        self._collect(buf, len(buf) - 1)
+        self._tail = buf[-OVERLAP:]
+        return self.done
+
+    def finish(self) -> None:
+        """Accept matches at the very end of the body."""
+        self._collect(self._tail, len(self._tail))
+        self._tail = b""
+
+    def missing(self) -> list[str]:
+        return [name for name in self.fields if name not in self.found]
+
+    def _collect(self, buf: bytes, limit: int) -> None:
+        for match in self.pattern.finditer(buf):
+            if match.end() > limit:
+                break
+            self.found.setdefault(match.group(1).decode(), match.group(2).decode())
+
+
+def counts(url: str, fields, *, headers: dict[str, str] | None = None, timeout: float = 45,
+           budget: float | None = None) -> dict[str, int]:
+    """{field: int} for each `"field":<digits>` on the page at `url`.
+
+    Raises RuntimeError when a field is missing, ScanTimeout past `budget`
+    seconds, httpclient errors on a failed fetch.
+    """
+    scanner = Scanner(fields, deadline=time.monotonic() + budget if budget else None)
+    httpclient.stream(url, scanner.feed, headers=headers, timeout=timeout).raise_for_status()
+    scanner.finish()
+    if not scanner.done:
+        raise RuntimeError(f"could not find {', '.join(scanner.missing())} on {httpclient.redact(url)}")
+    return {name: int(scanner.found[name]) for name in scanner.fields}
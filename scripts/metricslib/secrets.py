@@ -0,0 +1,162 @@
+"""Secret lookup for the metrics cron scripts, resolved once per process.
+
+get(service) asks each backend in turn and memoizes the answer (a miss too),
+so a paginated Stripe sync or the Pinterest refresh reads each secret once
+instead of spawning `security` per call. prefetch() resolves a batch
+concurrently at startup.
+
+Backends, in order (ZONTED_SECRETS=env,file,keychain picks and orders them):
+
+  env        ZONTED_SECRET_<SERVICE> (upper-cased, "-" → "_"); a variable
+             passed as get(..., env=...) overrides all backends
+  file       a JSON object {service: value} at ZONTED_SECRETS_FILE — the
+             stand-in for CI and Linux, where there is no keychain
+  keychain   macOS `security` generic passwords (skipped where `security`
+             isn't installed)
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from metricslib import keychain, runtime
+
+ENV_PREFIX = "ZONTED_SECRET_"
+DEFAULT_BACKENDS = "env,file,keychain"
+
+
+class EnvBackend:
+    name = "env"
+
+    def get(self, service: str) -> str:
+        return os.environ.get(ENV_PREFIX + service.upper().replace("-", "_"), "")
+
+
+class FileBackend:
+    name = "file"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._values: dict[str, str] | None = None
+
+    def get(self, service: str) -> str:
+        if self._values is None:
+            try:
+                self._values = json.loads(self.path.read_text())
+            except (OSError, json.JSONDecodeError) as exc:
+                print(f"⚠️ Secrets file {self.path} unreadable: {exc}", file=sys.stderr)
+                self._values = {}
+        return str(self._values.get(service) or "")
+
+
+class KeychainBackend:
+    name = "keychain"
+
+    def get(self, service: str) -> str:
+        return keychain.secret(service)
+
+    def store(self, service: str, value: str) -> None:
+        keychain.store(service, value)
+
+
+class Provider:
+    def __init__(self, backends: list):
+        self.backends = backends
+        self._memo: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._pending: dict[str, threading.Event] = {}
+
+    def get(self, service: str, env: str | None = None) -> str:
+        """The secret for `service`, or "" when no backend has it.
+
+        `env` names a legacy variable that overrides every backend; it's read
+        on each call, so a prefetch without it can't mask it.
+        """
+        if env and os.environ.get(env):
+            return os.environ[env]
+        with self._lock:
+            if service in self._memo:
+                return self._memo[service]
+            pending = self._pending.get(service)
+            owner = pending is None
+            if owner:
+                pending = self._pending[service] = threading.Event()
+        if not owner:
+            # Another thread (a prefetch) is resolving it; share its answer.
+            pending.wait()
+            return self._memo.get(service, "")
+        try:
+            value = ""
+            for backend in self.backends:
+                value = backend.get(service)
+                if value:
+                    break
+            with self._lock:
+                self._memo[service] = value
+            return value
+        finally:
+            with self._lock:
+                self._pending.pop(service, None)
+            pending.set()
+
+    def prefetch(self, *services: str) -> None:
+        """Resolve several secrets concurrently (each backend lookup may be a subprocess)."""
+        if services:
+            with ThreadPoolExecutor(max_workers=min(len(services), 8)) as pool:
+                list(pool.map(self.get, services))
+
+    def store(self, service: str, value: str) -> None:
+        """Save a rotated secret to the first backend that can write, and remember it."""
+        writer = next((b for b in self.backends if hasattr(b, "store")), None)
+        if writer is None:
+            print(f"⚠️ No writable secret backend; {service} kept for this run only", file=sys.stderr)
+        else:
+            writer.store(service, value)
+        with self._lock:
+            self._memo[service] = value
+
+
+def from_spec(spec: str) -> Provider:
+    backends: list = []
+    for name in (part.strip() for part in spec.split(",")):
+        if name == "env":
+            backends.append(EnvBackend())
+        elif name == "file":
+            path = os.environ.get("ZONTED_SECRETS_FILE")
+            if path:
+                backends.append(FileBackend(Path(path)))
+        elif name == "keychain":
+            if runtime.which("security"):
+                backends.append(KeychainBackend())
+        elif name:
+            raise ValueError(f"unknown secrets backend {name!r} (env, file, keychain)")
+    return Provider(backends)
+
+
+_provider: Provider | None = None
+_provider_lock = threading.Lock()
+
+
+def provider() -> Provider:
+    """The process-wide provider selected by ZONTED_SECRETS."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = from_spec(os.environ.get("ZONTED_SECRETS", DEFAULT_BACKENDS))
+        return _provider
+
+
+def get(service: str, env: str | None = None) -> str:
+    return provider().get(service, env)
+
+
+def prefetch(*services: str) -> None:
+    provider().prefetch(*services)
+
+
+def store(service: str, value: str) -> None:
+    provider().store(service, value)
@@ -0,0 +1,403 @@
+"""Tabiji Social Snapshot: the four platform cards on zonted.com/metrics/.
+
+Uses first-party/public sources where available:
+- Instagram Graph API via secret `instagram-access-token` (metricslib.secrets)
+- YouTube public Shorts page via yt-dlp (metricslib.youtube)
+- TikTok public profile page, streamed until its counters turn up (metricslib.scrape)
+- Pinterest API via secret tokens, refreshed each run
+
+A platform that fails or times out keeps its last good card (metricslib.sources).
+update-metrics-cron.py runs collect() / apply() as the "social" job of its
+scheduler (metricslib.scheduler); update-social-snapshot.py calls refresh()
+for a one-off local render.
+"""
+from __future__ import annotations
+
+import base64
+import datetime as dt
+import json
+import sys
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import httpclient
+from metricslib import scrape, secrets, sources
+from metricslib import youtube as yt
+from metricslib.formatting import compact, fmt
+from metricslib.runtime import METRICS_DB
+from metricslib.store import MetricsStore
+
+SOURCES_CACHE = METRICS_DB.with_name("zonted-social-sources.json")
+REPLAY_SNAPSHOT = ("state/zonted-social-sources.json", "tabiji/functions/publish-log.json")
+# Daily series recorded to the metrics store, by card; other cards only record stats.
+SERIES_METRICS = {"instagram": "reach", "pinterest": "impressions"}
+IG_USER_ID = "17841449394591017"
+IG_TOKEN_SERVICE = "instagram-access-token"
+IG_WINDOW_DAYS = 30  # longest since/until span the insights endpoint accepts
+IG_REACH_OVERLAP = 3  # trailing days of reach re-fetched each run; Graph revises recent days
+IG_CONCURRENCY = 6
+PINTEREST_ACCESS_SERVICE = "pinterest-access-token"
+PINTEREST_REFRESH_SERVICE = "pinterest-refresh-token"
+PINTEREST_APP_ID_SERVICE = "pinterest-app-id"
+PINTEREST_APP_SECRET_SERVICE = "pinterest-app-secret"
+# Resolved together before the platforms start (secrets.prefetch).
+SECRET_SERVICES = (
+    IG_TOKEN_SERVICE, PINTEREST_ACCESS_SERVICE, PINTEREST_REFRESH_SERVICE,
+    PINTEREST_APP_ID_SERVICE, PINTEREST_APP_SECRET_SERVICE,
+)
+TIKTOK_PROFILE_URL = "https://www.tiktok.com/@tabiji1"
+TIKTOK_FIELDS = ("followerCount", "followingCount", "heartCount", "videoCount")
+TIKTOK_BUDGET = 45  # seconds of page reading before falling back to the last good card
+
+# Per-platform deadlines (seconds from the start of the fetch stage).
+SOURCE_DEADLINES = {"instagram": 120, "youtube": 240, "pinterest": 90, "tiktok": 60}
+
+UA = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 Chrome/124 Safari/537.36"
+
+
+def label_for(day: dt.date) -> str:
+    return f"{day.strftime('%b')} {day.day}"
+
+
+def request_json(url: str, *, headers: dict[str, str] | None = None, data: bytes | None = None) -> dict:
+    # GETs revalidate against the on-disk cache: unchanged Graph/Pinterest
+    # responses come back as a 304.
+    resp = httpclient.request("POST" if data is not None else "GET", url, headers=headers, data=data,
+                              timeout=45, cache=data is None)
+    if resp.status >= 400:
+        body = httpclient.redact(resp.text()[:600])
+        raise RuntimeError(f"HTTP {resp.status}: {body}")
+    return resp.json()
+
+
+def insight_windows(start: dt.date, end: dt.date, size: int = IG_WINDOW_DAYS) -> list[tuple[dt.date, dt.date]]:
+    """[start, end) split into the since/until windows the insights endpoint accepts."""
+    windows = []
+    cur = start
+    while cur < end:
+        nxt = min(cur + dt.timedelta(days=size), end)
+        windows.append((cur, nxt))
+        cur = nxt
+    return windows
+
+
+def stored_instagram_reach(start: dt.date, end: dt.date) -> dict[dt.date, int]:
+    """Daily reach already in the metrics store (recorded by earlier runs)."""
+    try:
+        store = MetricsStore(METRICS_DB)
+    except Exception as exc:
+        print(f"warning: Instagram reach history unavailable ({exc})", file=sys.stderr)
+        return {}
+    try:
+        stored = store.series("social", "instagram", "reach", start.isoformat(), end.isoformat())
+    finally:
+        store.close()
+    return {dt.date.fromisoformat(day): int(value) for day, value in stored.items()}
+
+
+def fetch_instagram() -> dict:
+    token = secrets.get(IG_TOKEN_SERVICE)
+    if not token:
+        raise RuntimeError(f"missing secret {IG_TOKEN_SERVICE}")
+
+    base = f"https://graph.facebook.com/v24.0/{IG_USER_ID}"
+
+    def graph(path: str, params: dict[str, object]) -> dict:
+        qs = urllib.parse.urlencode({**params, "access_token": token})
+        return request_json(f"{base}{path}?{qs}")
+
+    today = dt.date.today()
+    start = today - dt.timedelta(days=90)
+    end = today
+
+    # Reach is stored per day, so only days since the last synced one (plus
+    # IG_REACH_OVERLAP for numbers that settle late) are re-fetched. The
+    # 90-day view / interaction totals are window aggregates and can't be
+    # stitched from earlier runs, so those windows are always fetched.
+    reach_by_date = stored_instagram_reach(start, end - dt.timedelta(days=1))
+    reach_from = start
+    if reach_by_date:
+        reach_from = max(start, max(reach_by_date) + dt.timedelta(days=1) - dt.timedelta(days=IG_REACH_OVERLAP))
+
+    def reach(window: tuple[dt.date, dt.date]) -> dict:
+        since, until = window
+        return graph("/insights", {"metric": "reach", "period": "day", "since": since.isoformat(), "until": until.isoformat()})
+
+    def window_totals(window: tuple[dt.date, dt.date]) -> dict:
+        since, until = window
+        return graph(
+            "/insights",
+            {
+                "metric": "views,total_interactions",
+                "period": "day",
+                "metric_type": "total_value",
+                "since": since.isoformat(),
+                "until": until.isoformat(),
+            },
+        )
+
+    with ThreadPoolExecutor(max_workers=IG_CONCURRENCY) as pool:
+        profile_job = pool.submit(httpclient.carry(graph), "", {"fields": "username,followers_count,media_count,name"})
+        reach_jobs = [pool.submit(httpclient.carry(reach), window) for window in insight_windows(reach_from, end)]
+        total_jobs = [pool.submit(httpclient.carry(window_totals), window) for window in insight_windows(start, end)]
+        profile = profile_job.result()
+        reach_payloads = [job.result() for job in reach_jobs]
+        total_payloads = [job.result() for job in total_jobs]
+
+    for payload in reach_payloads:
+        for row in payload.get("data", [{}])[0].get("values", []):
+            day = dt.datetime.strptime(row["end_time"][:10], "%Y-%m-%d").date()
+            reach_by_date[day] = int(row.get("value") or 0)
+    totals = {"views": 0, "total_interactions": 0}
+    for payload in total_payloads:
+        for row in payload.get("data", []):
+            name = row.get("name")
+            if name in totals:
+                totals[name] += int(row.get("total_value", {}).get("value") or 0)
+
+    labels: list[str] = []
+    days: list[str] = []
+    series: list[int] = []
+    for i in range(90):
+        day = start + dt.timedelta(days=i)
+        labels.append(label_for(day))
+        days.append(day.isoformat())
+        series.append(reach_by_date.get(day, 0))
+
+    return {
+        "key": "instagram",
+        "name": "Instagram",
+        "handle": f"@{profile.get('username') or 'tabiji.ai'}",
+        "color": "#c13584",
+        "total": compact(totals["views"]),
+        "label": "views (90d)",
+        "chartType": "line",
+        "chartLabel": "Reach",
+        "labels": labels,
+        "days": days,
+        "series": series,
+        "stats": {
+            "views": totals["views"],
+            "reach": sum(series),
+            "interactions": totals["total_interactions"],
+            "followers": profile.get("followers_count") or 0,
+        },
+        "rows": [
+            {"label": "Followers", "value": fmt(profile.get("followers_count") or 0)},
+            {"label": "Reach", "value": compact(sum(series))},
+            {"label": "Interactions", "value": fmt(totals["total_interactions"])},
+        ],
+    }
+
+
+def fetch_youtube() -> dict:
+    youtube = yt.fetch_metrics()
+    series = youtube.get("timeSeries", {})
+    return {
+        "key": "youtube",
+        "name": "YouTube Shorts",
+        "handle": youtube.get("handle") or "@tabijiai",
+        "color": "#cc0000",
+        "total": fmt(youtube.get("totalViews") or 0),
+        "label": "channel views",
+        "chartType": "line",
+        "chartLabel": "Views by publish date",
+        "labels": series.get("labels") or [],
+        "series": series.get("series") or [],
+        "tension": 0.35,
+        "pointRadius": 0,
+        "chartRange": series.get("range") or "",
+        "stats": {
+            "views": youtube.get("totalViews") or 0,
+            "subscribers": youtube.get("subscribers") or 0,
+            "videos": youtube.get("videos") or 0,
+            "trackedViews": youtube.get("trackedViews") or 0,
+        },
+        "rows": [
+            {"label": "Subscribers", "value": fmt(youtube.get("subscribers") or 0)},
+            {"label": "Videos", "value": fmt(youtube.get("videos") or 0)},
+            {"label": "Tracked views", "value": compact(youtube.get("trackedViews") or 0)},
+        ],
+    }
+
+
+def fetch_tiktok() -> dict:
+    # Streamed: reading stops once the four counters have been seen.
+    values = scrape.counts(
+        TIKTOK_PROFILE_URL, TIKTOK_FIELDS,
+        headers={"User-Agent": UA, "Accept-Language": "en-US,en;q=0.9"}, timeout=45, budget=TIKTOK_BUDGET,
+    )
+    return {
+        "key": "tiktok",
+        "name": "TikTok",
+        "handle": "@tabiji1",
+        "color": "#111111",
+        "total": fmt(values["heartCount"]),
+        "label": "total likes",
+        "chartType": "bar",
+        "chartLabel": "Profile metrics",
+        "labels": ["Followers", "Likes", "Videos"],
+        "series": [values["followerCount"], values["heartCount"], values["videoCount"]],
+        "stats": {
+            "followers": values["followerCount"],
+            "likes": values["heartCount"],
+            "videos": values["videoCount"],
+            "following": values["followingCount"],
+        },
+        "rows": [
+            {"label": "Followers", "value": fmt(values["followerCount"])},
+            {"label": "Videos", "value": fmt(values["videoCount"])},
+            {"label": "Following", "value": fmt(values["followingCount"])},
+        ],
+    }
+
+
+def refresh_pinterest_token() -> None:
+    app_id = secrets.get(PINTEREST_APP_ID_SERVICE)
+    app_secret = secrets.get(PINTEREST_APP_SECRET_SERVICE)
+    refresh = secrets.get(PINTEREST_REFRESH_SERVICE)
+    if not all([app_id, app_secret, refresh]):
+        return
+    body = urllib.parse.urlencode({"grant_type": "refresh_token", "refresh_token": refresh}).encode()
+    auth = base64.b64encode(f"{app_id}:{app_secret}".encode()).decode()
+    payload = request_json(
+        "https://api.pinterest.com/v5/oauth/token",
+        headers={"Authorization": f"Basic {auth}", "Content-Type": "application/x-www-form-urlencoded"},
+        data=body,
+    )
+    if payload.get("access_token"):
+        secrets.store(PINTEREST_ACCESS_SERVICE, payload["access_token"])
+    if payload.get("refresh_token"):
+        secrets.store(PINTEREST_REFRESH_SERVICE, payload["refresh_token"])
+
+
+def fetch_pinterest(existing: dict) -> dict:
+    """Analytics card, merged over the previous one (which carries the monthly-views row)."""
+    refresh_pinterest_token()
+    token = secrets.get(PINTEREST_ACCESS_SERVICE)
+    if not token:
+        raise RuntimeError("missing Pinterest access token")
+    today = dt.date.today()
+    start = today - dt.timedelta(days=90)
+    end = today - dt.timedelta(days=1)
+    params = urllib.parse.urlencode(
+        {
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "metric_types": ["IMPRESSION", "SAVE", "OUTBOUND_CLICK"],
+            "split_field": "NO_SPLIT",
+        },
+        doseq=True,
+    )
+    payload = request_json(
+        f"https://api.pinterest.com/v5/user_account/analytics?{params}",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    # Pinterest response shapes have varied. Support the documented daily_metrics
+    # list while falling back safely if the token/app cannot read analytics.
+    daily = None
+    if isinstance(payload.get("all"), dict):
+        daily = payload["all"].get("daily_metrics")
+    if daily is None:
+        daily = payload.get("daily_metrics")
+    if not isinstance(daily, list):
+        raise RuntimeError("Pinterest analytics response did not include daily metrics")
+    labels: list[str] = []
+    days: list[str] = []
+    series: list[int] = []
+    saves = 0
+    outbound = 0
+    for row in sorted(daily, key=lambda r: r.get("date", "")):
+        day = dt.date.fromisoformat(row.get("date"))
+        metrics = row.get("metrics", row)
+        labels.append(label_for(day))
+        days.append(day.isoformat())
+        series.append(int(metrics.get("IMPRESSION") or metrics.get("impression") or 0))
+        saves += int(metrics.get("SAVE") or metrics.get("save") or 0)
+        outbound += int(metrics.get("OUTBOUND_CLICK") or metrics.get("outbound_click") or 0)
+    card = dict(existing)
+    card.update(
+        {
+            "total": fmt(sum(series)),
+            "labels": labels,
+            "days": days,
+            "series": series,
+            "stats": {"impressions": sum(series), "saves": saves, "outboundClicks": outbound},
+            "rows": [
+                existing.get("rows", [{"label": "Monthly views", "value": "—"}])[0],
+                {"label": "Saves", "value": fmt(saves)},
+                {"label": "Outbound", "value": fmt(outbound)},
+            ],
+        }
+    )
+    return card
+
+
+def record_cards(cards: list[dict]) -> int:
+    """Append tonight's card stats (and daily series where the card has one) to the metrics store."""
+    run_date = dt.date.today().isoformat()
+    store = MetricsStore(METRICS_DB)
+    rows = 0
+    try:
+        for card in cards:
+            rows += store.record_totals(run_date, "social", card["key"], card.get("stats") or {})
+            metric = SERIES_METRICS.get(card["key"])
+            if metric and card.get("days"):
+                rows += store.record_series(run_date, "social", card["key"], metric, card["days"], card.get("series") or [])
+    finally:
+        store.close()
+    return rows
+
+
+def current_cards(model: dict) -> dict[str, dict]:
+    return {card["key"]: card for card in model.get("chartData", {}).get("socialSnapshot", {}).get("cards", [])}
+
+
+def collect(existing_cards: dict[str, dict]) -> list[dict]:
+    """Fetch every platform and record the fresh stats; returns the cards for the page.
+
+    `existing_cards` ({key: card}, from the current page) are the fallback
+    for platforms with no last good value.
+    """
+
+    # The four platforms are independent: fetch them together, each against
+    # its own deadline. A platform that fails keeps its last good card (or,
+    # failing that, the card already on the page) instead of aborting.
+    secrets.prefetch(*SECRET_SERVICES)
+    registry = sources.Registry(SOURCES_CACHE, group="social")
+    registry.register("instagram", fetch_instagram, timeout=SOURCE_DEADLINES["instagram"])
+    registry.register("youtube", fetch_youtube, timeout=SOURCE_DEADLINES["youtube"])
+    registry.register("pinterest", lambda: fetch_pinterest(existing_cards.get("pinterest", {})), timeout=SOURCE_DEADLINES["pinterest"])
+    registry.register("tiktok", fetch_tiktok, timeout=SOURCE_DEADLINES["tiktok"])
+    results = registry.run()
+    cards = []
+    for name, result in results.items():
+        if not result.ok:
+            print(f"warning: {result.describe()}", file=sys.stderr)
+        card = result.value if result.value is not None else existing_cards.get(name)
+        if card:
+            cards.append(card)
+    if not cards:
+        raise RuntimeError("no social platform returned data and no previous snapshot exists")
+    try:
+        # Only fresh cards are history; a fallback card was recorded when fetched.
+        record_cards([result.value for result in results.values() if result.ok])
+    except Exception as exc:
+        # History is a side channel; never block the page refresh on it.
+        print(f"warning: social stats not recorded ({exc})")
+    return cards
+
+
+def apply(model: dict, cards: list[dict]) -> None:
+    model.setdefault("chartData", {})["socialSnapshot"] = {"cards": cards}
+
+
+def refresh(model: dict) -> list[dict]:
+    """collect() and apply() in one go: set model["chartData"]["socialSnapshot"], return the cards."""
+    cards = collect(current_cards(model))
+    apply(model, cards)
+    return cards
+
+
+def summary(cards: list[dict]) -> str:
+    return json.dumps({card["key"]: {"total": card["total"], "rows": card.get("rows", [])} for card in cards}, indent=2)
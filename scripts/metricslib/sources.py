@@ -0,0 +1,189 @@
+"""Concurrent metrics sources with deadlines and last-good fallback.
+
+Each cron script registers its sources — a name, a zero-argument fetch
+returning a JSON-ready value (the GA4 payload, a social card, Stripe
+revenue), and a timeout — then runs them all at once. Every source gets a
+Result, never an exception:
+
+  fresh     the fetch finished inside its timeout; the value is saved as the
+            source's last good one
+  stale     the fetch raised or timed out; the value is the last good one,
+            with its age, so the page keeps yesterday's card instead of the
+            whole refresh dying
+  missing   failed with nothing to fall back on (first run, max_age passed,
+            or a source registered with cache=False)
+
+Timeouts are measured from the start of the run, so the stage takes as
+long as its slowest source. Each fetch runs with its deadline in
+httpclient.DEADLINE (the earlier of its own and any enclosing fetch's), so
+its HTTP requests and runtime.run commands are cut off there instead of
+carrying on after the source was given up on. run() then waits up to
+LATE_GRACE for a timed-out fetch to unwind, so nothing it writes (the
+store, state files) lands after the stage has moved on. Fetches run on
+daemon threads, so one stuck outside any I/O still can't hold the process
+open.
+"""
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import httpclient
+from metricslib import telemetry
+
+DEFAULT_TIMEOUT = 300.0
+LATE_GRACE = 10.0  # seconds a timed-out fetch gets to unwind before run() returns
+
+
+@dataclass
+class Source:
+    name: str
+    fetch: Callable[[], object]
+    timeout: float = DEFAULT_TIMEOUT
+    cache: bool = True  # keep the last good value to fall back on
+    max_age: float | None = None  # seconds; an older last-good value counts as missing
+
+
+@dataclass
+class Result:
+    name: str
+    value: object = None
+    error: BaseException | None = None
+    fetched_at: float | None = None  # epoch seconds the value was fetched
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def stale(self) -> bool:
+        return self.error is not None and self.fetched_at is not None
+
+    @property
+    def missing(self) -> bool:
+        return self.error is not None and self.fetched_at is None
+
+    @property
+    def age(self) -> float:
+        return max(time.time() - self.fetched_at, 0.0) if self.fetched_at else 0.0
+
+    def describe(self) -> str:
+        """One line for logs / Slack: 'tiktok: stale (2d old) — TimeoutError: …'."""
+        if self.ok:
+            return f"{self.name}: ok in {self.elapsed:.1f}s"
+        reason = f"{type(self.error).__name__}: {self.error}"
+        if self.stale:
+            return f"{self.name}: using last good value ({format_age(self.age)} old) — {reason}"
+        return f"{self.name}: unavailable — {reason}"
+
+
+def format_age(seconds: float) -> str:
+    if seconds < 3600:
+        return f"{max(int(seconds // 60), 1)}m"
+    if seconds < 2 * 86400:
+        return f"{seconds / 3600:.0f}h"
+    return f"{seconds / 86400:.0f}d"
+
+
+class Registry:
+    """Sources for one cron run, with their last good values in `cache_path` (JSON).
+
+    Every Result is also a telemetry fetch record, tagged with `group`, and
+    each fetch's HTTP requests carry httpclient.SOURCE "<group>/<name>".
+    """
+
+    def __init__(self, cache_path: Path | None = None, group: str = ""):
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.group = group
+        self.sources: dict[str, Source] = {}
+
+    def register(self, name: str, fetch: Callable[[], object], *, timeout: float = DEFAULT_TIMEOUT,
+                 cache: bool = True, max_age: float | None = None) -> Source:
+        source = Source(name, fetch, timeout, cache, max_age)
+        self.sources[name] = source
+        return source
+
+    def load_last_good(self) -> dict[str, dict]:
+        if not self.cache_path or not self.cache_path.exists():
+            return {}
+        try:
+            data = json.loads(self.cache_path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save_last_good(self, entries: dict[str, dict]) -> None:
+        if not self.cache_path:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(entries, indent=1, sort_keys=True))
+        os.replace(tmp, self.cache_path)
+
+    def run(self) -> dict[str, Result]:
+        """Fetch every registered source concurrently; {name: Result} in registration order."""
+        started = time.time()
+        started_mono = time.monotonic()
+        enclosing = httpclient.DEADLINE.get()
+        slots: dict[str, dict] = {}
+        threads: dict[str, threading.Thread] = {}
+        for name, source in self.sources.items():
+            slot = slots[name] = {}
+            deadline = started_mono + source.timeout
+            context = contextvars.copy_context()
+            context.run(httpclient.SOURCE.set, f"{self.group}/{name}" if self.group else name)
+            context.run(httpclient.DEADLINE.set, deadline if enclosing is None else min(deadline, enclosing))
+            thread = threading.Thread(target=context.run, args=(_call, source.fetch, slot), name=f"source-{name}",
+                                      daemon=True)
+            thread.start()
+            threads[name] = thread
+
+        last_good = self.load_last_good()
+        results: dict[str, Result] = {}
+        for name, source in self.sources.items():
+            threads[name].join(max(source.timeout - (time.time() - started), 0))
+            slot = slots[name]
+            if "value" in slot:
+                results[name] = Result(name, slot["value"], None, slot["finished"], slot["finished"] - started)
+                if source.cache:
+                    try:
+                        json.dumps(slot["value"])
+                    except (TypeError, ValueError):
+                        continue
+                    last_good[name] = {"value": slot["value"], "fetchedAt": slot["finished"]}
+                continue
+            error = slot.get("error") or TimeoutError(f"{name} did not finish within {source.timeout:g}s")
+            result = Result(name, None, error, None, time.time() - started)
+            entry = last_good.get(name) if source.cache else None
+            if entry and (source.max_age is None or time.time() - entry["fetchedAt"] <= source.max_age):
+                result.value, result.fetched_at = entry["value"], entry["fetchedAt"]
+            results[name] = result
+        late = [name for name, thread in threads.items() if thread.is_alive()]
+        grace_ends = time.monotonic() + LATE_GRACE
+        for name in late:
+            threads[name].join(max(grace_ends - time.monotonic(), 0))
+            if threads[name].is_alive():
+                print(f"warning: {name} is still running after its deadline; abandoned", file=sys.stderr)
+        if any(source.cache for source in self.sources.values()):
+            self.save_last_good(last_good)
+        for result in results.values():
+            telemetry.record_source(result, self.group)
+        return results
+
+
+def _call(fetch: Callable[[], object], slot: dict) -> None:
+    try:
+        value = fetch()
+    except BaseException as exc:  # surfaced on the Result, never raised in the thread
+        slot["error"] = exc
+        return
+    slot["finished"] = time.time()
+    slot["value"] = value
@@ -0,0 +1,74 @@
+"""Static inline-SVG sparklines for the metrics cards.
+
+Drawn at cron time so the page shows every trend without any JavaScript.
+The viewBox is fixed and stretched to the card with
+preserveAspectRatio="none"; strokes use vector-effect="non-scaling-stroke"
+so they stay crisp at any card width. Each series is scaled to its own peak
+(GSC impressions and clicks share a card the way Chart.js drew them on two
+y axes). Long series are LTTB-decimated to POINTS first.
+"""
+from __future__ import annotations
+
+from metricslib.downsample import decimate
+from metricslib.formatting import esc, fmt
+
+WIDTH = 300
+HEIGHT = 96
+PAD = 3
+POINTS = 40
+FILL_OPACITY = 0.09
+
+
+def _y(value: float, peak: float) -> float:
+    return HEIGHT - PAD - (value / peak if peak else 0) * (HEIGHT - 2 * PAD)
+
+
+def _svg(body: str, label: str) -> str:
+    return (f'<svg class="sparkline" viewBox="0 0 {WIDTH} {HEIGHT}" preserveAspectRatio="none" '
+            f'role="img" aria-label="{esc(label)}">{body}</svg>')
+
+
+def describe(name: str, labels: list, values: list[float]) -> str:
+    """Accessible summary: peak (with its label) and latest value."""
+    if not values:
+        return f"{name}: no data yet"
+    peak = max(range(len(values)), key=values.__getitem__)
+    when = f" on {labels[peak]}" if peak < len(labels) else ""
+    return f"{name}: peak {fmt(values[peak])}{when}, latest {fmt(values[-1])}"
+
+
+def line(labels: list, series: list[dict], label: str) -> str:
+    """series: [{"values": [...], "color": "#hex", "fill": bool}, …], drawn in order."""
+    aligned = {str(i): s["values"] for i, s in enumerate(series)}
+    _labels, decimated = decimate(labels, aligned, POINTS)
+    body: list[str] = []
+    for i, s in enumerate(series):
+        values = [float(v or 0) for v in decimated[str(i)]]
+        if len(values) < 2:
+            continue
+        peak = max(values)
+        step = WIDTH / (len(values) - 1)
+        points = " ".join(f"{j * step:.0f},{_y(v, peak):.0f}" for j, v in enumerate(values))
+        if s.get("fill"):
+            body.append(f'<path d="M0,{HEIGHT} L{points.replace(" ", " L")} L{WIDTH},{HEIGHT} Z" '
+                        f'fill="{esc(s["color"])}" fill-opacity="{FILL_OPACITY}" stroke="none"/>')
+        body.append(f'<polyline points="{points}" fill="none" stroke="{esc(s["color"])}" stroke-width="2" '
+                    f'stroke-linejoin="round" vector-effect="non-scaling-stroke"/>')
+    return _svg("".join(body), label)
+
+
+def bars(labels: list, values: list[float], color: str, label: str) -> str:
+    """One bar per value, scaled to the largest (no axis text; the label carries the numbers)."""
+    values = [float(v or 0) for v in values]
+    if not values:
+        return _svg("", label)
+    peak = max(values)
+    slot = WIDTH / len(values)
+    width = slot * 0.6
+    body = []
+    for i, value in enumerate(values):
+        top = min(_y(value, peak), HEIGHT - PAD - 1)
+        body.append(f'<rect x="{i * slot + (slot - width) / 2:.1f}" y="{top:.1f}" width="{width:.1f}" '
+                    f'height="{HEIGHT - PAD - top:.1f}" rx="3" fill="{esc(color)}" fill-opacity="0.35" '
+                    f'stroke="{esc(color)}" vector-effect="non-scaling-stroke"/>')
+    return _svg("".join(body), label)
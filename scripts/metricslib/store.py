@@ -0,0 +1,231 @@
+"""Append-only SQLite store for nightly metrics snapshots.
+
+Every nightly run records what it fetched — GA4 sessions, Search Console
+clicks/impressions, revenue, social stats — as rows of
+
+    (run_date, source, property, metric, dimension, day, value)
+
+`day` is the calendar day a daily-series value describes; it is empty for
+snapshot totals (e.g. "90-day sessions as of tonight"). Rows are
+never updated across nights: re-running the same night replaces that night's
+rows, and queries resolve each day to the value from the latest run that
+reported it. That keeps full history for audits while letting a fetcher
+report only recent days and still get a complete 90-day chart.
+
+Per-video view counts are ordinary points (source = platform, metric
+VIDEO_VIEWS, property = video id, day = the night they were read). The
+videos table keeps each video's publish date, resolved once and never again.
+
+Rollups and matrices are computed with NumPy, imported lazily so scripts
+that only write to the store don't pay for it.
+"""
+from __future__ import annotations
+
+import sqlite3
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    run_date    TEXT    NOT NULL,
+    source      TEXT    NOT NULL,
+    property    TEXT    NOT NULL,
+    metric      TEXT    NOT NULL,
+    dimension   TEXT    NOT NULL DEFAULT '',
+    day         TEXT    NOT NULL,
+    value       REAL    NOT NULL,
+    recorded_at INTEGER NOT NULL,
+    PRIMARY KEY (run_date, source, property, metric, dimension, day)
+);
+CREATE INDEX IF NOT EXISTS points_series ON points (source, metric, property, dimension, day);
+CREATE TABLE IF NOT EXISTS videos (
+    platform    TEXT    NOT NULL,
+    video_id    TEXT    NOT NULL,
+    title       TEXT    NOT NULL DEFAULT '',
+    published   TEXT    NOT NULL DEFAULT '',
+    date_source TEXT    NOT NULL DEFAULT '',
+    first_seen  TEXT    NOT NULL,
+    PRIMARY KEY (platform, video_id)
+);
+"""
+
+ROLLUP_WINDOWS = (7, 28, 90)
+VIDEO_VIEWS = "video_views"
+
+
+def iso_days(start: date, end: date) -> list[str]:
+    """Inclusive list of ISO dates from start to end."""
+    return [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+
+
+class MetricsStore:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # -- writes -------------------------------------------------------------
+
+    def record(self, run_date: str, rows) -> int:
+        """Insert (source, property, metric, dimension, day, value) rows for one night.
+
+        day=None or "" records a snapshot total rather than a daily value.
+        """
+        now = int(time.time())
+        batch = [(run_date, src, prop, metric, dim or "", day or "", float(value or 0), now)
+                 for src, prop, metric, dim, day, value in rows]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO points (run_date, source, property, metric, dimension, day, value, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+        return len(batch)
+
+    def record_series(self, run_date: str, source: str, prop: str, metric: str, days, values, dimension: str = "") -> int:
+        return self.record(run_date, ((source, prop, metric, dimension, day, value) for day, value in zip(days, values)))
+
+    def record_totals(self, run_date: str, source: str, prop: str, totals: dict, dimension: str = "") -> int:
+        return self.record(run_date, ((source, prop, metric, dimension, "", value)
+                                      for metric, value in totals.items() if isinstance(value, (int, float))))
+
+    def record_videos(self, run_date: str, platform: str, videos: dict[str, tuple[str, int]]) -> int:
+        """Record tonight's {video_id: (title, views)}; new ids join the videos table undated."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO videos (platform, video_id, title, first_seen) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (platform, video_id) DO UPDATE SET title = excluded.title",
+                [(platform, video_id, title, run_date) for video_id, (title, _views) in videos.items()],
+            )
+        return self.record(run_date, ((platform, video_id, VIDEO_VIEWS, "", run_date, views)
+                                      for video_id, (_title, views) in videos.items()))
+
+    def set_published(self, platform: str, dates: dict[str, str], date_source: str) -> int:
+        """Fill in publish dates for videos that don't have one yet; a stored date is kept."""
+        with self.conn:
+            cursor = self.conn.executemany(
+                "UPDATE videos SET published = ?, date_source = ? "
+                "WHERE platform = ? AND video_id = ? AND published = ''",
+                [(day, date_source, platform, video_id) for video_id, day in dates.items() if day],
+            )
+        return cursor.rowcount
+
+    # -- reads --------------------------------------------------------------
+
+    def video_dates(self, platform: str) -> dict[str, str]:
+        """{video_id: publish day}, "" where the date is still unknown."""
+        rows = self.conn.execute("SELECT video_id, published FROM videos WHERE platform = ?", (platform,))
+        return dict(rows.fetchall())
+
+    def video_views(self, platform: str, day: str) -> list[tuple[str, str, float]]:
+        """(video_id, publish day, views) for every video read on `day`."""
+        rows = self.conn.execute(
+            "SELECT v.video_id, v.published, p.value, MAX(p.run_date) FROM points p "
+            "JOIN videos v ON v.platform = p.source AND v.video_id = p.property "
+            "WHERE p.source = ? AND p.metric = ? AND p.dimension = '' AND p.day = ? "
+            "GROUP BY v.video_id",
+            (platform, VIDEO_VIEWS, day),
+        )
+        return [(video_id, published, value) for video_id, published, value, _ in rows]
+
+    def runs(self, source: str | None = None) -> list[str]:
+        sql = "SELECT DISTINCT run_date FROM points"
+        args: tuple = ()
+        if source:
+            sql += " WHERE source = ?"
+            args = (source,)
+        return [row[0] for row in self.conn.execute(sql + " ORDER BY run_date", args)]
+
+    def properties(self, source: str, metric: str, dimension: str | None = "") -> list[tuple[str, str]]:
+        """(property, dimension) pairs with data for a source/metric.
+
+        dimension=None returns every dimension; the default "" returns only
+        undimensioned series.
+        """
+        sql = "SELECT DISTINCT property, dimension FROM points WHERE source = ? AND metric = ?"
+        args: tuple = (source, metric)
+        if dimension is not None:
+            sql += " AND dimension = ?"
+            args += (dimension,)
+        return [tuple(row) for row in self.conn.execute(sql + " ORDER BY property, dimension", args)]
+
+    def series(self, source: str, prop: str, metric: str, start: str, end: str, dimension: str = "") -> dict[str, float]:
+        """{day: value} for start..end, each day taken from the latest run that reported it."""
+        rows = self.conn.execute(
+            "SELECT day, value, MAX(run_date) FROM points "
+            "WHERE source = ? AND property = ? AND metric = ? AND dimension = ? AND day BETWEEN ? AND ? "
+            "GROUP BY day ORDER BY day",
+            (source, prop, metric, dimension, start, end),
+        )
+        return {day: value for day, value, _ in rows}
+
+    def snapshot(self, run_date: str, source: str, metric: str, dimension: str = "") -> dict[str, float]:
+        """{property: value} of the totals recorded by one night's run."""
+        rows = self.conn.execute(
+            "SELECT property, value FROM points "
+            "WHERE run_date = ? AND source = ? AND metric = ? AND dimension = ? AND day = ''",
+            (run_date, source, metric, dimension),
+        )
+        return dict(rows.fetchall())
+
+    def previous_run(self, before: str, source: str) -> str | None:
+        row = self.conn.execute(
+            "SELECT MAX(run_date) FROM points WHERE source = ? AND run_date < ?", (source, before)
+        ).fetchone()
+        return row[0] if row else None
+
+    def matrix(self, source: str, metric: str, start: str, end: str, dimension: str | None = ""):
+        """(keys, days, values) with values a float ndarray of shape (len(keys), len(days)).
+
+        keys are (property, dimension) pairs. Missing days are NaN. One query
+        covers every series, so callers can vectorize across properties.
+        """
+        import numpy as np
+
+        days = iso_days(date.fromisoformat(start), date.fromisoformat(end))
+        keys = self.properties(source, metric, dimension)
+        values = np.full((len(keys), len(days)), np.nan)
+        if not keys:
+            return keys, days, values
+        row_of = {key: i for i, key in enumerate(keys)}
+        col_of = {day: j for j, day in enumerate(days)}
+        sql = (
+            "SELECT property, dimension, day, value, MAX(run_date) FROM points "
+            "WHERE source = ? AND metric = ? AND day BETWEEN ? AND ?"
+        )
+        args: tuple = (source, metric, start, end)
+        if dimension is not None:
+            sql += " AND dimension = ?"
+            args += (dimension,)
+        for prop, dim, day, value, _ in self.conn.execute(sql + " GROUP BY property, dimension, day", args):
+            values[row_of[(prop, dim)], col_of[day]] = value
+        return keys, days, values
+
+    def rollups(self, source: str, metric: str, end: str, windows=ROLLUP_WINDOWS) -> dict[str, dict[str, float]]:
+        """Trailing-window sums per property, plus the window before it.
+
+        Returns {property: {"7d": x, "7d_prev": y, "28d": ..., ...}} for the
+        daily series ending at `end`, computed from one cumulative sum over
+        the (properties × days) matrix.
+        """
+        import numpy as np
+
+        span = 2 * max(windows)
+        end_day = date.fromisoformat(end)
+        keys, _days, values = self.matrix(source, metric, (end_day - timedelta(days=span - 1)).isoformat(), end)
+        if not keys:
+            return {}
+        cumulative = np.concatenate([np.zeros((len(keys), 1)), np.nancumsum(values, axis=1)], axis=1)
+        out: dict[str, dict[str, float]] = {prop: {} for prop, _ in keys}
+        for window in windows:
+            current = cumulative[:, span] - cumulative[:, span - window]
+            previous = cumulative[:, span - window] - cumulative[:, span - 2 * window]
+            for i, (prop, _) in enumerate(keys):
+                out[prop][f"{window}d"] = float(current[i])
+                out[prop][f"{window}d_prev"] = float(previous[i])
+        return out
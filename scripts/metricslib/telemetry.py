@@ -0,0 +1,239 @@
+"""Structured run telemetry for the metrics cron scripts.
+
+Each script run is a session; everything it does that's worth timing is a
+stage record:
+
+  run          the whole script: outcome, seconds
+  push-auth    the git push preflight
+  fetch        one source of a sources.Registry (git-pull, ga4, stripe, a
+               social platform, a scheduler job): ok / stale / missing
+  render       page.write_page()
+  commit-push  git add / commit / push
+  deploy-wait  the background --check-deploy poll
+  http         per source and host (the httpclient.SOURCE tag a Registry
+               sets, e.g. "social/instagram"): requests, bytes, retries,
+               cache hits, p50 / max
+
+When the session ends the records are appended to JSONL_PATH as JSON lines,
+one object each:
+
+  {"run": "20261019T030001-4242", "script": "update-metrics-cron",
+   "ts": "2026-10-19T03:00:01", "stage": "fetch", "name": "ga4",
+   "seconds": 41.2, "outcome": "ok", ...}
+
+and the run's numbers are written as a Prometheus textfile
+(zonted-metrics-<script>.prom) to ZONTED_TEXTFILE_DIR, or next to the JSONL,
+for node_exporter's textfile collector. metrics-telemetry.py reports p50 /
+p95 per stage over the JSONL history.
+
+Outside a session (benchmarks, library use) recording is a no-op.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import httpclient
+from metricslib import runtime
+
+JSONL_PATH = runtime.WORKSPACE / "logs" / "zonted-metrics-telemetry.jsonl"
+TEXTFILE_DIR = Path(os.environ.get("ZONTED_TEXTFILE_DIR") or JSONL_PATH.parent)
+PROM_PREFIX = "zonted_metrics"
+
+
+class Session:
+    def __init__(self, script: str):
+        self.script = script
+        self.started = time.time()
+        self.id = datetime.fromtimestamp(self.started).strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}"
+        self.records: list[dict] = []
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, name: str = "", seconds: float = 0.0, outcome: str = "ok", **fields) -> None:
+        entry = {
+            "run": self.id,
+            "script": self.script,
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "stage": stage,
+            "name": name or stage,
+            "seconds": round(seconds, 4),
+            "outcome": outcome,
+            **{k: v for k, v in fields.items() if v is not None},
+        }
+        with self._lock:
+            self.records.append(entry)
+
+    def finish(self, outcome: str, error: BaseException | None = None) -> None:
+        for (source, host), stats in httpclient.client().summary_by_source().items():
+            self.record("http", host, stats["max"], "error" if stats["errors"] else "ok", source=source,
+                        requests=stats["requests"], bytes=stats["bytes"], retries=stats["retries"],
+                        cacheHits=stats["cacheHits"], errors=stats["errors"], p50=round(stats["p50"], 4))
+        self.record("run", self.script, time.time() - self.started, outcome,
+                    error=f"{type(error).__name__}: {error}" if error else None)
+        try:
+            write_jsonl(self.records)
+            write_textfile(self.script, self.records)
+        except OSError as exc:
+            # Telemetry must never fail the run it describes.
+            print(f"warning: telemetry not written ({exc})", file=sys.stderr)
+
+
+_session: Session | None = None
+
+
+@contextmanager
+def session(script: str):
+    """Collect this process's records; written when the block exits, however it exits."""
+    global _session
+    _session = Session(script)
+    try:
+        yield _session
+    except BaseException as exc:
+        outcome = "ok" if isinstance(exc, SystemExit) and not exc.code else "error"
+        _session.finish(outcome, None if outcome == "ok" else exc)
+        raise
+    else:
+        _session.finish("ok")
+    finally:
+        _session = None
+
+
+def record(stage: str, name: str = "", seconds: float = 0.0, outcome: str = "ok", **fields) -> None:
+    if _session is not None:
+        _session.record(stage, name, seconds, outcome, **fields)
+
+
+@contextmanager
+def stage(stage_name: str, name: str = "", **fields):
+    """Time a block as one record; the yielded dict adds fields to it."""
+    extra = dict(fields)
+    started = time.perf_counter()
+    try:
+        yield extra
+    except BaseException as exc:
+        record(stage_name, name, time.perf_counter() - started, "error",
+               error=f"{type(exc).__name__}: {exc}"[:500], **extra)
+        raise
+    record(stage_name, name, time.perf_counter() - started, extra.pop("outcome", "ok"), **extra)
+
+
+def record_source(result, group: str = "") -> None:
+    """One sources.Result as a fetch record."""
+    outcome = "ok" if result.ok else "stale" if result.stale else "missing"
+    error = f"{type(result.error).__name__}: {result.error}"[:500] if result.error else None
+    record("fetch", result.name, result.elapsed, outcome, group=group or None, error=error)
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+def write_jsonl(records: list[dict], path: Path = JSONL_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as handle:
+        handle.write("".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in records))
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+PROM_METRICS = (
+    # (metric, help, value of a record or None to skip it)
+    ("stage_seconds", "Duration of each stage in the last run.", lambda e: e["seconds"]),
+    ("stage_ok", "1 if the stage succeeded with fresh data in the last run.", lambda e: int(e["outcome"] == "ok")),
+    ("http_requests", "HTTP requests per source and host in the last run.", lambda e: e.get("requests")),
+    ("http_bytes", "Response bytes per source and host in the last run.", lambda e: e.get("bytes")),
+    ("http_retries", "Retried attempts per source and host in the last run.", lambda e: e.get("retries")),
+    ("http_cache_hits", "Conditional-cache hits per source and host in the last run.", lambda e: e.get("cacheHits")),
+)
+
+
+def prometheus_lines(script: str, records: list[dict]) -> list[str]:
+    # One sample per label set: a stage recorded twice keeps its last value.
+    latest = {(entry["stage"], entry["name"], entry.get("source", "")): entry for entry in records}
+    lines = []
+    for metric, help_text, value_of in PROM_METRICS:
+        samples = []
+        for (stage_name, name, source), entry in latest.items():
+            value = value_of(entry)
+            if value is None:
+                continue
+            samples.append(f'{PROM_PREFIX}_{metric}{{script="{_label(script)}",stage="{_label(stage_name)}",'
+                           f'name="{_label(name)}",source="{_label(source)}"}} {value}')
+        if samples:
+            lines += [f"# HELP {PROM_PREFIX}_{metric} {help_text}", f"# TYPE {PROM_PREFIX}_{metric} gauge", *samples]
+    lines += [
+        f"# HELP {PROM_PREFIX}_last_run_timestamp_seconds When the script last finished.",
+        f"# TYPE {PROM_PREFIX}_last_run_timestamp_seconds gauge",
+        f'{PROM_PREFIX}_last_run_timestamp_seconds{{script="{_label(script)}"}} {int(time.time())}',
+    ]
+    return lines
+
+
+def write_textfile(script: str, records: list[dict], directory: Path = TEXTFILE_DIR) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"zonted-metrics-{script}.prom"
+    # node_exporter may read at any moment: write aside, then rename.
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text("\n".join(prometheus_lines(script, records)) + "\n")
+    os.replace(tmp, path)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def load(path: Path = JSONL_PATH, since: datetime | None = None) -> list[dict]:
+    if not path.exists():
+        return []
+    cutoff = since.isoformat(timespec="seconds") if since else ""
+    records = []
+    with path.open() as handle:
+        for line in handle:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a run killed mid-write
+            if entry.get("ts", "") >= cutoff:
+                records.append(entry)
+    return records
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(-(-q * len(sorted_values) // 100)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(records: list[dict]) -> list[dict]:
+    """Per (script, stage, name, source): count, failures, p50 / p95 / max seconds, mean bytes."""
+    groups: dict[tuple[str, str, str, str], list[dict]] = {}
+    for entry in records:
+        key = (entry.get("script", ""), entry["stage"], entry["name"], entry.get("source", ""))
+        groups.setdefault(key, []).append(entry)
+    rows = []
+    for (script, stage_name, name, source), entries in sorted(groups.items()):
+        seconds = sorted(float(e.get("seconds") or 0) for e in entries)
+        rows.append({
+            "script": script,
+            "stage": stage_name,
+            "name": name,
+            "source": source,
+            "count": len(entries),
+            "notOk": sum(1 for e in entries if e.get("outcome") != "ok"),
+            "p50": percentile(seconds, 50),
+            "p95": percentile(seconds, 95),
+            "max": seconds[-1],
+            "bytes": sum(int(e.get("bytes") or 0) for e in entries) // len(entries),
+        })
+    return rows
@@ -0,0 +1,152 @@
+"""Public YouTube Shorts metrics for the social snapshot.
+
+The channel's Shorts tab is read with yt-dlp (no API quota or OAuth) and
+each night's per-video view counts go to the metrics store. Views are
+attributed to publish dates: from the Tabiji publish log (metricslib.publishlog)
+where it has the video, otherwise from a per-video yt-dlp lookup. A date is
+resolved once and kept in the store, so a night only looks up videos it
+hasn't seen before.
+"""
+from __future__ import annotations
+
+import json
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+from metricslib import publishlog, runtime
+from metricslib.store import MetricsStore, iso_days
+
+YOUTUBE_SHORTS_URL = "https://www.youtube.com/@tabijiai/shorts"
+PLATFORM = "youtube"
+LOOKUP_WORKERS = 4
+LOOKUP_LIMIT = 40  # per night; a backlog of undated videos drains over several runs
+LOOKUP_TIMEOUT = 60
+
+
+def video_id_from_url(url: str) -> str:
+    return publishlog.video_id("yt", url)
+
+
+def date_label(iso_date: str) -> str:
+    try:
+        parsed = datetime.strptime(iso_date, "%Y-%m-%d")
+        return f"{parsed.strftime('%b')} {parsed.day}"
+    except ValueError:
+        return iso_date
+
+
+def lookup_publish_date(ytdlp: str, video_id: str) -> str:
+    """The upload day yt-dlp reports for one video, or "" when it can't say."""
+    try:
+        proc = runtime.run(
+            [ytdlp, "--skip-download", "--no-warnings", "--print", "%(upload_date)s",
+             f"https://www.youtube.com/shorts/{video_id}"],
+            check=False, capture=True, timeout=LOOKUP_TIMEOUT,
+        )
+    except (subprocess.TimeoutExpired, OSError) as exc:
+        # One hung lookup mustn't sink the batch; the video stays undated and is retried next run.
+        print(f"warning: yt-dlp lookup for {video_id} failed: {type(exc).__name__}", file=sys.stderr)
+        return ""
+    raw = proc.stdout.strip() if proc.returncode == 0 else ""
+    return f"{raw[:4]}-{raw[4:6]}-{raw[6:8]}" if re.fullmatch(r"\d{8}", raw) else ""
+
+
+def lookup_publish_dates(ytdlp: str, video_ids: list[str]) -> dict[str, str]:
+    """Resolve undated videos concurrently, at most LOOKUP_LIMIT per run."""
+    batch = video_ids[:LOOKUP_LIMIT]
+    if not batch:
+        return {}
+    with ThreadPoolExecutor(max_workers=LOOKUP_WORKERS) as pool:
+        found = dict(zip(batch, pool.map(lambda video_id: lookup_publish_date(ytdlp, video_id), batch)))
+    missing = len(video_ids) - sum(1 for day in found.values() if day)
+    if missing:
+        print(f"warning: {missing} YouTube video(s) still without a publish date", file=sys.stderr)
+    return found
+
+
+def views_by_publish_date(rows: list[tuple[str, str, float]]) -> tuple[list[str], list[int]]:
+    """Daily (days, views) from (video_id, publish day, views) rows, gaps filled with 0."""
+    dated = [(published, views) for _video_id, published, views in rows if published]
+    if not dated:
+        return [], []
+    first = date.fromisoformat(min(day for day, _ in dated))
+    days = iso_days(first, date.fromisoformat(max(day for day, _ in dated)))
+    try:
+        import numpy as np
+    except ImportError:
+        totals: dict[str, float] = defaultdict(float)
+        for published, views in dated:
+            totals[published] += views
+        return days, [int(totals[day]) for day in days]
+    offsets = np.array([(date.fromisoformat(day) - first).days for day, _ in dated])
+    sums = np.bincount(offsets, weights=np.array([views for _, views in dated], dtype=float), minlength=len(days))
+    return days, [int(value) for value in sums]
+
+
+def fetch_metrics(run_date: str | None = None) -> dict:
+    """Fetch current public YouTube Shorts metrics via yt-dlp.
+
+    YouTube Analytics OAuth is still upload-only, so this keeps the public card fresh
+    from the channel page until the token is expanded to yt-analytics.readonly.
+    """
+    ytdlp = runtime.which("yt-dlp")
+    if not ytdlp:
+        raise RuntimeError("yt-dlp not found; cannot refresh YouTube public metrics")
+    proc = runtime.run([ytdlp, "--flat-playlist", "--dump-single-json", YOUTUBE_SHORTS_URL], capture=True, timeout=240)
+    payload = json.loads(proc.stdout)
+    videos = []
+    for idx, entry in enumerate(payload.get("entries") or [], 1):
+        video_id = entry.get("id")
+        if not video_id:
+            continue
+        url = entry.get("url") or f"https://www.youtube.com/shorts/{video_id}"
+        views = int(entry.get("view_count") or 0)
+        videos.append(
+            {
+                "rank": idx,
+                "videoId": video_id,
+                "title": entry.get("title") or video_id,
+                "url": url,
+                "views": views,
+            }
+        )
+
+    top = sorted(videos, key=lambda row: row["views"], reverse=True)[:5]
+    run_date = run_date or date.today().isoformat()
+    store = MetricsStore(runtime.METRICS_DB)
+    try:
+        store.record_videos(run_date, PLATFORM, {video["videoId"]: (video["title"], video["views"]) for video in videos})
+        known = store.video_dates(PLATFORM)
+        # Channel order is newest first, so recent uploads are looked up first;
+        # videos since removed from the channel are left alone.
+        undated = [video["videoId"] for video in videos if not known.get(video["videoId"])]
+        if undated:
+            log_dates = publishlog.read().get("yt", {})
+            store.set_published(PLATFORM, {video_id: log_dates.get(video_id, "") for video_id in undated}, "publish-log")
+            undated = [video_id for video_id in undated if not log_dates.get(video_id)]
+            store.set_published(PLATFORM, lookup_publish_dates(ytdlp, undated), "yt-dlp")
+        rows = store.video_views(PLATFORM, run_date)
+    finally:
+        store.close()
+
+    dates, series = views_by_publish_date(rows)
+    tracked = [views for _video_id, published, views in rows if published]
+    return {
+        "handle": payload.get("uploader_id") or "@tabijiai",
+        "subscribers": int(payload.get("channel_follower_count") or 0),
+        "videos": len(videos),
+        "totalViews": sum(row["views"] for row in videos),
+        "topShorts": top,
+        "trackedVideos": len(tracked),
+        "trackedViews": int(sum(tracked)),
+        "timeSeries": {
+            "label": "Views by publish date",
+            "range": f"{date_label(dates[0])}–{date_label(dates[-1])}" if dates else "",
+            "labels": [date_label(day) for day in dates],
+            "series": series,
+        },
+    }
@@ -0,0 +1,44 @@
+"""Shared setup for the scripts/ tests.
+
+The scripts import each other as top-level modules (scripts/ is their
+sys.path entry), and metricslib.runtime fixes its state paths at import
+time, so the workspace is pointed at a throwaway directory before anything
+under test is imported.
+
+run_cron() runs update-metrics-cron.py end to end in a subprocess, replaying
+the synthetic cassette in fixtures/metrics-cassette with its own scratch
+workspace, output and textfile directories.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+CASSETTE = Path(__file__).resolve().parent / "fixtures" / "metrics-cassette"
+WORKSPACE = tempfile.mkdtemp(prefix="zonted-tests-")
+
+os.environ["ZONTED_WORKSPACE"] = WORKSPACE
+os.environ["ZONTED_METRICS_OUT"] = os.path.join(WORKSPACE, "metrics")
+sys.path.insert(0, str(SCRIPTS))
+
+
+def run_cron(tmp_path: Path, *args: str) -> subprocess.CompletedProcess:
+    out = tmp_path / "metrics"
+    out.mkdir()
+    shutil.copy2(SCRIPTS.parent / "metrics" / "model.json", out / "model.json")
+    env = {key: value for key, value in os.environ.items()
+           # Credentials from the calling shell would bypass the cassette's redacted ones.
+           if key not in ("ZONTED_GOOGLE_ACCESS_TOKEN", "STRIPE_VERACITYAPI_READONLY_KEY", "ZONTED_METRICS_RECORD")}
+    env.update(
+        ZONTED_METRICS_REPLAY=str(CASSETTE),
+        ZONTED_WORKSPACE=str(tmp_path / "workspace"),
+        ZONTED_METRICS_OUT=str(out),
+        ZONTED_TEXTFILE_DIR=str(tmp_path / "textfile"),
+    )
+    return subprocess.run([sys.executable, str(SCRIPTS / "update-metrics-cron.py"), *args],
+                          env=env, capture_output=True, text=True, timeout=120)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from metricslib import anomaly
+from metricslib.store import MetricsStore, iso_days
+
+RUN_DATE = "2026-03-31"
+CHECKS = (("ga4", "sessions", 1),)
+
+
+def history(values) -> list[list[float]]:
+    """One series padded with NaN on the left to the span score() needs."""
+    values = [float(v) for v in values]
+    return [[np.nan] * (anomaly.span() - len(values)) + values]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MetricsStore(tmp_path / "metrics.sqlite")
+    yield store
+    store.close()
+
+
+def record(store, values, prop="site"):
+    last = date.fromisoformat(RUN_DATE) - timedelta(days=1)
+    days = iso_days(last - timedelta(days=len(values) - 1), last)
+    store.record_series(RUN_DATE, "ga4", prop, "sessions", days, values)
+
+
+def test_constant_baseline_uses_mad_floor():
+    baseline = np.full((2, 28), 100.0)
+
+    z, median = anomaly.robust_z(np.array([104.0, 200.0]), baseline, np.array([10.0, 10.0]))
+
+    # MAD is 0, so the floor (10% of the level) is the scale, not a divide by zero.
+    assert median.tolist() == [100.0, 100.0]
+    assert z.tolist() == pytest.approx([0.4, 10.0])
+
+
+def test_constant_series_small_wobble_is_not_anomalous():
+    scores = anomaly.score(history([100] * 63 + [104]))
+
+    for kind in ("level", "weekday"):
+        z, expected, _observed = scores[kind]
+        assert expected[0] == 100.0
+        assert abs(z[0]) < anomaly.THRESHOLD
+
+
+def test_all_zero_series_floor_is_one_unit():
+    z, expected, _observed = anomaly.score(history([0] * 63 + [1]))["level"]
+
+    assert expected[0] == 0.0
+    assert z[0] == pytest.approx(1.0)
+
+
+def test_short_history_scores_nan():
+    scores = anomaly.score(history([100] * 3 + [500]))
+
+    assert all(np.isnan(z[0]) for z, _expected, _observed in scores.values())
+
+
+def test_detect_flags_drop_on_constant_series(store):
+    record(store, [100] * 63 + [20])
+
+    alerts, evaluated = anomaly.detect(store, RUN_DATE, CHECKS)
+
+    assert evaluated == 1
+    assert [(a.property, a.direction) for a in alerts] == [("site", "down")]
+    assert alerts[0].expected == 100.0
+    assert alerts[0].value == 20.0
+
+
+def test_detect_ignores_weekly_pattern(store):
+    # Weekends at a fifth of weekday traffic; the scored day is a weekend.
+    week = [100, 100, 100, 100, 100, 20, 20]
+    values = (week * 10)[-anomaly.span():]
+    assert values[-1] == 20
+    record(store, values)
+
+    alerts, _evaluated = anomaly.detect(store, RUN_DATE, CHECKS)
+
+    assert alerts == []
+
+
+def test_detect_skips_series_below_min_level(store):
+    record(store, [1] * 63 + [4])
+
+    alerts, _evaluated = anomaly.detect(store, RUN_DATE, CHECKS)
+
+    assert alerts == []
+
+
+def test_detect_ranks_by_score(store):
+    record(store, [100] * 63 + [300], prop="big")
+    record(store, [100] * 63 + [150], prop="small")
+
+    alerts, _evaluated = anomaly.detect(store, RUN_DATE, CHECKS)
+
+    assert [a.property for a in alerts] == ["big", "small"]
+    assert all(a.direction == "up" for a in alerts)
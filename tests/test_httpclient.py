@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import httpclient
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    seen: list[tuple[str, str, str | None]] = []
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status=200, body=b"ok", headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self.seen.append((self.command, self.path, self.headers.get("Authorization")))
+        port = self.server.server_address[1]
+        if self.path == "/drop":
+            # Looks keep-alive to the client, but the server hangs up: the
+            # pooled connection is stale by the next request.
+            self._reply()
+            self.close_connection = True
+        elif self.path == "/slow":
+            time.sleep(0.5)
+            self._reply()
+        elif self.path == "/elsewhere":
+            self._reply(302, b"", {"Location": f"http://localhost:{port}/final"})
+        elif self.path == "/same-host":
+            self._reply(302, b"", {"Location": "/final"})
+        else:
+            self._reply()
+
+    do_GET = do_POST = _handle
+
+
+@pytest.fixture
+def server():
+    Handler.seen = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def client(tmp_path):
+    return httpclient.Client(retries=0, cache_dir=tmp_path)
+
+
+def test_get_on_stale_pooled_connection_reconnects(server, client):
+    assert client.get(f"{server}/drop").status == 200
+    time.sleep(0.05)
+
+    resp = client.get(f"{server}/next")
+
+    assert resp.status == 200
+    assert resp.attempts == 1
+    assert [path for _m, path, _a in Handler.seen] == ["/drop", "/next"]
+
+
+def test_post_on_stale_pooled_connection_is_not_resent(server, client):
+    assert client.get(f"{server}/drop").status == 200
+    time.sleep(0.05)
+
+    with pytest.raises(httpclient.RequestError):
+        client.request("POST", f"{server}/token", data=b"grant=x")
+
+    assert [m for m, _path, _a in Handler.seen].count("POST") <= 1
+
+
+def test_read_timeout_on_pooled_connection_is_not_resent(server, client):
+    assert client.get(f"{server}/warm").status == 200
+
+    with pytest.raises(httpclient.RequestError):
+        client.get(f"{server}/slow", timeout=0.1)
+
+    time.sleep(0.6)
+    assert [path for _m, path, _a in Handler.seen].count("/slow") == 1
+
+
+def test_redirect_to_other_host_drops_credentials(server, client):
+    resp = client.get(f"{server}/elsewhere", headers={"Authorization": "Bearer sk", "Cookie": "s=1"})
+
+    assert resp.status == 200
+    assert Handler.seen == [("GET", "/elsewhere", "Bearer sk"), ("GET", "/final", None)]
+
+
+def test_redirect_on_same_host_keeps_credentials(server, client):
+    client.get(f"{server}/same-host", headers={"Authorization": "Bearer sk"})
+
+    assert Handler.seen == [("GET", "/same-host", "Bearer sk"), ("GET", "/final", "Bearer sk")]
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import importlib.util
+
+import pytest
+
+import imgfetch
+from conftest import SCRIPTS
+
+# The committed sample fixtures, with the dimensions encoded in their URLs.
+SAMPLES = {
+    "https://img.zonted.com/fixtures/sample-40x30.png": (40, 30),
+    "https://img.zonted.com/fixtures/sample-64x48.jpg": (64, 48),
+    "https://img.zonted.com/fixtures/sample-48x32.webp": (48, 32),
+    "https://img.zonted.com/fixtures/sample-36x24.avif": (36, 24),
+    "https://img.zonted.com/fixtures/sample-20x10.gif": (20, 10),
+}
+
+
+def load_script(name: str):
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), SCRIPTS / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def dims():
+    return load_script("add-image-dims")
+
+
+@pytest.fixture
+def replay():
+    return imgfetch.ReplayBackend()
+
+
+def test_committed_fixtures_cover_every_format(replay):
+    assert set(replay.index) == set(SAMPLES)
+
+
+@pytest.mark.parametrize("url", sorted(SAMPLES))
+def test_dimensions_read_through_replay(replay, dims, url):
+    resp = replay.request(url, headers={"Range": "bytes=0-65535"}, max_bytes=imgfetch.HEADER_BYTES)
+
+    assert resp.status == 200
+    assert dims.read_dims(resp.body) == SAMPLES[url]
+
+
+def test_head_reports_recorded_size(replay):
+    url = "https://img.zonted.com/fixtures/sample-64x48.jpg"
+
+    resp = replay.request(url, method="HEAD")
+
+    assert resp.body == b""
+    assert imgfetch.total_bytes(resp) == replay.index[url]["total"]
+
+
+def test_unknown_url_raises(replay):
+    with pytest.raises(imgfetch.FetchError):
+        replay.request("https://img.zonted.com/fixtures/missing.png")
+
+
+def test_missing_fixture_dir_raises(tmp_path):
+    with pytest.raises(ValueError, match="no fixtures"):
+        imgfetch.ReplayBackend(tmp_path)
+
+
+def test_bench_runs_on_a_clean_checkout(dims, capsys):
+    assert dims.bench(2) == 0
+    assert f"Total: {len(SAMPLES)} images" in capsys.readouterr().out
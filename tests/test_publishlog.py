@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+
+import pytest
+
+from metricslib import publishlog
+
+TS = 1_760_000_000
+DAY = datetime.fromtimestamp(TS).strftime("%Y-%m-%d")
+
+
+def row(n: int) -> str:
+    return json.dumps({"ts": TS, "platforms": {"yt": f"https://youtube.com/shorts/video{n:03d}", "tt": f"tt-{n}"}})
+
+
+def log_text(*rows: str) -> str:
+    return "[\n" + ",\n".join(rows) + "\n]\n"
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return tmp_path / "publish-log.json", tmp_path / "index.json"
+
+
+def read(paths):
+    return publishlog.read(*paths)
+
+
+def index(paths) -> dict:
+    return json.loads(paths[1].read_text())
+
+
+def test_missing_log_is_empty(paths):
+    assert read(paths) == {}
+
+
+def test_first_read_builds_index(paths):
+    paths[0].write_text(log_text(row(1), row(2)))
+
+    assert read(paths) == {"yt": {"video001": DAY, "video002": DAY}, "tt": {"tt-1": DAY, "tt-2": DAY}}
+    text = paths[0].read_text()
+    assert index(paths)["offset"] == text.rindex("}") + 1
+
+
+def test_append_parses_only_new_rows(paths, monkeypatch):
+    paths[0].write_text(log_text(row(1)))
+    read(paths)
+    monkeypatch.setattr(publishlog, "_rebuild", lambda *args: pytest.fail("appended log was rebuilt"))
+
+    paths[0].write_text(log_text(row(1), row(2)))
+
+    assert set(read(paths)["yt"]) == {"video001", "video002"}
+
+
+def test_edited_prefix_rebuilds(paths):
+    paths[0].write_text(log_text(row(1), row(2)))
+    read(paths)
+
+    paths[0].write_text(log_text(row(3), row(2)))
+
+    assert set(read(paths)["yt"]) == {"video002", "video003"}
+
+
+def test_truncated_tail_keeps_complete_rows_and_resumes(paths):
+    paths[0].write_text(log_text(row(1)))
+    read(paths)
+    complete = index(paths)["offset"]
+
+    # The publisher is mid-write: the new row is cut off and the array unclosed.
+    full = log_text(row(1), row(2), row(3))
+    cut = full.index(row(3)) + len(row(3)) // 2
+    paths[0].write_text(full[:cut])
+
+    assert set(read(paths)["yt"]) == {"video001", "video002"}
+    assert complete < index(paths)["offset"] < cut
+
+    paths[0].write_text(full)
+
+    assert set(read(paths)["yt"]) == {"video001", "video002", "video003"}
+    assert index(paths)["offset"] == full.rindex("}") + 1
+
+
+def test_truncated_tail_without_index(paths):
+    full = log_text(row(1), row(2))
+    paths[0].write_text(full[:full.index(row(2)) + 5])
+
+    assert set(read(paths)["yt"]) == {"video001"}
+
+    paths[0].write_text(full)
+
+    assert set(read(paths)["yt"]) == {"video001", "video002"}
+
+
+def test_multibyte_character_cut_at_tail(paths):
+    paths[0].write_text(log_text(row(1)))
+    read(paths)
+
+    titled = json.dumps({"ts": TS, "title": "東京", "platforms": {"tt": "tt-jp"}}, ensure_ascii=False)
+    full = log_text(row(1), titled).encode()
+    # Cut inside the three-byte encoding of the first kanji.
+    paths[0].write_bytes(full[:full.index("東".encode()) + 1])
+
+    assert "tt-jp" not in read(paths)["tt"]
+
+    paths[0].write_bytes(full)
+
+    assert read(paths)["tt"]["tt-jp"] == DAY
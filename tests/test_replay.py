@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import json
+
+from conftest import run_cron
+
+
+def test_portfolio_cycle_replays_end_to_end(tmp_path):
+    proc = run_cron(tmp_path, "--no-push", "--no-post", "--jobs", "portfolio", "--force")
+
+    assert proc.returncode == 0, proc.stderr
+    assert "ReplayMiss" not in proc.stderr
+    # git pull / rev-parse answered by run_command from the cassette.
+    assert "Commit: `1a2b3c4` · not pushed (--no-push)" in proc.stdout
+    assert "DRY RUN Slack message" in proc.stdout
+    assert "Sessions: Tabiji 120, VeracityAPI 120" in proc.stdout
+
+    # GA4 / GSC went out with the replay access token and matched their recordings.
+    ga4 = json.loads((tmp_path / "metrics" / "data" / "ga4.json").read_text())
+    assert "Tabiji" in json.dumps(ga4)
+    # Stripe's key came from the recorded `security` lookup ("<redacted>").
+    stripe = json.loads((tmp_path / "workspace" / "state" / "zonted-stripe-sync.json").read_text())
+    assert set(stripe["charges"]) == {"ch_fixture1"}
+    assert (tmp_path / "metrics" / "index.html").exists()
+
+
+def test_unrecorded_job_fails_with_replay_miss(tmp_path):
+    proc = run_cron(tmp_path, "--no-push", "--no-post", "--jobs", "social", "--force")
+
+    assert proc.returncode != 0
+    assert "no recording for" in proc.stdout + proc.stderr
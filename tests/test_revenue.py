@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import pytest
+
+from metricslib import revenue
+
+DAY = 86400
+WATERMARK = 1_760_000_000
+
+
+@pytest.fixture
+def stripe(tmp_path, monkeypatch):
+    """Serve canned list pages and record the params each list was asked for."""
+    monkeypatch.setattr(revenue, "STRIPE_SYNC_PATH", tmp_path / "stripe-sync.json")
+    pages: dict[str, list[dict]] = {name: [] for name in revenue.STRIPE_SYNC_FIELDS}
+    calls: list[tuple[str, dict]] = []
+
+    def stripe_list(path, params=None):
+        calls.append((path, dict(params or {})))
+        return pages[path]
+
+    monkeypatch.setattr(revenue, "stripe_list", stripe_list)
+    return pages, calls
+
+
+def charge(id_, created, **fields):
+    return {"id": id_, "created": created, "status": "succeeded", "paid": True, "refunded": False,
+            "currency": "usd", "amount": 500, "amount_captured": 500, "amount_refunded": 0, **fields}
+
+
+def test_first_sync_pages_everything_and_sets_watermark(stripe):
+    pages, calls = stripe
+    pages["charges"] = [charge("ch_1", WATERMARK - DAY), charge("ch_2", WATERMARK)]
+
+    store = revenue.sync_stripe()
+
+    assert calls == [("charges", {}), ("balance_transactions", {})]
+    assert store["watermarks"] == {"charges": WATERMARK}
+    assert set(store["charges"]) == {"ch_1", "ch_2"}
+
+
+def test_incremental_sync_starts_exactly_one_overlap_behind_watermark(stripe):
+    pages, calls = stripe
+    pages["charges"] = [charge("ch_1", WATERMARK)]
+    revenue.sync_stripe()
+    calls.clear()
+
+    revenue.sync_stripe()
+
+    assert calls[0] == ("charges", {"created[gte]": WATERMARK - 7 * DAY})
+    # No watermark yet for an empty list, so it is still paged from the start.
+    assert calls[1] == ("balance_transactions", {})
+
+
+def test_refund_inside_overlap_replaces_stored_charge(stripe):
+    pages, _calls = stripe
+    pages["charges"] = [charge("ch_old", WATERMARK - 7 * DAY), charge("ch_new", WATERMARK)]
+    revenue.sync_stripe()
+
+    # The next night re-lists from the boundary: the charge created exactly
+    # 7 days before the watermark has since been refunded.
+    pages["charges"] = [charge("ch_old", WATERMARK - 7 * DAY, refunded=True, amount_refunded=500)]
+    store = revenue.sync_stripe()
+
+    assert store["charges"]["ch_old"]["refunded"] is True
+    assert store["charges"]["ch_new"]["refunded"] is False
+    assert store["watermarks"]["charges"] == WATERMARK
+
+
+def test_full_sync_ignores_watermark(stripe):
+    pages, calls = stripe
+    pages["charges"] = [charge("ch_1", WATERMARK)]
+    revenue.sync_stripe()
+    calls.clear()
+
+    revenue.sync_stripe(full=True)
+
+    assert calls == [("charges", {}), ("balance_transactions", {})]
+
+
+def test_failed_sync_does_not_advance_watermark(stripe, monkeypatch):
+    pages, _calls = stripe
+    pages["charges"] = [charge("ch_1", WATERMARK)]
+    revenue.sync_stripe()
+
+    pages["charges"] = [charge("ch_2", WATERMARK + DAY)]
+    del pages["balance_transactions"]  # the second list fails mid-sync
+    with pytest.raises(KeyError):
+        revenue.sync_stripe()
+
+    assert revenue.load_stripe_store()["watermarks"] == {"charges": WATERMARK}
+
+
+def test_only_synced_fields_are_stored(stripe):
+    pages, _calls = stripe
+    pages["charges"] = [charge("ch_1", WATERMARK, customer="cus_secret", description="x")]
+
+    store = revenue.sync_stripe()
+
+    assert set(store["charges"]["ch_1"]) == set(revenue.STRIPE_SYNC_FIELDS["charges"])
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from metricslib import scrape
+
+FIELDS = ("followerCount", "heartCount")
+
+
+def feed_all(scanner, chunks) -> bool:
+    for chunk in chunks:
+        if scanner.feed(chunk):
+            return True
+    scanner.finish()
+    return scanner.done
+
+
+def split_at(body: bytes, *cuts: int) -> list[bytes]:
+    bounds = [0, *cuts, len(body)]
+    return [body[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def test_counter_split_across_chunk_boundary():
+    # The boundary falls between "12" and "345", with more than OVERLAP
+    # bytes of page before it, so only the kept tail can join the halves.
+    body = b"x" * (4 * scrape.OVERLAP) + b'"followerCount":12345,"heartCount":9,' + b"y" * 1000
+    cut = body.index(b"12345") + 2
+    scanner = scrape.Scanner(FIELDS)
+
+    assert feed_all(scanner, split_at(body, cut))
+    assert scanner.found == {"followerCount": "12345", "heartCount": "9"}
+
+
+def test_counter_ending_exactly_at_chunk_end_waits_for_next_chunk():
+    body = b"x" * 1000 + b'"followerCount":123' + b',"heartCount":4}'
+    cut = body.index(b"123") + 3
+    scanner = scrape.Scanner(FIELDS)
+
+    assert not scanner.feed(body[:cut])
+    assert "followerCount" not in scanner.found
+    assert scanner.feed(body[cut:])
+    assert scanner.found["followerCount"] == "123"
+
+
+def test_field_name_split_across_chunk_boundary():
+    body = b"x" * 1000 + b'"heartCount":7,"followerCount":88,'
+    cut = body.index(b"Count") + 2
+    scanner = scrape.Scanner(FIELDS)
+
+    assert feed_all(scanner, split_at(body, cut))
+    assert scanner.found == {"heartCount": "7", "followerCount": "88"}
+
+
+def test_counter_at_end_of_body_is_accepted_on_finish():
+    scanner = scrape.Scanner(FIELDS)
+
+    assert not scanner.feed(b'"heartCount":1,"followerCount":42')
+    scanner.finish()
+
+    assert scanner.found == {"heartCount": "1", "followerCount": "42"}
+
+
+def test_first_occurrence_wins_when_tail_is_rescanned():
+    body = b'"followerCount":1,' + b"x" * 10 + b'"followerCount":2,"heartCount":3,'
+    scanner = scrape.Scanner(FIELDS)
+
+    # Every byte is its own chunk, so each match is seen through many tails.
+    assert feed_all(scanner, [body[i:i + 1] for i in range(len(body))])
+    assert scanner.found == {"followerCount": "1", "heartCount": "3"}
+
+
+def test_deadline_raises_scan_timeout():
+    scanner = scrape.Scanner(FIELDS, deadline=time.monotonic() - 1)
+
+    with pytest.raises(scrape.ScanTimeout, match="followerCount, heartCount"):
+        scanner.feed(b"x")
+
+
+class FakeResponse:
+    def raise_for_status(self):
+        return self
+
+
+def test_counts_stops_reading_once_every_field_is_found(monkeypatch):
+    body = b'"followerCount":5,"heartCount":6,' + b"z" * 10_000
+    chunks = split_at(body, 16, 64, 4096)
+    fed: list[bytes] = []
+
+    def stream(url, on_chunk, **kwargs):
+        for chunk in chunks:
+            fed.append(chunk)
+            if on_chunk(chunk):
+                break
+        return FakeResponse()
+
+    monkeypatch.setattr(scrape.httpclient, "stream", stream)
+
+    assert scrape.counts("https://example.test/@user", FIELDS) == {"followerCount": 5, "heartCount": 6}
+    assert len(fed) < len(chunks)
+
+
+def test_counts_reports_missing_fields(monkeypatch):
+    def stream(url, on_chunk, **kwargs):
+        on_chunk(b'"followerCount":5')
+        return FakeResponse()
+
+    monkeypatch.setattr(scrape.httpclient, "stream", stream)
+
+    with pytest.raises(RuntimeError, match="heartCount"):
+        scrape.counts("https://example.test/@user", FIELDS)
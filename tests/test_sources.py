@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import subprocess
+import time
+
+import pytest
+
+import httpclient
+from metricslib import runtime, sources
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return sources.Registry(tmp_path / "last-good.json", group="test")
+
+
+def test_fresh_value_is_saved_as_last_good(registry):
+    registry.register("fast", lambda: {"n": 1})
+
+    result = registry.run()["fast"]
+
+    assert result.ok and result.value == {"n": 1}
+    assert registry.load_last_good()["fast"]["value"] == {"n": 1}
+
+
+def test_timeout_falls_back_to_last_good(registry):
+    registry.save_last_good({"slow": {"value": 7, "fetchedAt": time.time() - 60}})
+    registry.register("slow", lambda: time.sleep(1), timeout=0.2)
+
+    result = registry.run()["slow"]
+
+    assert result.stale and result.value == 7
+    assert isinstance(result.error, TimeoutError)
+
+
+def test_fetch_command_is_cut_off_at_deadline(registry, tmp_path):
+    marker = tmp_path / "written"
+
+    def fetch():
+        runtime.run(["sleep", "5"])
+        marker.write_text("late write")  # must never happen after the slot
+
+    registry.register("hung", fetch, timeout=0.3, cache=False)
+    started = time.monotonic()
+
+    result = registry.run()["hung"]
+
+    assert result.missing
+    assert time.monotonic() - started < 2
+    time.sleep(0.2)
+    assert not marker.exists()
+
+
+def test_fetch_request_past_deadline_raises(registry):
+    def fetch():
+        time.sleep(0.3)
+        httpclient.Client(retries=0).get("http://127.0.0.1:9/never")
+
+    errors = []
+    registry.register("late", lambda: errors.append(_capture(fetch)), timeout=0.1, cache=False)
+
+    registry.run()
+
+    assert errors and isinstance(errors[0], httpclient.DeadlineExceeded)
+
+
+def test_nested_registry_keeps_enclosing_deadline(tmp_path):
+    seen = {}
+
+    def inner():
+        seen["left"] = httpclient.remaining(1000)
+
+    def outer():
+        nested = sources.Registry(group="inner")
+        nested.register("child", inner, timeout=1000, cache=False)
+        nested.run()
+
+    outer_registry = sources.Registry(group="outer")
+    outer_registry.register("parent", outer, timeout=5, cache=False)
+    outer_registry.run()
+
+    assert 0 < seen["left"] <= 5
+
+
+def test_no_deadline_outside_a_registry():
+    assert httpclient.DEADLINE.get() is None
+    assert httpclient.remaining(30) == 30
+    assert runtime.run(["true"]).returncode == 0
+
+
+def test_deadline_caps_subprocess_timeout():
+    token = httpclient.DEADLINE.set(time.monotonic() + 0.2)
+    try:
+        with pytest.raises(subprocess.TimeoutExpired):
+            runtime.run(["sleep", "5"], timeout=60)
+        with pytest.raises(httpclient.DeadlineExceeded):
+            runtime.run(["true"])
+    finally:
+        httpclient.DEADLINE.reset(token)
+
+
+def _capture(fn):
+    try:
+        fn()
+    except BaseException as exc:
+        return exc
+    return None
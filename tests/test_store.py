@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+
+from metricslib.store import MetricsStore, iso_days
+
+END = "2026-03-31"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MetricsStore(tmp_path / "metrics.sqlite")
+    yield store
+    store.close()
+
+
+def days_back(n: int, end: str = END) -> list[str]:
+    last = date.fromisoformat(end)
+    return iso_days(last - timedelta(days=n - 1), last)
+
+
+def test_latest_run_wins_per_day(store):
+    store.record_series("2026-03-30", "ga4", "site", "sessions", ["2026-03-29", "2026-03-30"], [10, 4])
+    # The next night revises the partial day and adds a new one.
+    store.record_series("2026-03-31", "ga4", "site", "sessions", ["2026-03-30", "2026-03-31"], [12, 7])
+
+    assert store.series("ga4", "site", "sessions", "2026-03-29", END) == {
+        "2026-03-29": 10.0, "2026-03-30": 12.0, "2026-03-31": 7.0,
+    }
+
+
+def test_rerunning_a_night_replaces_its_rows(store):
+    store.record_totals(END, "ga4", "site", {"sessions": 5})
+    store.record_totals(END, "ga4", "site", {"sessions": 9})
+
+    assert store.snapshot(END, "ga4", "sessions") == {"site": 9.0}
+
+
+def test_rollups_split_current_and_previous_windows(store):
+    days = days_back(14)
+    store.record_series(END, "ga4", "site", "sessions", days, [1] * 7 + [2] * 7)
+
+    rollup = store.rollups("ga4", "sessions", END, windows=(7,))
+
+    assert rollup == {"site": {"7d": 14.0, "7d_prev": 7.0}}
+
+
+def test_rollup_window_edges_are_exact(store):
+    # One point just inside the 28-day window, one on the first day of the
+    # window before it, one just outside both.
+    last = date.fromisoformat(END)
+    edges = [(last - timedelta(days=27)).isoformat(), (last - timedelta(days=28)).isoformat(),
+             (last - timedelta(days=56)).isoformat()]
+    store.record_series(END, "gsc", "site", "clicks", edges, [1, 10, 100])
+
+    rollup = store.rollups("gsc", "clicks", END, windows=(28,))["site"]
+
+    assert rollup == {"28d": 1.0, "28d_prev": 10.0}
+
+
+def test_rollups_treat_missing_days_as_zero(store):
+    store.record_series(END, "ga4", "a", "sessions", days_back(3), [1, 2, 3])
+    store.record_series(END, "ga4", "b", "sessions", [END], [5])
+
+    rollup = store.rollups("ga4", "sessions", END)
+
+    assert rollup["a"]["7d"] == 6.0
+    assert rollup["b"]["7d"] == 5.0
+    assert rollup["a"]["90d_prev"] == 0.0
+
+
+def test_rollups_ignore_snapshot_totals(store):
+    store.record_series(END, "ga4", "site", "sessions", [END], [3])
+    store.record_totals(END, "ga4", "site", {"sessions": 1000})
+
+    assert store.rollups("ga4", "sessions", END, windows=(7,))["site"]["7d"] == 3.0
+
+
+def test_rollups_empty_store(store):
+    assert store.rollups("ga4", "sessions", END) == {}
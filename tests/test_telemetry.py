@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+
+import pytest
+
+from conftest import run_cron
+from metricslib import telemetry
+
+RECORD_FIELDS = {"run", "script", "ts", "stage", "name", "seconds", "outcome"}
+SAMPLE_RE = re.compile(r'^zonted_metrics_(\w+)\{([^}]*)\} (-?[\d.]+)$')
+LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+@pytest.fixture(scope="module")
+def cycle(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("cycle")
+    proc = run_cron(tmp_path, "--no-push", "--no-post", "--jobs", "portfolio", "--force")
+    assert proc.returncode == 0, proc.stderr
+    return tmp_path
+
+
+def parse_textfile(text: str) -> tuple[dict[str, str], list[tuple[str, dict[str, str], float]]]:
+    types: dict[str, str] = {}
+    samples = []
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _hash, _type, metric, kind = line.split()
+            types[metric] = kind
+        elif line and not line.startswith("# HELP "):
+            match = SAMPLE_RE.match(line)
+            assert match, f"not an exposition sample: {line!r}"
+            samples.append((f"zonted_metrics_{match.group(1)}", dict(LABEL_RE.findall(match.group(2))),
+                            float(match.group(3))))
+    return types, samples
+
+
+def test_cycle_appends_one_jsonl_record_per_stage(cycle):
+    lines = (cycle / "workspace" / "logs" / "zonted-metrics-telemetry.jsonl").read_text().splitlines()
+    records = [json.loads(line) for line in lines]
+
+    assert all(RECORD_FIELDS <= set(entry) for entry in records)
+    assert len({entry["run"] for entry in records}) == 1
+    assert {entry["script"] for entry in records} == {"update-metrics-cron"}
+    fetches = {entry["name"]: entry for entry in records if entry["stage"] == "fetch"}
+    assert {"git-pull", "ga4", "stripe", "portfolio"} <= set(fetches)
+    assert fetches["ga4"]["group"] == "portfolio" and fetches["ga4"]["outcome"] == "ok"
+    http = {entry["name"]: entry for entry in records if entry["stage"] == "http"}
+    assert http["searchconsole.googleapis.com"]["requests"] == 15
+    assert http["api.stripe.com"]["source"] == "portfolio/stripe"
+    assert records[-1]["stage"] == "run" and records[-1]["outcome"] == "ok"
+
+
+def test_cycle_writes_prometheus_textfile(cycle):
+    directory = cycle / "textfile"
+    assert sorted(os.listdir(directory)) == ["zonted-metrics-update-metrics-cron.prom"]
+
+    types, samples = parse_textfile((directory / "zonted-metrics-update-metrics-cron.prom").read_text())
+
+    assert set(types.values()) == {"gauge"}
+    assert {name for name, _labels, _value in samples} == set(types)
+    for name, labels, _value in samples:
+        expected = {"script"} if name.endswith("_last_run_timestamp_seconds") else {"script", "stage", "name", "source"}
+        assert set(labels) == expected
+    ok = {(labels["stage"], labels["name"]): value for name, labels, value in samples
+          if name == "zonted_metrics_stage_ok"}
+    assert ok[("fetch", "ga4")] == 1 and ok[("run", "update-metrics-cron")] == 1
+    requests = {labels["source"]: value for name, labels, value in samples
+                if name == "zonted_metrics_http_requests" and labels["name"] == "api.stripe.com"}
+    assert requests == {"portfolio/stripe": 2}
+
+
+def test_textfile_is_replaced_atomically(tmp_path, monkeypatch):
+    path = telemetry.write_textfile("job", [], directory=tmp_path)
+    before = path.read_text()
+    real_replace = os.replace
+
+    def replace(src, dst):
+        # The new content is complete aside; readers still see the old file.
+        assert path.read_text() == before
+        assert str(src).endswith(".tmp") and "stage_seconds" in open(src).read()
+        real_replace(src, dst)
+
+    monkeypatch.setattr(telemetry.os, "replace", replace)
+    records = [{"stage": "fetch", "name": 'a "quoted"\nname', "seconds": 1.5, "outcome": "stale"}]
+
+    telemetry.write_textfile("job", records, directory=tmp_path)
+
+    assert os.listdir(tmp_path) == [path.name]
+    _types, samples = parse_textfile(path.read_text())
+    stage = [labels for name, labels, _value in samples if name == "zonted_metrics_stage_ok"]
+    assert stage == [{"script": "job", "stage": "fetch", "name": 'a \\"quoted\\" name', "source": ""}]